@@ -1,20 +1,62 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, g, current_app
-from flask_pymongo import PyMongo
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, current_app, make_response, Response, stream_with_context
 from bson.objectid import ObjectId
 import os
+import re
+import io
+import csv
+import asyncio
+import random
+import functools
+import hmac
+import collections
+import hashlib
+import json
+import logging
+import importlib.util
+import tempfile
+import zipfile
+import concurrent.futures
 import datetime
+import threading
+from xml.sax.saxutils import escape as escape_xml
+import time
 import click
 from flask.cli import with_appcontext
 from dotenv import load_dotenv
-from pymongo import MongoClient # Import MongoClient secara langsung
+from pymongo import MongoClient, ASCENDING, DeleteOne, ReplaceOne, ReturnDocument, UpdateOne # Import MongoClient secara langsung
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError, OperationFailure
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask import session
+from flask import session, g, has_request_context
+from flask.signals import before_render_template, template_rendered
+from pymongo import monitoring
 
 # Muat variabel lingkungan dari file .env
 load_dotenv()
 
 app = Flask(__name__)
 
+# Logging bertingkat: LOG_LEVEL menentukan level minimum, LOG_SAMPLE_RATE (0..1)
+# menentukan porsi log DEBUG/INFO yang benar-benar ditulis. WARNING ke atas selalu ditulis.
+app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO').upper()
+app.config['LOG_SAMPLE_RATE'] = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+# Request yang lebih lambat dari ini (milidetik) selalu dicatat sebagai WARNING
+app.config['LOG_SLOW_REQUEST_MS'] = float(os.environ.get('LOG_SLOW_REQUEST_MS', 1000))
+
+
+class FilterSampelLog(logging.Filter):
+    """Meloloskan hanya sebagian log di bawah WARNING agar stdout tidak membebani request."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+app.logger.setLevel(app.config['LOG_LEVEL'])
+app.logger.addFilter(FilterSampelLog(app.config['LOG_SAMPLE_RATE']))
+
 # --- Hapus baris ini: os.makedirs(app.instance_path) ---
 # Lingkungan Vercel bersifat read-only, jadi tidak bisa membuat direktori di sini.
 # Konfigurasi dan data akan diakses melalui variabel lingkungan dan MongoDB Atlas.
@@ -22,47 +64,486 @@ app = Flask(__name__)
 # Konfigurasi MongoDB - Sekarang diambil dari variabel lingkungan
 mongo_uri = os.environ.get("MONGO_URI")
 if not mongo_uri:
-    print("PERINGATAN: Variabel lingkungan MONGO_URI tidak ditemukan. Menggunakan URI localhost default.")
+    app.logger.warning("Variabel lingkungan MONGO_URI tidak ditemukan. Menggunakan URI localhost default.")
     mongo_uri = "mongodb://localhost:27017/slip_gaji_db"
 
 app.config["MONGO_URI"] = mongo_uri
-print(f"DEBUG: MONGO_URI diatur ke: {app.config['MONGO_URI']}")
+# Kredensial di URI disamarkan sebelum ditulis ke log
+app.logger.debug("MONGO_URI diatur ke: %s", re.sub(r'//[^@/]*@', '//***@', app.config['MONGO_URI']))
 
 # Konfigurasi SECRET_KEY - Sekarang diambil dari variabel lingkungan
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY')
 
 if not app.config['SECRET_KEY']:
     raise ValueError("Tidak ada SECRET_KEY yang diatur. Harap atur di file .env atau variabel lingkungan.")
-print(f"DEBUG: SECRET_KEY diatur (panjang: {len(app.config['SECRET_KEY'])})")
+app.logger.debug("SECRET_KEY diatur (panjang: %d)", len(app.config['SECRET_KEY']))
 
-# --- Inisialisasi PyMongo tanpa mengikatnya ke 'app' secara langsung di tingkat global ---
-# Objek 'mongo_instance' ini akan digunakan oleh get_mongo_db() untuk rute web.
-mongo_instance = PyMongo()
+# Konfigurasi pool koneksi MongoDB - dapat diatur melalui variabel lingkungan
+app.config['MONGO_MAX_POOL_SIZE'] = int(os.environ.get('MONGO_MAX_POOL_SIZE', 10))
+app.config['MONGO_MIN_POOL_SIZE'] = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+app.config['MONGO_MAX_IDLE_TIME_MS'] = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 60000))
+app.config['MONGO_SERVER_SELECTION_TIMEOUT_MS'] = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+app.config['MONGO_CONNECT_TIMEOUT_MS'] = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+app.config['MONGO_SOCKET_TIMEOUT_MS'] = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', 20000))
+# Interval (detik) cache hasil health check, dan jeda sebelum mencoba koneksi ulang setelah gagal
+app.config['MONGO_HEALTHCHECK_INTERVAL'] = float(os.environ.get('MONGO_HEALTHCHECK_INTERVAL', 30))
+app.config['MONGO_RECONNECT_BACKOFF'] = float(os.environ.get('MONGO_RECONNECT_BACKOFF', 2))
+# Pembuatan indeks saat koneksi pertama: 'background' (thread terpisah, tidak menahan
+# request pertama), 'sync', atau 'off' (jalankan 'flask ensure-indexes' saat deploy)
+app.config['MONGO_AUTO_INDEXES'] = os.environ.get('MONGO_AUTO_INDEXES', 'background')
 
-# Fungsi helper untuk mendapatkan objek database PyMongo yang terhubung
-def get_mongo_db():
-    # Gunakan g untuk menyimpan objek PyMongo yang sudah diinisialisasi
-    # Ini memastikan init_app hanya dipanggil sekali per konteks (request atau CLI command)
-    if 'pymongo_db_obj' not in g:
+# --- Instrumentasi: waktu per request, monitoring MongoDB, dan metrik Prometheus ---
+# Header Server-Timing (db, tpl, total) dapat dimatikan jika waktu internal tidak boleh terlihat publik
+app.config['SERVER_TIMING_ENABLED'] = os.environ.get('SERVER_TIMING_ENABLED', '1') not in ('0', 'false', 'False')
+
+# Batas atas bucket histogram latensi (detik)
+METRIK_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_prometheus(labels):
+    if not labels:
+        return ''
+    isi = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in labels
+    )
+    return '{' + isi + '}'
+
+
+class MetrikAplikasi:
+    """Counter, gauge, dan histogram sederhana dalam format teks Prometheus.
+
+    Nilai disimpan per proses; dengan beberapa worker, setiap worker punya
+    metriknya sendiri (Prometheus menjumlahkannya saat scrape per instance).
+    """
+
+    def __init__(self, buckets=METRIK_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._bantuan = {}
+        self._counter = collections.defaultdict(dict)
+        self._gauge = collections.defaultdict(dict)
+        self._histogram = collections.defaultdict(dict)
+
+    def _daftar(self, nama, tipe, bantuan):
+        self._bantuan.setdefault(nama, (tipe, bantuan))
+
+    def inc(self, nama, bantuan, labels=(), nilai=1):
+        with self._lock:
+            self._daftar(nama, 'counter', bantuan)
+            self._counter[nama][labels] = self._counter[nama].get(labels, 0) + nilai
+
+    def gauge_tambah(self, nama, bantuan, labels=(), nilai=1):
+        with self._lock:
+            self._daftar(nama, 'gauge', bantuan)
+            self._gauge[nama][labels] = self._gauge[nama].get(labels, 0) + nilai
+
+    def gauge_atur(self, nama, bantuan, labels=(), nilai=0):
+        with self._lock:
+            self._daftar(nama, 'gauge', bantuan)
+            self._gauge[nama][labels] = nilai
+
+    def observe(self, nama, bantuan, labels, detik):
+        with self._lock:
+            self._daftar(nama, 'histogram', bantuan)
+            data = self._histogram[nama].get(labels)
+            if data is None:
+                data = self._histogram[nama][labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, batas in enumerate(self.buckets):
+                if detik <= batas:
+                    data[0][i] += 1
+            data[1] += detik
+            data[2] += 1
+
+    def render(self):
+        baris = []
+        with self._lock:
+            for nama, (tipe, bantuan) in sorted(self._bantuan.items()):
+                baris.append(f'# HELP {nama} {bantuan}')
+                baris.append(f'# TYPE {nama} {tipe}')
+                if tipe == 'histogram':
+                    for labels, (jumlah_bucket, total, count) in sorted(self._histogram[nama].items()):
+                        for batas, jumlah in zip(self.buckets, jumlah_bucket):
+                            baris.append(f'{nama}_bucket{_label_prometheus(labels + (("le", batas),))} {jumlah}')
+                        baris.append(f'{nama}_bucket{_label_prometheus(labels + (("le", "+Inf"),))} {count}')
+                        baris.append(f'{nama}_sum{_label_prometheus(labels)} {total}')
+                        baris.append(f'{nama}_count{_label_prometheus(labels)} {count}')
+                else:
+                    data = self._counter[nama] if tipe == 'counter' else self._gauge[nama]
+                    for labels, nilai in sorted(data.items()):
+                        baris.append(f'{nama}{_label_prometheus(labels)} {nilai}')
+        return '\n'.join(baris) + '\n'
+
+
+metrik = MetrikAplikasi()
+
+
+class PemantauPerintahMongo(monitoring.CommandListener):
+    """Menghitung perintah MongoDB beserta durasinya, global dan per request.
+
+    Event pymongo dikirim di thread yang menjalankan perintah, jadi selama request
+    sinkron berlangsung jumlah dan durasinya dapat dicatat ke flask.g.
+    """
+
+    def started(self, event):
+        if has_request_context():
+            g.db_perintah = g.get('db_perintah', 0) + 1
+
+    def _selesai(self, event, hasil):
+        detik = event.duration_micros / 1e6
+        metrik.observe('slip_gaji_mongo_command_duration_seconds',
+                       'Durasi perintah MongoDB.', (('command', event.command_name),), detik)
+        if hasil != 'ok':
+            metrik.inc('slip_gaji_mongo_command_failures_total', 'Perintah MongoDB yang gagal.',
+                       (('command', event.command_name),))
+        if has_request_context():
+            g.db_detik = g.get('db_detik', 0.0) + detik
+
+    def succeeded(self, event):
+        self._selesai(event, 'ok')
+
+    def failed(self, event):
+        self._selesai(event, 'gagal')
+
+
+class PemantauPoolMongo(monitoring.ConnectionPoolListener):
+    """Statistik pool koneksi MongoDB: koneksi terbuka, sedang dipakai, dan kegagalan checkout."""
+
+    def _gauge(self, nama, bantuan, event, nilai):
+        metrik.gauge_tambah(nama, bantuan, (('address', '%s:%s' % event.address),), nilai)
+
+    def pool_created(self, event):
+        metrik.gauge_atur('slip_gaji_mongo_pool_max_size', 'Ukuran maksimum pool koneksi MongoDB.',
+                          (('address', '%s:%s' % event.address),), event.options.get('maxPoolSize', 0))
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        metrik.inc('slip_gaji_mongo_pool_cleared_total', 'Berapa kali pool koneksi dibersihkan.',
+                   (('address', '%s:%s' % event.address),))
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._gauge('slip_gaji_mongo_pool_connections', 'Koneksi MongoDB yang sedang terbuka.', event, 1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._gauge('slip_gaji_mongo_pool_connections', 'Koneksi MongoDB yang sedang terbuka.', event, -1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        metrik.inc('slip_gaji_mongo_pool_checkout_failures_total', 'Checkout koneksi yang gagal.',
+                   (('address', '%s:%s' % event.address), ('reason', event.reason)))
+
+    def connection_checked_out(self, event):
+        self._gauge('slip_gaji_mongo_pool_in_use', 'Koneksi MongoDB yang sedang dipakai.', event, 1)
+
+    def connection_checked_in(self, event):
+        self._gauge('slip_gaji_mongo_pool_in_use', 'Koneksi MongoDB yang sedang dipakai.', event, -1)
+
+
+# Didaftarkan lewat event_listeners saat klien dibuat, bukan monitoring.register global
+MONGO_EVENT_LISTENERS = [PemantauPerintahMongo(), PemantauPoolMongo()]
+
+
+@app.before_request
+def mulai_timing_request():
+    g.mulai_request = time.perf_counter()
+    g.db_perintah = 0
+    g.db_detik = 0.0
+    g.tpl_detik = 0.0
+
+
+@before_render_template.connect_via(app)
+def _mulai_render(sender, template, context, **extra):
+    if has_request_context():
+        g.mulai_render = time.perf_counter()
+
+
+@template_rendered.connect_via(app)
+def _selesai_render(sender, template, context, **extra):
+    if has_request_context() and 'mulai_render' in g:
+        g.tpl_detik = g.get('tpl_detik', 0.0) + time.perf_counter() - g.pop('mulai_render')
+
+
+@app.after_request
+def catat_timing_request(response):
+    mulai = g.get('mulai_request')
+    if mulai is None:
+        return response
+    total = time.perf_counter() - mulai
+    route = request.url_rule.rule if request.url_rule is not None else 'tidak_dikenal'
+    metrik.observe('slip_gaji_http_request_duration_seconds', 'Latensi request HTTP per rute.',
+                   (('route', route), ('method', request.method)), total)
+    metrik.inc('slip_gaji_http_requests_total', 'Jumlah request HTTP per rute dan status.',
+               (('route', route), ('method', request.method), ('status', response.status_code)))
+
+    db_ms, tpl_ms, total_ms = g.db_detik * 1000, g.tpl_detik * 1000, total * 1000
+    if app.config['SERVER_TIMING_ENABLED']:
+        # Jumlah perintah hanya diketahui untuk klien sinkron; rute API async hanya punya durasi
+        db = f'db;dur={db_ms:.1f}' + (f';desc="MongoDB ({g.db_perintah} perintah)"' if g.db_perintah else '')
+        bagian = [db, f'tpl;dur={tpl_ms:.1f}', f'total;dur={total_ms:.1f}']
+        if 'cache_slip' in g:
+            bagian.insert(0, f'cache;desc="{g.cache_slip}"')
+        response.headers.add('Server-Timing', ', '.join(bagian))
+
+    if total_ms >= app.config['LOG_SLOW_REQUEST_MS']:
+        app.logger.warning("Request lambat %s %s -> %s: total %.1f ms (db %.1f ms, %d perintah; tpl %.1f ms)",
+                           request.method, request.path, response.status_code, total_ms, db_ms,
+                           g.db_perintah, tpl_ms)
+    else:
+        app.logger.debug("%s %s -> %s: total %.1f ms (db %.1f ms, %d perintah; tpl %.1f ms)",
+                         request.method, request.path, response.status_code, total_ms, db_ms,
+                         g.db_perintah, tpl_ms)
+    return response
+
+
+# Fungsi helper untuk membuat indeks yang dibutuhkan aplikasi.
+# create_index bersifat idempoten, jadi aman dipanggil berulang kali.
+def ensure_indexes(db_obj):
+    # Satu absensi per karyawan per tanggal; juga dipakai untuk sort di slip_gaji
+    db_obj.absensi.create_index(
+        [('karyawan_id', ASCENDING), ('tanggal', ASCENDING)],
+        unique=True,
+        name='karyawan_id_tanggal_unik'
+    )
+    # Nama karyawan harus unik
+    db_obj.karyawan.create_index(
+        [('nama', ASCENDING)],
+        unique=True,
+        name='nama_unik'
+    )
+    # Pencarian nama tanpa membedakan huruf besar/kecil (keyset nama_lower, nama)
+    db_obj.karyawan.create_index(
+        [('nama_lower', ASCENDING), ('nama', ASCENDING)],
+        name='nama_lower_nama'
+    )
+    # Satu dokumen rekap per karyawan per bulan
+    db_obj.rekap_gaji.create_index(
+        [('karyawan_id', ASCENDING), ('bulan', ASCENDING)],
+        unique=True,
+        name='karyawan_id_bulan_unik'
+    )
+    # Rentang tanggal saja (dashboard, cetak slip massal, export, arsip periode) memakai
+    # karyawan_id_tanggal_unik: batas tanggal diterapkan per karyawan_id sehingga hanya kunci
+    # di dalam rentang yang dibaca. Indeks 'tanggal' terpisah tidak dibutuhkan dan bisa
+    # membuat planner memilih pengurutan di memori, jadi dihapus jika masih ada.
+    if 'tanggal' in db_obj.absensi.index_information():
+        db_obj.absensi.drop_index('tanggal')
+    # Satu dokumen periode per rentang tanggal
+    db_obj.periode.create_index(
+        [('mulai', ASCENDING), ('selesai', ASCENDING)],
+        unique=True,
+        name='mulai_selesai_unik'
+    )
+    # Arsip absensi periode yang ditutup: satu dokumen per karyawan per bulan
+    db_obj.absensi_arsip.create_index(
+        [('karyawan_id', ASCENDING), ('bulan', ASCENDING)],
+        unique=True,
+        name='karyawan_id_bulan_unik'
+    )
+    db_obj.absensi_arsip.create_index([('bulan', ASCENDING)], name='bulan')
+    # Mencari satu hari arsip berdasarkan _id absensi aslinya
+    db_obj.absensi_arsip.create_index([('hari._id', ASCENDING)], name='hari_id')
+    # Username admin harus unik; dipakai untuk lookup saat login
+    db_obj.admins.create_index(
+        [('username', ASCENDING)],
+        unique=True,
+        name='username_unik'
+    )
+
+
+class MongoConnectionManager:
+    """Mengelola satu MongoClient (dengan pool koneksinya) per proses.
+
+    Klien dibuat secara lazy pada pemanggilan pertama lalu dipakai ulang oleh
+    semua request berikutnya selama proses masih hidup (termasuk invocation
+    'warm' di Vercel). Health check (ping) di-cache selama
+    MONGO_HEALTHCHECK_INTERVAL detik dan dijalankan di luar lock. Setelah
+    kegagalan klien hanya ditandai tidak sehat (tidak ditutup, karena masih
+    dipakai thread lain) dan pymongo menyambung ulang sendiri; ping berikutnya
+    dicoba setelah MONGO_RECONNECT_BACKOFF detik.
+    """
+
+    def __init__(self, config, db_name, client_factory=MongoClient):
+        self.config = config
+        self.db_name = db_name
+        # Dapat diganti (misalnya dengan mongomock.MongoClient) untuk pengujian lokal
+        self.client_factory = client_factory
+        self._lock = threading.Lock()
+        self._client = None
+        self._db = None
+        self._pid = None
+        self._last_check = 0.0
+        self._last_failure = 0.0
+        self._healthy = False
+        self._pinging = False
+        self._indexes_ensured = False
+
+    def _create_client(self):
+        return self.client_factory(
+            self.config['MONGO_URI'],
+            maxPoolSize=self.config['MONGO_MAX_POOL_SIZE'],
+            minPoolSize=self.config['MONGO_MIN_POOL_SIZE'],
+            maxIdleTimeMS=self.config['MONGO_MAX_IDLE_TIME_MS'],
+            serverSelectionTimeoutMS=self.config['MONGO_SERVER_SELECTION_TIMEOUT_MS'],
+            connectTimeoutMS=self.config['MONGO_CONNECT_TIMEOUT_MS'],
+            socketTimeoutMS=self.config['MONGO_SOCKET_TIMEOUT_MS'],
+            event_listeners=MONGO_EVENT_LISTENERS,
+        )
+
+    def _ensure_indexes_once(self, db_obj):
+        with self._lock:
+            if self._indexes_ensured:
+                return
+            self._indexes_ensured = True
+        mode = self.config['MONGO_AUTO_INDEXES']
+        if mode == 'background':
+            threading.Thread(target=self._ensure_indexes, args=(db_obj,), name='ensure-indexes', daemon=True).start()
+        elif mode != 'off':
+            self._ensure_indexes(db_obj)
+
+    def _ensure_indexes(self, db_obj):
         try:
-            # Inisialisasi PyMongo dengan aplikasi yang sedang berjalan
-            mongo_instance.init_app(current_app)
-            # Coba ping database untuk memastikan koneksi aktif
-            mongo_instance.cx.admin.command('ping')
-            print("DEBUG: Koneksi MongoDB berhasil dibuat dan diuji (di dalam get_mongo_db untuk web).")
-            # Akses database yang benar
-            g.pymongo_db_obj = mongo_instance.cx.get_database("slip_gaji_db") # Pastikan nama database yang benar
-            print(f"DEBUG: Nama database yang diakses di web: {g.pymongo_db_obj.name}")
+            ensure_indexes(db_obj)
         except Exception as e:
-            print(f"KESALAHAN: Gagal terhubung ke MongoDB (di dalam get_mongo_db untuk web): {e}")
-            print("Harap pastikan server MongoDB Anda berjalan dan MONGO_URI sudah benar.")
-            g.pymongo_db_obj = None # Set ke None jika koneksi gagal
-    return g.pymongo_db_obj
-
-# Informasi Admin (Sebaiknya diambil dari database pada aplikasi yang lebih kompleks)
-ADMINS = {
-    'admin': generate_password_hash('ekasaputra09') # Ganti 'passwordadmin' dengan kata sandi yang kuat
-}
+            # Biasanya karena masih ada data duplikat; jalankan 'flask ensure-indexes' untuk detail
+            app.logger.warning("Gagal membuat indeks MongoDB: %s", e)
+
+    def get_db(self):
+        """Kembalikan objek database, atau None jika MongoDB tidak dapat dijangkau."""
+        now = time.monotonic()
+        with self._lock:
+            # MongoClient tidak aman dipakai lintas fork; buat ulang di proses anak
+            # (klien milik proses induk tidak ditutup dari sini)
+            if self._client is not None and self._pid != os.getpid():
+                self._client = None
+                self._db = None
+                self._healthy = False
+
+            if self._healthy and now - self._last_check < self.config['MONGO_HEALTHCHECK_INTERVAL']:
+                return self._db
+
+            if not self._healthy and now - self._last_failure < self.config['MONGO_RECONNECT_BACKOFF']:
+                return None
+
+            # Hanya satu thread yang melakukan ping; thread lain memakai status terakhir
+            if self._pinging:
+                return self._db if self._healthy else None
+
+            try:
+                if self._client is None:
+                    self._client = self._create_client()
+                    self._pid = os.getpid()
+                    self._db = self._client.get_database(self.db_name)
+                    app.logger.info("MongoClient baru dibuat untuk database: %s", self._db.name)
+            except Exception as e:
+                app.logger.error("Gagal membuat MongoClient: %s. Periksa MONGO_URI.", e)
+                self._client = None
+                self._db = None
+                self._mark_unhealthy_locked()
+                return None
+            client, db_obj = self._client, self._db
+            self._pinging = True
+
+        # Ping di luar lock agar request lain tidak ikut menunggu server selection timeout
+        try:
+            client.admin.command('ping')
+        except Exception as e:
+            app.logger.error("Gagal terhubung ke MongoDB: %s. Harap pastikan server MongoDB "
+                             "Anda berjalan dan MONGO_URI sudah benar.", e)
+            with self._lock:
+                self._pinging = False
+                self._mark_unhealthy_locked()
+            return None
+
+        with self._lock:
+            self._pinging = False
+            self._healthy = True
+            self._last_check = now
+        self._ensure_indexes_once(db_obj)
+        return db_obj
+
+    def _mark_unhealthy_locked(self):
+        self._healthy = False
+        self._last_check = 0.0
+        self._last_failure = time.monotonic()
+
+    def mark_unhealthy(self):
+        """Tandai koneksi bermasalah tanpa menutup klien yang mungkin sedang dipakai thread lain.
+
+        pymongo menyambung ulang sendiri; request berikutnya mendapat None sampai
+        ping berhasil lagi (paling cepat setelah MONGO_RECONNECT_BACKOFF).
+        """
+        with self._lock:
+            self._mark_unhealthy_locked()
+
+    def _reset_locked(self):
+        if self._client is not None:
+            try:
+                self._client.close()
+            except Exception:
+                pass
+        self._client = None
+        self._db = None
+        self._mark_unhealthy_locked()
+
+    def reset(self):
+        """Tutup dan buang klien saat ini; koneksi dibuat ulang secara lazy pada pemanggilan berikutnya.
+
+        Hanya untuk saat tidak ada request lain yang memakai klien (misalnya pengujian atau
+        perintah CLI); untuk kegagalan koneksi saat melayani request pakai mark_unhealthy().
+        """
+        with self._lock:
+            self._reset_locked()
+
+
+# Satu manager per proses, dipakai bersama oleh rute web dan perintah CLI
+mongo_manager = MongoConnectionManager(app.config, "slip_gaji_db")
+
+# Fungsi helper untuk mendapatkan objek database PyMongo yang terhubung
+def get_mongo_db():
+    return mongo_manager.get_db()
+
+# Jika koneksi terputus di tengah request, tandai klien tidak sehat agar request berikutnya
+# memeriksa ulang koneksi; klien tidak ditutup karena masih dipakai bersama thread lain
+@app.errorhandler(ConnectionFailure)
+def handle_connection_failure(e):
+    app.logger.error("Koneksi MongoDB terputus: %s", e)
+    mongo_manager.mark_unhealthy()
+    if request.path.startswith('/api/'):
+        return jsonify({'error': 'Koneksi database terputus.'}), 503
+    return render_template('error_db.html', message="Koneksi database terputus."), 503
+
+# Informasi Admin. Hash kata sandi selalu sudah dihitung sebelumnya (env atau koleksi 'admins')
+# dan baru diverifikasi saat login, sehingga KDF yang sengaja lambat tidak berjalan saat cold start.
+# Admin dari env tidak memerlukan query database: isi ADMIN_PASSWORD_HASH dengan keluaran
+# 'flask create-admin <username> --hash-only'.
+app.config['ADMIN_USERNAME'] = os.environ.get('ADMIN_USERNAME')
+app.config['ADMIN_PASSWORD_HASH'] = os.environ.get('ADMIN_PASSWORD_HASH')
+
+# Kembalikan hash kata sandi untuk username, atau None jika username tidak dikenal
+def cari_hash_admin(username):
+    env_username = app.config['ADMIN_USERNAME']
+    env_hash = app.config['ADMIN_PASSWORD_HASH']
+    if env_username and env_hash and username == env_username:
+        return env_hash
+    db_obj = get_mongo_db()
+    if db_obj is None:
+        return None
+    admin = db_obj.admins.find_one({'username': username}, {'password_hash': 1})
+    if admin:
+        return admin['password_hash']
+    if not (env_username and env_hash) and db_obj.admins.find_one({}, {'_id': 1}) is None:
+        app.logger.warning("Belum ada admin; buat dengan 'flask create-admin' atau atur ADMIN_USERNAME/ADMIN_PASSWORD_HASH.")
+    return None
 
 # Fungsi untuk memeriksa apakah pengguna adalah admin
 def is_admin_logged_in():
@@ -85,7 +566,8 @@ def login_admin():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
-        if username in ADMINS and check_password_hash(ADMINS[username], password):
+        password_hash = cari_hash_admin(username)
+        if password_hash and check_password_hash(password_hash, password):
             session['admin_logged_in'] = True
             flash('Login admin berhasil!', 'success')
             return redirect(url_for('admin_dashboard'))
@@ -104,204 +586,1373 @@ def logout_admin():
 @app.route('/admin/dashboard')
 @admin_required
 def admin_dashboard():
-    return render_template('admin_dashboard.html')
-
-@app.route('/', defaults={'karyawan_id': None})
-@app.route('/slip_gaji/<karyawan_id>')
-def slip_gaji(karyawan_id):
     db_obj = get_mongo_db()
     if db_obj is None:
-        flash("Aplikasi tidak dapat terhubung ke database. Silakan hubungi administrator atau coba lagi nanti.", 'danger')
-        return render_template('error_db.html', message="Koneksi database gagal.")
-    
-    karyawan_collection = db_obj.karyawan
-    absensi_collection = db_obj.absensi
-    
-    all_karyawan = list(karyawan_collection.find({}))
-
-    selected_karyawan = None
-    absensi_gaji = []
-    total_gaji = 0
+        flash("Database tidak tersedia.", 'danger')
+        return render_template('admin_dashboard.html', dashboard=None)
 
-    if not all_karyawan:
-        flash("Belum ada data karyawan. Silakan tambahkan karyawan pertama Anda.", 'info')
-        return redirect(url_for('add_karyawan'))
-    
-    if karyawan_id:
-        try:
-            selected_karyawan = karyawan_collection.find_one({'_id': ObjectId(karyawan_id)})
-            if not selected_karyawan:
-                flash("Karyawan tidak ditemukan.", 'danger')
-                return redirect(url_for('slip_gaji'))
-        except Exception:
-            flash("ID Karyawan tidak valid.", 'danger')
-            return redirect(url_for('slip_gaji'))
-    else:
-        selected_karyawan = all_karyawan[0]
+    # Periode dipilih lewat ?periode_id=... atau ?start=...&end=...; default periode berjalan
+    periode = None
+    start = end = None
+    try:
+        start = parse_tanggal_param(request.args.get('start'))
+        end = parse_tanggal_param(request.args.get('end'))
+    except ValueError:
+        flash('Format tanggal tidak valid.', 'danger')
+    periode_id = request.args.get('periode_id', '')
+    if periode_id:
+        periode = ambil_periode(db_obj, periode_id)
+        if periode is None:
+            flash('Periode tidak ditemukan.', 'danger')
+        else:
+            start, end = periode['mulai'], periode['selesai']
+    if start is None or end is None or start > end:
+        periode, start, end = periode_dashboard_default(db_obj)
 
-    if selected_karyawan:
-        absensi_gaji = list(absensi_collection.find({'karyawan_id': selected_karyawan['_id']}).sort('tanggal', 1))
-        total_gaji = sum(item.get('gaji_harian', 0) for item in absensi_gaji if item.get('gaji_harian') is not None)
+    urut = request.args.get('urut', 'total_gaji')
+    if urut not in DASHBOARD_URUTAN:
+        urut = 'total_gaji'
+    page = max(request.args.get('page', 1, type=int) or 1, 1)
+    dashboard = ambil_dashboard(db_obj, start, end, urut, page)
 
+    daftar_periode = daftar_periode_terbaru(db_obj)
+    if periode is not None and all(p['_id'] != periode['_id'] for p in daftar_periode):
+        daftar_periode.append(periode)
     return render_template(
-        'slip_gaji.html',
-        all_karyawan=all_karyawan,
-        karyawan=selected_karyawan,
-        absensi_gaji=absensi_gaji,
-        total_gaji=total_gaji
+        'admin_dashboard.html',
+        dashboard=dashboard,
+        periode=periode,
+        daftar_periode=daftar_periode,
+        start=start.strftime('%Y-%m-%d'),
+        end=end.strftime('%Y-%m-%d'),
+        urut=urut,
+        urutan=DASHBOARD_URUTAN,
+        cache_ttl=app.config['DASHBOARD_CACHE_TTL']
     )
 
-# --- Fitur Tambah Karyawan ---
-@app.route('/add_karyawan', methods=['GET', 'POST'])
-@admin_required
-def add_karyawan():
-    db_obj = get_mongo_db()
-    if db_obj is None:
-        flash("Database tidak tersedia.", 'danger')
-        return redirect(url_for('slip_gaji'))
-    karyawan_collection = db_obj.karyawan
-    
-    if request.method == 'POST':
-        nama = request.form['nama']
-        no_rek = request.form['no_rek']
-        periode = request.form['periode']
+# Jumlah baris absensi per halaman pada slip gaji (cukup untuk satu bulan penuh)
+SLIP_PER_PAGE = 31
 
-        if not nama or not no_rek or not periode:
-            flash('Semua kolom harus diisi!', 'danger')
-            return render_template('add_karyawan.html', form_data=request.form)
-        
-        existing_karyawan = karyawan_collection.find_one({'nama': nama})
-        if existing_karyawan:
-            flash(f'Karyawan dengan nama "{nama}" sudah ada.', 'danger')
-            return render_template('add_karyawan.html', form_data=request.form)
+# Ubah parameter query 'YYYY-MM-DD' menjadi datetime (None jika kosong).
+# Melempar ValueError jika formatnya tidak valid.
+def parse_tanggal_param(value):
+    if not value:
+        return None
+    tanggal = datetime.datetime.strptime(value, '%Y-%m-%d').date()
+    return datetime.datetime.combine(tanggal, datetime.time())
 
-        try:
-            new_karyawan_data = {
-                'nama': nama,
-                'no_rek': no_rek,
-                'periode': periode
-            }
-            result = karyawan_collection.insert_one(new_karyawan_data)
-            flash('Karyawan berhasil ditambahkan!', 'success')
-            return redirect(url_for('slip_gaji', karyawan_id=str(result.inserted_id)))
-        except Exception as e:
-            flash(f'Terjadi kesalahan saat menambahkan karyawan: {e}', 'danger')
+# Filter rentang tanggal (akhir inklusif) untuk field 'tanggal'
+def filter_rentang_tanggal(start=None, end=None):
+    rentang = {}
+    if start is not None:
+        rentang['$gte'] = start
+    if end is not None:
+        rentang['$lt'] = end + datetime.timedelta(days=1)
+    return rentang
 
-    return render_template('add_karyawan.html', form_data={})
+# Ekspresi agregasi untuk menghitung hari per kategori status (Hadir / OFF / CUTI* / lainnya)
+RINGKASAN_STATUS_GROUP = {
+    'total_gaji': {'$sum': '$gaji_harian'},
+    'jumlah_hari': {'$sum': 1},
+    'hadir': {'$sum': {'$cond': [{'$eq': ['$status', 'Hadir']}, 1, 0]}},
+    'off': {'$sum': {'$cond': [{'$eq': ['$status', 'OFF']}, 1, 0]}},
+    # Awalan 'CUTI' sebagai rentang string biner: 'CUTI' <= status < 'CUTJ'
+    'cuti': {'$sum': {'$cond': [{'$and': [{'$gte': ['$status', 'CUTI']}, {'$lt': ['$status', 'CUTJ']}]}, 1, 0]}},
+}
 
-# --- Fitur Edit Karyawan ---
-@app.route('/edit_karyawan/<karyawan_id>', methods=['GET', 'POST'])
-@admin_required
-def edit_karyawan(karyawan_id):
-    db_obj = get_mongo_db()
-    if db_obj is None:
-        flash("Database tidak tersedia.", 'danger')
-        return redirect(url_for('slip_gaji'))
-    karyawan_collection = db_obj.karyawan
-    
-    try:
-        karyawan = karyawan_collection.find_one({'_id': ObjectId(karyawan_id)})
-        if not karyawan:
-            flash("Karyawan tidak ditemukan.", 'danger')
-            return redirect(url_for('slip_gaji'))
-    except Exception:
-        flash("ID Karyawan tidak valid.", 'danger')
-        return redirect(url_for('slip_gaji'))
+def ringkasan_kosong():
+    return {'total_gaji': 0, 'jumlah_hari': 0, 'hadir': 0, 'off': 0, 'cuti': 0, 'lainnya': 0}
 
-    if request.method == 'POST':
-        nama = request.form['nama']
-        no_rek = request.form['no_rek']
-        periode = request.form['periode']
+# Pipeline slip satu karyawan: baris absensi (satu halaman) beserta total gaji dan
+# jumlah hari per status dalam satu round trip. $match + $sort memakai indeks
+# (karyawan_id, tanggal); $project membatasi field yang dikirim ke aplikasi.
+def pipeline_slip(match, page=1, per_page=SLIP_PER_PAGE, arsip=False):
+    return tahap_absensi(match, arsip) + [
+        {'$sort': {'tanggal': 1}},
+        {'$project': {'tanggal': 1, 'status': 1, 'gaji_harian': 1, 'arsip': 1}},
+        {'$facet': {
+            'ringkasan': [{'$group': dict({'_id': None}, **RINGKASAN_STATUS_GROUP)}],
+            'rows': [{'$skip': (page - 1) * per_page}, {'$limit': per_page}],
+        }},
+    ]
 
-        if not nama or not no_rek or not periode:
-            flash('Semua kolom harus diisi!', 'danger')
-            return render_template('edit_karyawan.html', karyawan=karyawan)
-        
-        existing_karyawan = karyawan_collection.find_one({
-            'nama': nama,
-            '_id': {'$ne': ObjectId(karyawan_id)}
-        })
-        if existing_karyawan:
-            flash(f'Karyawan dengan nama "{nama}" sudah ada.', 'danger')
-            return render_template('edit_karyawan.html', karyawan=karyawan)
+def match_slip(karyawan_id, start=None, end=None):
+    match = {'karyawan_id': karyawan_id}
+    rentang = filter_rentang_tanggal(start, end)
+    if rentang:
+        match['tanggal'] = rentang
+    return match
 
-        try:
-            karyawan_collection.update_one(
-                {'_id': ObjectId(karyawan_id)},
-                {'$set': {'nama': nama, 'no_rek': no_rek, 'periode': periode}}
+# Ubah hasil $facet pipeline_slip menjadi dict ringkasan + baris + info halaman
+def ringkasan_dari_facet(hasil, page=1, per_page=SLIP_PER_PAGE):
+    ringkasan = ringkasan_kosong()
+    if hasil and hasil['ringkasan']:
+        data = hasil['ringkasan'][0]
+        for key in ('total_gaji', 'jumlah_hari', 'hadir', 'off', 'cuti'):
+            ringkasan[key] = data.get(key) or 0
+        ringkasan['lainnya'] = ringkasan['jumlah_hari'] - ringkasan['hadir'] - ringkasan['off'] - ringkasan['cuti']
+
+    ringkasan['rows'] = hasil['rows'] if hasil else []
+    ringkasan['page'] = page
+    ringkasan['pages'] = max(1, -(-ringkasan['jumlah_hari'] // per_page))
+    return ringkasan
+
+def ambil_slip(db_obj, karyawan_id, start=None, end=None, page=1, per_page=SLIP_PER_PAGE):
+    match = match_slip(karyawan_id, start, end)
+    # Rentang yang menyentuh periode ditutup juga membaca absensi_arsip
+    arsip = rentang_berarsip(db_obj, start, end)
+
+    # Untuk satu bulan kalender penuh, header dibaca dari dokumen rekap_gaji
+    # dan hanya halaman baris yang diambil dari absensi.
+    bulan = bulan_penuh(start, end)
+    if bulan is not None and not arsip:
+        rekap = db_obj.rekap_gaji.find_one({'karyawan_id': karyawan_id, 'bulan': bulan})
+        if rekap is not None:
+            ringkasan = ringkasan_dari_rekap(rekap)
+            ringkasan['rows'] = list(
+                db_obj.absensi.find(match, {'tanggal': 1, 'status': 1, 'gaji_harian': 1})
+                .sort('tanggal', ASCENDING)
+                .skip((page - 1) * per_page)
+                .limit(per_page)
             )
-            flash('Data karyawan berhasil diperbarui!', 'success')
-            return redirect(url_for('slip_gaji', karyawan_id=karyawan_id))
-        except Exception as e:
-            flash(f'Terjadi kesalahan saat memperbarui karyawan: {e}', 'danger')
+            ringkasan['page'] = page
+            ringkasan['pages'] = max(1, -(-ringkasan['jumlah_hari'] // per_page))
+            return ringkasan
 
-    return render_template('edit_karyawan.html', karyawan=karyawan)
+    hasil = next(db_obj.absensi.aggregate(pipeline_slip(match, page, per_page, arsip)), None)
+    return ringkasan_dari_facet(hasil, page, per_page)
 
+# --- Rekap Gaji (ringkasan per karyawan per bulan) ---
+# Koleksi rekap_gaji menyimpan satu dokumen per karyawan per bulan ('YYYY-MM')
+# berisi total gaji dan jumlah hari per kategori status. Rute tambah/edit/hapus
+# absensi memperbaruinya dengan $inc; jalur massal menghitung ulang bulan yang terdampak.
+REKAP_FIELDS = ('total_gaji', 'jumlah_hari', 'hadir', 'off', 'cuti', 'lainnya')
 
-# --- Fitur Tambah Absensi ---
-@app.route('/add_absensi/<karyawan_id>', methods=['GET', 'POST'])
-@admin_required
-def add_absensi(karyawan_id):
-    db_obj = get_mongo_db()
-    if db_obj is None:
-        flash("Database tidak tersedia.", 'danger')
-        return redirect(url_for('slip_gaji'))
-    karyawan_collection = db_obj.karyawan
-    absensi_collection = db_obj.absensi
+def kategori_status(status):
+    if status == 'Hadir':
+        return 'hadir'
+    if status == 'OFF':
+        return 'off'
+    if (status or '').startswith('CUTI'):
+        return 'cuti'
+    return 'lainnya'
 
-    try:
-        karyawan = karyawan_collection.find_one({'_id': ObjectId(karyawan_id)})
-        if not karyawan:
-            flash("Karyawan tidak ditemukan.", 'danger')
-            return redirect(url_for('slip_gaji'))
-    except Exception:
-        flash("ID Karyawan tidak valid.", 'danger')
-        return redirect(url_for('slip_gaji'))
+def bulan_dari_tanggal(tanggal):
+    return tanggal.strftime('%Y-%m')
 
-    if request.method == 'POST':
-        tanggal_str = request.form['tanggal']
-        status = request.form['status']
-        gaji_harian_str = request.form.get('gaji_harian')
+# Rentang [awal, akhir) dari kunci bulan 'YYYY-MM'
+def rentang_bulan(bulan):
+    awal = datetime.datetime.strptime(bulan, '%Y-%m')
+    akhir = (awal + datetime.timedelta(days=32)).replace(day=1)
+    return awal, akhir
 
-        try:
-            tanggal = datetime.datetime.strptime(tanggal_str, '%Y-%m-%d').date()
-            tanggal_dt = datetime.datetime.combine(tanggal, datetime.time())
-            gaji_harian = int(gaji_harian_str) if gaji_harian_str else None
+# Kunci bulan jika start..end (inklusif) tepat satu bulan kalender, selain itu None
+def bulan_penuh(start, end):
+    if start is None or end is None or start.day != 1:
+        return None
+    awal, akhir = rentang_bulan(bulan_dari_tanggal(start))
+    if end + datetime.timedelta(days=1) != akhir:
+        return None
+    return bulan_dari_tanggal(start)
 
-            existing_record = absensi_collection.find_one({'karyawan_id': ObjectId(karyawan_id), 'tanggal': tanggal_dt})
-            if existing_record:
-                flash(f'Absensi untuk tanggal {tanggal_str} sudah ada.', 'danger')
-                return redirect(url_for('add_absensi', karyawan_id=karyawan_id))
+# Operasi $inc untuk rekap_gaji dari perubahan satu absensi (lama -> baru).
+# lama None berarti absensi baru; baru None berarti absensi dihapus.
+def ops_rekap_delta(lama=None, baru=None):
+    delta = {}
+    for doc, tanda in ((lama, -1), (baru, 1)):
+        if not doc:
+            continue
+        key = (doc['karyawan_id'], bulan_dari_tanggal(doc['tanggal']))
+        inc = delta.setdefault(key, {})
+        inc['total_gaji'] = inc.get('total_gaji', 0) + tanda * (doc.get('gaji_harian') or 0)
+        inc['jumlah_hari'] = inc.get('jumlah_hari', 0) + tanda
+        kategori = kategori_status(doc.get('status'))
+        inc[kategori] = inc.get(kategori, 0) + tanda
 
-            new_absensi_data = {
-                'karyawan_id': ObjectId(karyawan_id),
-                'tanggal': tanggal_dt,
-                'status': status,
-                'gaji_harian': gaji_harian
-            }
-            absensi_collection.insert_one(new_absensi_data)
-            flash('Absensi berhasil ditambahkan!', 'success')
-            return redirect(url_for('slip_gaji', karyawan_id=karyawan_id))
-        except ValueError:
-            flash('Format tanggal atau gaji harian tidak valid.', 'danger')
-        except Exception as e:
-            flash(f'Terjadi kesalahan: {e}', 'danger')
+    ops = []
+    for (karyawan_id, bulan), inc in delta.items():
+        inc = {field: nilai for field, nilai in inc.items() if nilai}
+        if inc:
+            ops.append(UpdateOne(
+                {'karyawan_id': karyawan_id, 'bulan': bulan},
+                {'$inc': inc},
+                upsert=True
+            ))
+    return ops
 
-    return render_template('add_absensi.html', karyawan=karyawan)
+# Filter dokumen rekap bulan absensi lama yang tidak lagi berisi hari setelah $inc
+# (absensi terakhir bulan itu dihapus atau dipindah), atau None jika tidak ada absensi lama.
+# Dokumen kosong dihapus agar sama dengan hasil bangun_ulang_rekap (bulan tanpa absensi
+# tidak punya dokumen). Syarat jumlah_hari <= 0 membuat penghapusan ini tetap benar bila
+# ada penulisan lain yang menambah hari ke bulan yang sama secara bersamaan.
+def filter_rekap_kosong(lama=None):
+    if not lama:
+        return None
+    return {'karyawan_id': lama['karyawan_id'], 'bulan': bulan_dari_tanggal(lama['tanggal']), 'jumlah_hari': {'$lte': 0}}
 
-# --- Fitur Edit Absensi ---
-@app.route('/edit_absensi/<absensi_id>', methods=['GET', 'POST'])
-@admin_required
-def edit_absensi(absensi_id):
-    db_obj = get_mongo_db()
-    if db_obj is None:
-        flash("Database tidak tersedia.", 'danger')
-        return redirect(url_for('slip_gaji'))
-    karyawan_collection = db_obj.karyawan
-    absensi_collection = db_obj.absensi
+# Dokumen rekap yang baru dibuat oleh upsert $inc hanya berisi selisih penulisan ini,
+# tanpa absensi yang sudah ada sebelumnya di bulan tersebut (data lama sebelum rekap_gaji
+# ada), jadi bulan itu dihitung ulang dari absensi.
+def terapkan_rekap_delta(db_obj, lama=None, baru=None):
+    ops = ops_rekap_delta(lama, baru)
+    if ops:
+        result = db_obj.rekap_gaji.bulk_write(ops, ordered=False)
+        kosong = filter_rekap_kosong(lama)
+        if kosong is not None:
+            db_obj.rekap_gaji.delete_one(kosong)
+        if result.upserted_ids:
+            baru_dibuat = db_obj.rekap_gaji.find(
+                {'_id': {'$in': list(result.upserted_ids.values())}}, {'karyawan_id': 1, 'bulan': 1}
+            )
+            hitung_ulang_rekap(db_obj, {(doc['karyawan_id'], doc['bulan']) for doc in baru_dibuat})
+
+# Pipeline yang menghitung rekap per (karyawan_id, bulan) dari absensi mentah
+def pipeline_rekap(match=None, arsip=False):
+    return tahap_absensi(match or {}, arsip) + [
+        {'$group': dict({
+            '_id': {
+                'karyawan_id': '$karyawan_id',
+                'bulan': {'$dateToString': {'format': '%Y-%m', 'date': '$tanggal'}},
+            },
+        }, **RINGKASAN_STATUS_GROUP)},
+    ]
+
+def _dokumen_rekap(hasil_group):
+    doc = {
+        'karyawan_id': hasil_group['_id']['karyawan_id'],
+        'bulan': hasil_group['_id']['bulan'],
+    }
+    for field in ('total_gaji', 'jumlah_hari', 'hadir', 'off', 'cuti'):
+        doc[field] = hasil_group.get(field) or 0
+    doc['lainnya'] = doc['jumlah_hari'] - doc['hadir'] - doc['off'] - doc['cuti']
+    return doc
+
+# Pipeline hitung ulang rekap untuk pasangan (karyawan_id, tanggal/bulan); (None, None) jika kosong.
+# db_obj None berarti daftar periode ditutup dibaca dari cache saja (jalur API async).
+def _rencana_hitung_ulang(db_obj, pasangan):
+    pasangan = {(karyawan_id, b if isinstance(b, str) else bulan_dari_tanggal(b)) for karyawan_id, b in pasangan}
+    if not pasangan:
+        return None, None
+    bulan_set = {bulan for _, bulan in pasangan}
+    awal = rentang_bulan(min(bulan_set))[0]
+    akhir = rentang_bulan(max(bulan_set))[1]
+    match = {
+        'karyawan_id': {'$in': list({karyawan_id for karyawan_id, _ in pasangan})},
+        'tanggal': {'$gte': awal, '$lt': akhir},
+    }
+    arsip = rentang_berarsip(db_obj, awal, akhir - datetime.timedelta(days=1))
+    return pasangan, pipeline_rekap(match, arsip)
+
+# Operasi ReplaceOne/DeleteOne rekap_gaji dari hasil pipeline hitung ulang
+def _ops_hitung_ulang(pasangan, hasil_iter):
+    ops = []
+    sisa = set(pasangan)
+    for hasil in hasil_iter:
+        doc = _dokumen_rekap(hasil)
+        key = (doc['karyawan_id'], doc['bulan'])
+        if key not in sisa:
+            continue
+        sisa.discard(key)
+        ops.append(ReplaceOne({'karyawan_id': doc['karyawan_id'], 'bulan': doc['bulan']}, doc, upsert=True))
+    # Bulan yang kini tidak punya absensi sama sekali
+    for karyawan_id, bulan in sisa:
+        ops.append(DeleteOne({'karyawan_id': karyawan_id, 'bulan': bulan}))
+    return ops
+
+# Hitung ulang rekap untuk pasangan (karyawan_id, tanggal/bulan) yang terdampak operasi massal
+def hitung_ulang_rekap(db_obj, pasangan):
+    pasangan, pipeline = _rencana_hitung_ulang(db_obj, pasangan)
+    if pasangan is None:
+        return
+    db_obj.rekap_gaji.bulk_write(_ops_hitung_ulang(pasangan, db_obj.absensi.aggregate(pipeline)), ordered=False)
+
+# Hitung ulang seluruh rekap_gaji dari absensi dan laporkan drift terhadap isi saat ini.
+# Jika tulis=False hanya memeriksa; selain itu dokumen yang berbeda/hilang ditulis ulang
+# dan dokumen usang (tanpa absensi) dihapus.
+def bangun_ulang_rekap(db_obj, tulis=True, batch_size=1000):
+    expected = {}
+    arsip = rentang_berarsip(db_obj)
+    for hasil in db_obj.absensi.aggregate(pipeline_rekap(arsip=arsip), allowDiskUse=True):
+        doc = _dokumen_rekap(hasil)
+        expected[(doc['karyawan_id'], doc['bulan'])] = doc
+
+    stats = {'dihitung': len(expected), 'cocok': 0, 'berbeda': 0, 'hilang': 0, 'usang': 0}
+    perlu_tulis = dict(expected)
+    usang = []
+    for actual in db_obj.rekap_gaji.find({}, {'_id': 0}):
+        key = (actual.get('karyawan_id'), actual.get('bulan'))
+        doc = expected.get(key)
+        if doc is None:
+            stats['usang'] += 1
+            usang.append(key)
+        elif any(doc[field] != (actual.get(field) or 0) for field in REKAP_FIELDS):
+            stats['berbeda'] += 1
+        else:
+            stats['cocok'] += 1
+            del perlu_tulis[key]
+    stats['hilang'] = len(perlu_tulis) - stats['berbeda']
+
+    if tulis:
+        ops = [
+            ReplaceOne({'karyawan_id': doc['karyawan_id'], 'bulan': doc['bulan']}, doc, upsert=True)
+            for doc in perlu_tulis.values()
+        ]
+        ops += [DeleteOne({'karyawan_id': karyawan_id, 'bulan': bulan}) for karyawan_id, bulan in usang]
+        for i in range(0, len(ops), batch_size):
+            db_obj.rekap_gaji.bulk_write(ops[i:i + batch_size], ordered=False)
+    return stats
+
+# Ringkasan dari satu dokumen rekap (atau kosong jika belum ada)
+def ringkasan_dari_rekap(rekap):
+    ringkasan = ringkasan_kosong()
+    if rekap:
+        for field in REKAP_FIELDS:
+            ringkasan[field] = rekap.get(field) or 0
+    return ringkasan
+
+# --- Periode Gaji (koleksi 'periode' dengan tanggal mulai/selesai) ---
+# Jumlah periode terbaru yang ditampilkan di pemilih periode slip gaji
+PERIODE_PILIHAN_LIMIT = 24
+
+NAMA_BULAN = ['Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni', 'Juli',
+              'Agustus', 'September', 'Oktober', 'November', 'Desember']
+# Nama bulan (lengkap/singkatan, Indonesia dan Inggris) -> nomor bulan
+BULAN_TEKS = {nama.lower(): i for i, nama in enumerate(NAMA_BULAN, start=1)}
+BULAN_TEKS.update({nama.lower()[:3]: i for i, nama in enumerate(NAMA_BULAN, start=1)})
+BULAN_TEKS.update({
+    'agt': 8, 'ags': 8, 'sept': 9, 'may': 5, 'aug': 8, 'oct': 10, 'dec': 12,
+    'january': 1, 'february': 2, 'march': 3, 'june': 6, 'july': 7, 'august': 8,
+    'october': 10, 'december': 12,
+})
+
+_PERIODE_HARI_SAJA = re.compile(r'^(\d{1,2})\s*-\s*(\d{1,2})\s+([a-z]+)\.?\s+(\d{4})$')
+_PERIODE_DUA_TANGGAL = re.compile(
+    r'^(\d{1,2})\s+([a-z]+)\.?(?:\s+(\d{4}))?\s*-\s*(\d{1,2})\s+([a-z]+)\.?\s+(\d{4})$'
+)
+_PERIODE_BULAN = re.compile(r'^([a-z]+)\s+(\d{4})$')
+
+def _nomor_bulan(teks):
+    if teks not in BULAN_TEKS:
+        raise ValueError(f'Nama bulan tidak dikenal: {teks}')
+    return BULAN_TEKS[teks]
+
+# Ubah teks periode lama menjadi (mulai, selesai), keduanya inklusif. Format yang dikenali:
+# '01-16 Mei 2025', '25 April - 10 Mei 2025', '01 Jan 2025 - 31 Jan 2025', dan 'Mei 2025'.
+# Melempar ValueError jika teks tidak dapat dipahami.
+def parse_periode_teks(teks):
+    t = ' '.join(str(teks).lower().replace('s/d', '-').replace('\u2013', '-').replace(' sd ', ' - ').split())
+    m = _PERIODE_HARI_SAJA.match(t)
+    if m:
+        bulan, tahun = _nomor_bulan(m.group(3)), int(m.group(4))
+        mulai = datetime.datetime(tahun, bulan, int(m.group(1)))
+        selesai = datetime.datetime(tahun, bulan, int(m.group(2)))
+    elif _PERIODE_DUA_TANGGAL.match(t):
+        m = _PERIODE_DUA_TANGGAL.match(t)
+        bulan_awal, bulan_akhir = _nomor_bulan(m.group(2)), _nomor_bulan(m.group(5))
+        tahun_akhir = int(m.group(6))
+        # '25 Desember - 10 Januari 2026' berarti Desember tahun sebelumnya
+        tahun_awal = int(m.group(3)) if m.group(3) else tahun_akhir - (1 if bulan_awal > bulan_akhir else 0)
+        mulai = datetime.datetime(tahun_awal, bulan_awal, int(m.group(1)))
+        selesai = datetime.datetime(tahun_akhir, bulan_akhir, int(m.group(4)))
+    elif _PERIODE_BULAN.match(t):
+        m = _PERIODE_BULAN.match(t)
+        mulai, selesai = rentang_bulan(f'{int(m.group(2)):04d}-{_nomor_bulan(m.group(1)):02d}')
+        selesai -= datetime.timedelta(days=1)
+    else:
+        raise ValueError(f'Format periode tidak dikenali: {teks}')
+    if mulai > selesai:
+        raise ValueError(f'Tanggal awal periode setelah tanggal akhir: {teks}')
+    return mulai, selesai
+
+# Nama tampilan periode, misalnya '01-16 Mei 2025' atau '25 April 2025 - 10 Mei 2025'
+def format_periode(mulai, selesai):
+    if (mulai.year, mulai.month) == (selesai.year, selesai.month):
+        return f'{mulai.day:02d}-{selesai.day:02d} {NAMA_BULAN[mulai.month - 1]} {mulai.year}'
+    return (f'{mulai.day:02d} {NAMA_BULAN[mulai.month - 1]} {mulai.year} - '
+            f'{selesai.day:02d} {NAMA_BULAN[selesai.month - 1]} {selesai.year}')
+
+# Tanggal dengan nama bulan Indonesia, misalnya '02 Mei 2025' (tidak bergantung pada locale)
+@app.template_filter('tanggal_id')
+def format_tanggal(tanggal):
+    return f'{tanggal.day:02d} {NAMA_BULAN[tanggal.month - 1]} {tanggal.year}'
+
+def ambil_periode(db_obj, periode_id):
+    if not periode_id or not ObjectId.is_valid(str(periode_id)):
+        return None
+    return db_obj.periode.find_one({'_id': ObjectId(str(periode_id))})
+
+def daftar_periode_terbaru(db_obj, limit=PERIODE_PILIHAN_LIMIT):
+    return list(db_obj.periode.find({}, {'nama': 1, 'mulai': 1, 'selesai': 1, 'ditutup': 1})
+                .sort('mulai', -1).limit(limit))
+
+@app.route('/admin/periode', methods=['GET', 'POST'])
+@admin_required
+def kelola_periode():
+    db_obj = get_mongo_db()
+    if db_obj is None:
+        flash("Database tidak tersedia.", 'danger')
+        return redirect(url_for('admin_dashboard'))
+
+    if request.method == 'POST':
+        try:
+            mulai = parse_tanggal_param(request.form.get('mulai'))
+            selesai = parse_tanggal_param(request.form.get('selesai'))
+        except ValueError:
+            mulai = selesai = None
+        if mulai is None or selesai is None or mulai > selesai:
+            flash('Rentang tanggal periode tidak valid.', 'danger')
+            return redirect(url_for('kelola_periode'))
+        nama = request.form.get('nama', '').strip() or format_periode(mulai, selesai)
+        try:
+            db_obj.periode.insert_one({
+                'nama': nama, 'mulai': mulai, 'selesai': selesai,
+                'ditutup': False, 'dibuat': datetime.datetime.utcnow()
+            })
+        except DuplicateKeyError:
+            flash('Periode dengan rentang tanggal tersebut sudah ada.', 'danger')
+            return redirect(url_for('kelola_periode'))
+        # Daftar periode ikut dirender di slip gaji
+        invalidasi_slip('*')
+        flash(f'Periode "{nama}" berhasil ditambahkan.', 'success')
+        return redirect(url_for('kelola_periode'))
+
+    return render_template('periode.html', daftar_periode=list(db_obj.periode.find().sort('mulai', -1)))
+
+@app.route('/admin/periode/<periode_id>/tutup', methods=['POST'])
+@admin_required
+def tutup_periode(periode_id):
+    db_obj = get_mongo_db()
+    if db_obj is None:
+        flash("Database tidak tersedia.", 'danger')
+        return redirect(url_for('kelola_periode'))
+    periode = ambil_periode(db_obj, periode_id)
+    if periode is None:
+        flash('Periode tidak ditemukan.', 'danger')
+        return redirect(url_for('kelola_periode'))
+    if periode.get('ditutup'):
+        # Hari yang sudah diarsipkan dikembalikan ke absensi agar bisa diubah lagi
+        dikembalikan = buka_kembali_periode(db_obj, periode)
+        flash(f'Periode "{periode["nama"]}" dibuka kembali ({dikembalikan} hari dikembalikan dari arsip).', 'success')
+    else:
+        db_obj.periode.update_one({'_id': periode['_id']}, {'$set': {'ditutup': True}})
+        periode_ditutup.invalidate()
+        invalidasi_slip('*')
+        flash(f'Periode "{periode["nama"]}" ditutup. Absensinya tidak dapat diubah lagi.', 'success')
+    return redirect(url_for('kelola_periode'))
+
+# --- Arsip Absensi (periode yang sudah ditutup) ---
+# 'flask archive-period' memindahkan absensi periode yang ditutup ke koleksi absensi_arsip:
+# satu dokumen per karyawan per bulan berisi array 'hari' (dokumen absensi asli tanpa
+# karyawan_id, _id tetap) dan total yang sudah dihitung (field yang sama dengan rekap_gaji).
+# Koleksi absensi hanya menyimpan data yang masih bisa diubah. Pembacaan yang rentangnya
+# menyentuh periode ditutup menggabungkan arsip dengan $unionWith (MongoDB 4.4+).
+# Absensi pada periode ditutup terkunci sampai periodenya dibuka kembali, yang sekaligus
+# mengembalikan hari-hari arsipnya ke koleksi absensi.
+# Daftar periode ditutup di-cache per proses; TTL membatasi jeda sinkronisasi antar instance.
+app.config['PERIODE_DITUTUP_TTL'] = float(os.environ.get('PERIODE_DITUTUP_TTL', 30))
+ARSIP_BATCH_SIZE = 5000
+
+
+class CachePeriodeDitutup:
+    """Daftar (mulai, selesai, nama) periode yang ditutup, dibaca ulang paling lambat tiap ttl detik."""
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = None
+        self._kedaluwarsa = 0.0
+
+    FILTER = {'ditutup': True}
+    PROYEKSI = {'mulai': 1, 'selesai': 1, 'nama': 1}
+
+    def segar(self):
+        """Daftar yang belum kedaluwarsa, atau None jika perlu dibaca ulang."""
+        with self._lock:
+            if self._data is not None and time.monotonic() < self._kedaluwarsa:
+                return self._data
+        return None
+
+    def simpan(self, docs):
+        data = [(doc['mulai'], doc['selesai'], doc.get('nama', '')) for doc in docs]
+        with self._lock:
+            self._data = data
+            self._kedaluwarsa = time.monotonic() + self.ttl
+        return data
+
+    def get(self, db_obj):
+        data = self.segar()
+        if data is not None:
+            return data
+        if db_obj is None:
+            # Tanpa database hanya daftar terakhir yang bisa dipakai. Jika belum pernah dimuat
+            # (cold start atau setelah invalidate) gagal tertutup: daftar kosong berarti
+            # penulisan ke periode ditutup lolos tanpa pemeriksaan.
+            with self._lock:
+                data = self._data
+            if data is None:
+                raise ConnectionFailure('Daftar periode ditutup tidak tersedia.')
+            return data
+        return self.simpan(db_obj.periode.find(self.FILTER, self.PROYEKSI))
+
+    def invalidate(self):
+        with self._lock:
+            self._data = None
+
+periode_ditutup = CachePeriodeDitutup(ttl=app.config['PERIODE_DITUTUP_TTL'])
+
+# Nama periode ditutup yang mencakup tanggal, atau None jika absensinya masih bisa diubah
+def periode_terkunci(db_obj, tanggal):
+    for mulai, selesai, nama in periode_ditutup.get(db_obj):
+        if mulai <= tanggal <= selesai:
+            return nama
+    return None
+
+def pesan_terkunci(tanggal, nama):
+    return (f'Absensi tanggal {tanggal.strftime("%Y-%m-%d")} termasuk periode "{nama}" yang sudah ditutup. '
+            'Buka kembali periode tersebut untuk mengubahnya.')
+
+# True jika rentang start..end (inklusif, None berarti terbuka) beririsan dengan periode ditutup
+def rentang_berarsip(db_obj, start=None, end=None):
+    for mulai, selesai, _ in periode_ditutup.get(db_obj):
+        if (start is None or selesai >= start) and (end is None or mulai <= end):
+            return True
+    return False
+
+# Filter tambahan yang mengecualikan tanggal di periode ditutup (untuk hapus satu round trip)
+def filter_tidak_terkunci(db_obj):
+    rentang = [{'tanggal': {'$gte': mulai, '$lte': selesai}} for mulai, selesai, _ in periode_ditutup.get(db_obj)]
+    return {'$nor': rentang} if rentang else {}
+
+# Pipeline absensi_arsip yang menghasilkan hari-hari arsip dalam bentuk dokumen absensi.
+# Dokumen bulanan disaring dulu lewat indeks (karyawan_id, bulan) sebelum array 'hari' dibuka.
+def pipeline_hari_arsip(match):
+    awal = {}
+    if 'karyawan_id' in match:
+        awal['karyawan_id'] = match['karyawan_id']
+    rentang = match.get('tanggal')
+    if isinstance(rentang, dict):
+        bulan = {}
+        if '$gte' in rentang:
+            bulan['$gte'] = bulan_dari_tanggal(rentang['$gte'])
+        if '$lt' in rentang:
+            bulan['$lte'] = bulan_dari_tanggal(rentang['$lt'] - datetime.timedelta(microseconds=1))
+        if bulan:
+            awal['bulan'] = bulan
+    return [
+        {'$match': awal},
+        {'$unwind': '$hari'},
+        {'$addFields': {'hari.karyawan_id': '$karyawan_id', 'hari.arsip': True}},
+        {'$replaceRoot': {'newRoot': '$hari'}},
+        {'$match': match},
+    ]
+
+# Tahap awal semua pipeline pembacaan absensi. Dengan arsip=True hari-hari dari
+# absensi_arsip yang memenuhi match yang sama ikut digabungkan (ditandai 'arsip': True).
+def tahap_absensi(match, arsip=False):
+    tahap = [{'$match': match}]
+    if arsip:
+        tahap.append({'$unionWith': {'coll': 'absensi_arsip', 'pipeline': pipeline_hari_arsip(match)}})
+    return tahap
+
+# Dokumen absensi dari dokumen arsip hasil proyeksi $elemMatch pada 'hari'
+def _absensi_dari_arsip(doc):
+    if not doc or not doc.get('hari'):
+        return None
+    return dict(doc['hari'][0], karyawan_id=doc['karyawan_id'], arsip=True)
+
+# Satu absensi yang sudah diarsipkan berdasarkan _id aslinya (indeks hari._id)
+def cari_absensi_arsip(db_obj, absensi_id):
+    return _absensi_dari_arsip(db_obj.absensi_arsip.find_one(
+        {'hari._id': absensi_id}, {'karyawan_id': 1, 'hari': {'$elemMatch': {'_id': absensi_id}}}
+    ))
+
+# Hari-hari arsip satu karyawan dalam rentang start..end (inklusif)
+def hari_arsip(db_obj, karyawan_id, start, end):
+    hasil = []
+    for doc in db_obj.absensi_arsip.find(
+        {'karyawan_id': karyawan_id, 'bulan': {'$gte': bulan_dari_tanggal(start), '$lte': bulan_dari_tanggal(end)}},
+        {'karyawan_id': 1, 'hari': 1}
+    ):
+        hasil.extend(
+            dict(hari, karyawan_id=karyawan_id, arsip=True)
+            for hari in doc.get('hari', []) if start <= hari['tanggal'] <= end
+        )
+    return hasil
+
+# Selisih total dokumen arsip (field sama dengan rekap_gaji) untuk sekumpulan hari
+def _total_hari(docs, tanda=1):
+    inc = dict.fromkeys(REKAP_FIELDS, 0)
+    for doc in docs:
+        inc['total_gaji'] += tanda * (doc.get('gaji_harian') or 0)
+        inc['jumlah_hari'] += tanda
+        inc[kategori_status(doc.get('status'))] += tanda
+    return inc
+
+# Pindahkan satu batch absensi (urut karyawan_id, tanggal) ke arsip lalu hapus dari absensi.
+# Hari yang _id-nya sudah ada di arsip (percobaan sebelumnya terputus) tidak ditambahkan lagi.
+def _arsipkan_batch(db_obj, docs, stats, ditulis):
+    grup = collections.OrderedDict()
+    for doc in docs:
+        grup.setdefault((doc['karyawan_id'], bulan_dari_tanggal(doc['tanggal'])), []).append(doc)
+    sudah = {}
+    for doc in db_obj.absensi_arsip.find(
+        {'karyawan_id': {'$in': list({k for k, _ in grup})}, 'bulan': {'$in': list({b for _, b in grup})}},
+        {'karyawan_id': 1, 'bulan': 1, 'hari._id': 1}
+    ):
+        sudah[(doc['karyawan_id'], doc['bulan'])] = {hari['_id'] for hari in doc.get('hari', [])}
+
+    ops = []
+    for (karyawan_id, bulan), hari_list in grup.items():
+        baru = [doc for doc in hari_list if doc['_id'] not in sudah.get((karyawan_id, bulan), ())]
+        stats['dilewati'] += len(hari_list) - len(baru)
+        if not baru:
+            continue
+        ops.append(UpdateOne(
+            {'karyawan_id': karyawan_id, 'bulan': bulan},
+            {
+                '$push': {'hari': {
+                    '$each': [{k: v for k, v in doc.items() if k != 'karyawan_id'} for doc in baru],
+                    '$sort': {'tanggal': 1},
+                }},
+                '$inc': _total_hari(baru),
+            },
+            upsert=True
+        ))
+        stats['diarsipkan'] += len(baru)
+        ditulis.add((karyawan_id, bulan))
+    if ops:
+        db_obj.absensi_arsip.bulk_write(ops, ordered=False)
+    db_obj.absensi.delete_many({'_id': {'$in': [doc['_id'] for doc in docs]}})
+
+# Arsipkan absensi satu periode yang sudah ditutup. Mengembalikan statistik jumlah hari
+# yang diarsipkan, dilewati (sudah ada di arsip), dan dokumen arsip yang ditulis.
+def arsipkan_periode(db_obj, periode, batch_size=ARSIP_BATCH_SIZE):
+    if not periode.get('ditutup'):
+        raise ValueError(f'Periode "{periode["nama"]}" belum ditutup.')
+    stats = {'diarsipkan': 0, 'dilewati': 0, 'dokumen': 0}
+    # Satu karyawan-bulan bisa terbelah di beberapa batch; dokumen arsip dihitung sekali
+    ditulis = set()
+    cursor = (
+        db_obj.absensi.find({'tanggal': filter_rentang_tanggal(periode['mulai'], periode['selesai'])})
+        .sort([('karyawan_id', ASCENDING), ('tanggal', ASCENDING)])
+        .batch_size(batch_size)
+    )
+    for batch in _potong(cursor, batch_size):
+        _arsipkan_batch(db_obj, batch, stats, ditulis)
+    stats['dokumen'] = len(ditulis)
+    db_obj.periode.update_one(
+        {'_id': periode['_id']},
+        {'$set': {'diarsipkan': datetime.datetime.utcnow()}, '$inc': {'jumlah_arsip': stats['diarsipkan']}}
+    )
+    invalidasi_slip('*')
+    return stats
+
+# Kembalikan hari-hari arsip periode ke absensi (dipanggil saat periode dibuka kembali).
+# _id asli dipertahankan sehingga tautan edit tetap berlaku; hari yang sudah ada di
+# absensi (percobaan sebelumnya terputus) dilewati oleh indeks unik.
+def buka_kembali_periode(db_obj, periode, batch_size=ARSIP_BATCH_SIZE):
+    mulai, selesai = periode['mulai'], periode['selesai']
+    dikembalikan = 0
+    absensi_batch, arsip_ops = [], []
+
+    def tulis():
+        if absensi_batch:
+            try:
+                db_obj.absensi.insert_many(absensi_batch, ordered=False)
+            except BulkWriteError as e:
+                if any(err.get('code') != 11000 for err in e.details.get('writeErrors', [])):
+                    raise
+        if arsip_ops:
+            db_obj.absensi_arsip.bulk_write(arsip_ops, ordered=False)
+        del absensi_batch[:], arsip_ops[:]
+
+    for doc in db_obj.absensi_arsip.find(
+        {'bulan': {'$gte': bulan_dari_tanggal(mulai), '$lte': bulan_dari_tanggal(selesai)}}
+    ):
+        hari_list = [hari for hari in doc.get('hari', []) if mulai <= hari['tanggal'] <= selesai]
+        if not hari_list:
+            continue
+        absensi_batch.extend(dict(hari, karyawan_id=doc['karyawan_id']) for hari in hari_list)
+        if len(hari_list) == len(doc['hari']):
+            arsip_ops.append(DeleteOne({'_id': doc['_id']}))
+        else:
+            arsip_ops.append(UpdateOne(
+                {'_id': doc['_id']},
+                {'$pull': {'hari': {'tanggal': {'$gte': mulai, '$lte': selesai}}}, '$inc': _total_hari(hari_list, -1)}
+            ))
+        dikembalikan += len(hari_list)
+        if len(absensi_batch) >= batch_size:
+            tulis()
+    tulis()
+    db_obj.periode.update_one(
+        {'_id': periode['_id']},
+        {'$set': {'ditutup': False}, '$unset': {'diarsipkan': '', 'jumlah_arsip': ''}}
+    )
+    periode_ditutup.invalidate()
+    invalidasi_slip('*')
+    return dikembalikan
+
+# Periode dari ObjectId atau nama (untuk perintah CLI)
+def cari_periode(db_obj, kunci):
+    return ambil_periode(db_obj, kunci) or db_obj.periode.find_one({'nama': kunci})
+
+# --- Dashboard Admin (analitik per periode) ---
+# Semua angka dashboard dihitung dengan satu agregasi $facet atas absensi periode
+# terpilih (ditambah arsip jika periodenya sudah ditutup). Hasilnya di-cache per
+# (periode, urutan, halaman) selama DASHBOARD_CACHE_TTL detik dan dikosongkan setiap
+# kali absensi ditulis (lewat invalidasi_slip).
+app.config['DASHBOARD_CACHE_TTL'] = int(os.environ.get('DASHBOARD_CACHE_TTL', 60))
+# Jumlah karyawan per halaman pada tabel peringkat
+DASHBOARD_PER_PAGE = 25
+# Urutan peringkat yang bisa dipilih: field hasil agregasi -> judul kolom
+DASHBOARD_URUTAN = {
+    'total_gaji': 'Total Gaji',
+    'hadir': 'Hadir',
+    'off': 'OFF',
+    'cuti': 'CUTI',
+    'persen_off': '% OFF',
+    'persen_cuti': '% CUTI',
+}
+
+
+class CacheDashboard:
+    """Hasil agregasi dashboard dengan TTL pendek; LRU kecil dalam proses."""
+
+    def __init__(self, ttl=60, max_entries=64):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+dashboard_cache = CacheDashboard(ttl=app.config['DASHBOARD_CACHE_TTL'])
+
+# Persentase hari suatu kategori terhadap jumlah hari tercatat
+def _ekspresi_persen(field):
+    return {'$cond': [
+        {'$gt': ['$jumlah_hari', 0]},
+        {'$multiply': [{'$divide': [f'${field}', '$jumlah_hari']}, 100]},
+        0,
+    ]}
+
+# Pipeline dashboard: absensi hari ini, ringkasan periode (total kewajiban gaji),
+# jumlah per status, jumlah karyawan, dan satu halaman peringkat karyawan.
+# Peringkat diurutkan dan dipotong di server; $lookup nama hanya untuk halaman itu.
+def pipeline_dashboard(start, end, hari_ini, urut='total_gaji', page=1, per_page=DASHBOARD_PER_PAGE, arsip=False):
+    rentang = filter_rentang_tanggal(start, end)
+    periode = {'$match': {'tanggal': rentang}}
+    tahap = tahap_absensi({'tanggal': rentang}, arsip)
+    if not start <= hari_ini <= end:
+        # Hari ini di luar periode: dibaca di $match yang sama untuk cabang 'hari_ini',
+        # lalu setiap cabang lain menyaring kembali ke rentang periode
+        tahap[0] = {'$match': {'$or': [{'tanggal': rentang}, {'tanggal': hari_ini}]}}
+    return tahap + [
+        {'$facet': {
+            'hari_ini': [
+                {'$match': {'tanggal': hari_ini}},
+                {'$group': dict({'_id': None}, **RINGKASAN_STATUS_GROUP)},
+            ],
+            'ringkasan': [periode, {'$group': dict({'_id': None}, **RINGKASAN_STATUS_GROUP)}],
+            'status': [
+                periode,
+                {'$group': {'_id': '$status', 'jumlah': {'$sum': 1}}},
+                {'$sort': {'jumlah': -1, '_id': 1}},
+            ],
+            'jumlah_karyawan': [periode, {'$group': {'_id': '$karyawan_id'}}, {'$count': 'jumlah'}],
+            'peringkat': [
+                periode,
+                {'$group': dict({'_id': '$karyawan_id'}, **RINGKASAN_STATUS_GROUP)},
+                {'$addFields': {'persen_off': _ekspresi_persen('off'), 'persen_cuti': _ekspresi_persen('cuti')}},
+                {'$sort': {urut: -1, '_id': 1}},
+                {'$skip': (page - 1) * per_page},
+                {'$limit': per_page},
+                {'$lookup': {'from': 'karyawan', 'localField': '_id', 'foreignField': '_id', 'as': 'karyawan'}},
+                {'$addFields': {'nama': {'$arrayElemAt': ['$karyawan.nama', 0]}}},
+                {'$project': {'karyawan': 0}},
+            ],
+        }},
+    ]
+
+# Data dashboard untuk periode start..end (inklusif), dari cache jika masih berlaku
+def ambil_dashboard(db_obj, start, end, urut='total_gaji', page=1, per_page=DASHBOARD_PER_PAGE):
+    hari_ini = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    key = (start, end, hari_ini, urut, page, per_page)
+    hasil = dashboard_cache.get(key)
+    metrik.inc('slip_gaji_dashboard_cache_total', 'Lookup cache dashboard admin per hasil.',
+               (('hasil', 'hit' if hasil is not None else 'miss'),))
+    if hasil is not None:
+        return hasil
+
+    pipeline = pipeline_dashboard(start, end, hari_ini, urut, page, per_page, rentang_berarsip(db_obj, start, end))
+    doc = next(db_obj.absensi.aggregate(pipeline, allowDiskUse=True), None) or {}
+    jumlah_karyawan = doc['jumlah_karyawan'][0]['jumlah'] if doc.get('jumlah_karyawan') else 0
+    peringkat = doc.get('peringkat') or []
+    for row in peringkat:
+        row['lainnya'] = row['jumlah_hari'] - row['hadir'] - row['off'] - row['cuti']
+    hasil = {
+        'hari_ini': ringkasan_dari_facet({'ringkasan': doc.get('hari_ini') or [], 'rows': []}),
+        'ringkasan': ringkasan_dari_facet({'ringkasan': doc.get('ringkasan') or [], 'rows': []}),
+        'status': doc.get('status') or [],
+        'jumlah_karyawan': jumlah_karyawan,
+        'peringkat': peringkat,
+        'page': page,
+        'pages': max(1, -(-jumlah_karyawan // per_page)),
+        'per_page': per_page,
+        'dihitung': datetime.datetime.now(),
+    }
+    dashboard_cache.set(key, hasil)
+    return hasil
+
+# Periode default dashboard: periode yang mencakup hari ini, atau bulan berjalan
+def periode_dashboard_default(db_obj):
+    hari_ini = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    periode = db_obj.periode.find_one(
+        {'mulai': {'$lte': hari_ini}, 'selesai': {'$gte': hari_ini}}, sort=[('mulai', -1)]
+    )
+    if periode is not None:
+        return periode, periode['mulai'], periode['selesai']
+    awal, akhir = rentang_bulan(bulan_dari_tanggal(hari_ini))
+    return None, awal, akhir - datetime.timedelta(days=1)
+
+# --- Cache Slip Gaji (HTML yang sudah dirender) ---
+app.config['SLIP_CACHE_MAX_ENTRIES'] = int(os.environ.get('SLIP_CACHE_MAX_ENTRIES', 512))
+app.config['SLIP_CACHE_TTL'] = int(os.environ.get('SLIP_CACHE_TTL', 3600))
+# Umur entri di LRU dalam proses. Invalidasi hanya menjangkau proses yang menangani
+# penulisan (kecuali lewat store bersama), jadi ini batas slip usang di worker lain.
+app.config['SLIP_CACHE_LOCAL_TTL'] = int(os.environ.get('SLIP_CACHE_LOCAL_TTL', 30))
+# Opsional: store bersama agar cache dan invalidasi berlaku lintas instance.
+# 'redis://...' untuk Redis, atau 'local://' untuk LocalSharedStore (satu proses saja,
+# misalnya untuk pengembangan dan pengujian tanpa Redis).
+app.config['SLIP_CACHE_REDIS_URL'] = os.environ.get('SLIP_CACHE_REDIS_URL')
+
+
+class LocalSharedStore:
+    """Pengganti lokal untuk store bersama (subset perintah Redis: get/mget/set/incr)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def _hidup(self, key, now):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= now:
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key):
+        with self._lock:
+            return self._hidup(key, time.monotonic())
+
+    def mget(self, keys):
+        with self._lock:
+            now = time.monotonic()
+            return [self._hidup(key, now) for key in keys]
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._hidup(key, time.monotonic()) or 0) + 1
+            self._data[key] = (value, None)
+            return value
+
+
+class SlipCache:
+    """Cache HTML slip_gaji per karyawan dan periode.
+
+    Entri disimpan di LRU dalam proses dan, bila tersedia, juga di store bersama.
+    Invalidasi memakai nomor generasi per karyawan (dan satu generasi global)
+    yang ikut menjadi bagian kunci, sehingga entri lama tidak pernah terbaca lagi
+    dan akan tergusur dengan sendirinya oleh LRU/TTL. Entri lokal kedaluwarsa
+    setelah local_ttl detik karena tanpa store bersama generasi hanya ada di
+    proses yang menangani penulisan.
+    """
+
+    def __init__(self, max_entries=512, ttl=3600, shared=None, local_ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.local_ttl = ttl if local_ttl is None else local_ttl
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._generasi = {}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _generasi_keys(self, karyawan_id):
+        return ['slipgen:*', f'slipgen:{karyawan_id}']
+
+    def key(self, karyawan_id, *bagian):
+        names = self._generasi_keys(karyawan_id)
+        if self.shared is not None:
+            generasi = [int(v or 0) for v in self.shared.mget(names)]
+        else:
+            with self._lock:
+                generasi = [self._generasi.get(name, 0) for name in names]
+        return ':'.join(['slip', str(karyawan_id)] + [str(n) for n in generasi] + [str(b) for b in bagian])
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                entry, expires = item
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    return entry
+                del self._entries[key]
+        if self.shared is None:
+            return None
+        raw = self.shared.get(key)
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        entry = {
+            'body': data['body'],
+            'etag': data['etag'],
+            'last_modified': datetime.datetime.fromtimestamp(data['last_modified'], datetime.timezone.utc),
+        }
+        self._simpan_lokal(key, entry)
+        return entry
+
+    def set(self, key, body):
+        entry = {
+            'body': body,
+            'etag': hashlib.sha1(body.encode('utf-8')).hexdigest(),
+            'last_modified': datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0),
+        }
+        self._simpan_lokal(key, entry)
+        if self.shared is not None:
+            payload = dict(entry, last_modified=entry['last_modified'].timestamp())
+            self.shared.set(key, json.dumps(payload), ex=self.ttl)
+        return entry
+
+    def _simpan_lokal(self, key, entry):
+        with self._lock:
+            self._entries[key] = (entry, time.monotonic() + self.local_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, karyawan_id='*'):
+        """Invalidasi semua slip satu karyawan (atau semua karyawan jika '*')."""
+        name = f'slipgen:{karyawan_id}'
+        if self.shared is not None:
+            self.shared.incr(name)
+        with self._lock:
+            self._generasi[name] = self._generasi.get(name, 0) + 1
+            prefix = f'slip:{karyawan_id}:'
+            for key in [k for k in self._entries if karyawan_id == '*' or k.startswith(prefix)]:
+                del self._entries[key]
+
+
+def _buat_store_bersama(url):
+    if not url:
+        return None
+    if url == 'local://':
+        return LocalSharedStore()
+    try:
+        import redis
+    except ImportError:
+        app.logger.warning("SLIP_CACHE_REDIS_URL diatur tetapi paket 'redis' tidak terpasang; memakai cache lokal saja.")
+        return None
+    return redis.Redis.from_url(url, decode_responses=True)
+
+slip_cache = SlipCache(
+    max_entries=app.config['SLIP_CACHE_MAX_ENTRIES'],
+    ttl=app.config['SLIP_CACHE_TTL'],
+    shared=_buat_store_bersama(app.config['SLIP_CACHE_REDIS_URL']),
+    local_ttl=app.config['SLIP_CACHE_LOCAL_TTL']
+)
+
+# Invalidasi cache slip untuk satu atau beberapa karyawan; kegagalan store bersama tidak menggagalkan penulisan
+# ID karyawan dalam bentuk kanonik (hex huruf kecil) agar kunci cache dari URL
+# '/slip_gaji/65AB...' dan dari ObjectId yang sama selalu identik
+def kunci_karyawan_cache(karyawan_id):
+    if karyawan_id != '*' and ObjectId.is_valid(karyawan_id):
+        return str(ObjectId(karyawan_id))
+    return str(karyawan_id)
+
+def invalidasi_slip(*karyawan_ids):
+    # Angka dashboard dihitung dari absensi yang sama, jadi ikut dikosongkan
+    dashboard_cache.invalidate()
+    for karyawan_id in karyawan_ids:
+        try:
+            slip_cache.invalidate(kunci_karyawan_cache(karyawan_id))
+        except Exception as e:
+            app.logger.warning("Gagal menginvalidasi cache slip %s: %s", karyawan_id, e)
+
+# Respons dari entri cache dengan ETag/Last-Modified; GET kondisional dijawab 304
+def respons_slip(entry):
+    response = make_response(entry['body'])
+    response.set_etag(entry['etag'])
+    response.last_modified = entry['last_modified']
+    # Browser selalu memvalidasi ulang sehingga perubahan absensi langsung terlihat
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/', defaults={'karyawan_id': None})
+@app.route('/slip_gaji/<karyawan_id>')
+def slip_gaji(karyawan_id):
+    # Filter periode opsional (?start=YYYY-MM-DD&end=YYYY-MM-DD) dan halaman baris
+    start_str = request.args.get('start', '')
+    end_str = request.args.get('end', '')
+    try:
+        start = parse_tanggal_param(start_str)
+        end = parse_tanggal_param(end_str)
+    except ValueError:
+        flash('Format tanggal filter tidak valid.', 'danger')
+        start = end = None
+        start_str = end_str = ''
+    if start and end and start > end:
+        flash('Tanggal awal tidak boleh setelah tanggal akhir.', 'danger')
+        start = end = None
+        start_str = end_str = ''
+    page = max(request.args.get('page', 1, type=int) or 1, 1)
+    # Periode terpilih (?periode_id=...) menggantikan start/end dengan rentang periode tersebut
+    periode_id = request.args.get('periode_id', '')
+    if periode_id and not ObjectId.is_valid(periode_id):
+        flash('Periode tidak valid.', 'danger')
+        periode_id = ''
+
+    # Slip yang sudah dirender disajikan dari cache tanpa menyentuh database.
+    # Halaman yang membawa flash message tidak di-cache.
+    # ID yang tidak valid tidak di-cache; ditangani di bawah sebagai 'ID Karyawan tidak valid'
+    cache_key = None
+    if karyawan_id and ObjectId.is_valid(karyawan_id) and not session.get('_flashes'):
+        try:
+            cache_key = slip_cache.key(kunci_karyawan_cache(karyawan_id), start_str, end_str, periode_id, page)
+            entry = slip_cache.get(cache_key)
+            g.cache_slip = 'hit' if entry is not None else 'miss'
+            metrik.inc('slip_gaji_slip_cache_total', 'Lookup cache slip gaji per hasil.', (('hasil', g.cache_slip),))
+            if entry is not None:
+                return respons_slip(entry)
+        except Exception as e:
+            app.logger.warning("Cache slip tidak tersedia: %s", e)
+            cache_key = None
+
+    db_obj = get_mongo_db()
+    if db_obj is None:
+        flash("Aplikasi tidak dapat terhubung ke database. Silakan hubungi administrator atau coba lagi nanti.", 'danger')
+        return render_template('error_db.html', message="Koneksi database gagal.")
+    
+    karyawan_collection = db_obj.karyawan
+
+    selected_karyawan = None
+    slip = None
+
+    periode = None
+    if periode_id:
+        periode = ambil_periode(db_obj, periode_id)
+        if periode is None:
+            flash('Periode tidak ditemukan.', 'danger')
+            cache_key = None
+        else:
+            # Query absensi hanya membaca dokumen di dalam rentang periode (indeks karyawan_id, tanggal)
+            start, end = periode['mulai'], periode['selesai']
+            start_str, end_str = start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+    daftar_periode = daftar_periode_terbaru(db_obj)
+    if periode is not None and all(p['_id'] != periode['_id'] for p in daftar_periode):
+        daftar_periode.append(periode)
+
+    # Daftar karyawan untuk pemilih dimuat on-demand lewat cari_karyawan,
+    # jadi di sini cukup satu query untuk karyawan yang dipilih.
+    if karyawan_id:
+        try:
+            selected_karyawan = karyawan_collection.find_one({'_id': ObjectId(karyawan_id)})
+            if not selected_karyawan:
+                flash("Karyawan tidak ditemukan.", 'danger')
+                return redirect(url_for('slip_gaji'))
+        except Exception:
+            flash("ID Karyawan tidak valid.", 'danger')
+            return redirect(url_for('slip_gaji'))
+    else:
+        selected_karyawan = karyawan_collection.find_one({}, sort=[('nama', ASCENDING)])
+        if not selected_karyawan:
+            flash("Belum ada data karyawan. Silakan tambahkan karyawan pertama Anda.", 'info')
+            return redirect(url_for('add_karyawan'))
+
+    if selected_karyawan:
+        slip = ambil_slip(db_obj, selected_karyawan['_id'], start, end, page)
+        # Baris pada periode ditutup (termasuk yang sudah diarsipkan) hanya bisa dilihat
+        for row in slip['rows']:
+            row['terkunci'] = bool(row.get('arsip')) or periode_terkunci(db_obj, row['tanggal']) is not None
+
+    html = render_template(
+        'slip_gaji.html',
+        karyawan=selected_karyawan,
+        absensi_gaji=slip['rows'] if slip else [],
+        total_gaji=slip['total_gaji'] if slip else 0,
+        slip=slip,
+        start=start_str,
+        end=end_str,
+        periode=periode,
+        daftar_periode=daftar_periode
+    )
+    if cache_key is not None:
+        try:
+            return respons_slip(slip_cache.set(cache_key, html))
+        except Exception as e:
+            app.logger.warning("Gagal menyimpan slip ke cache: %s", e)
+    return html
+
+# Batas jumlah hasil per halaman untuk pencarian karyawan
+CARI_KARYAWAN_LIMIT = 20
+CARI_KARYAWAN_MAX_LIMIT = 100
+URUTAN_CARI_KARYAWAN = [('nama_lower', ASCENDING), ('nama', ASCENDING)]
+
+# Bentuk nama yang disimpan di 'nama_lower' dan dipakai untuk mencocokkan pencarian
+def nama_lower(nama):
+    return nama.lower()
+
+# Ambil q, after, dan limit pencarian karyawan dari query string
+def param_cari_karyawan(args):
+    q = args.get('q', '').strip()
+    after = args.get('after') or None
+    limit = args.get('limit', CARI_KARYAWAN_LIMIT, type=int) or CARI_KARYAWAN_LIMIT
+    return q, after, min(max(limit, 1), CARI_KARYAWAN_MAX_LIMIT)
+
+# Query pencarian karyawan berdasarkan awalan nama tanpa membedakan huruf besar/kecil,
+# dengan keyset (nama_lower, nama) di atas indeks 'nama_lower_nama'. 'after' adalah nama
+# terakhir di halaman sebelumnya; nama unik sehingga pasangan keyset juga unik.
+def query_cari_karyawan(q='', after=None):
+    kondisi = []
+    if q:
+        # Regex berjangkar '^' tanpa flag 'i' pada field yang sudah dinormalisasi
+        # dapat memakai indeks sebagai rentang
+        kondisi.append({'nama_lower': {'$regex': '^' + re.escape(nama_lower(q))}})
+    if after:
+        after_lower = nama_lower(after)
+        kondisi.append({'$or': [
+            {'nama_lower': {'$gt': after_lower}},
+            {'nama_lower': after_lower, 'nama': {'$gt': after}},
+        ]})
+    if not kondisi:
+        return {}
+    return kondisi[0] if len(kondisi) == 1 else {'$and': kondisi}
+
+# Potong hasil query (limit + 1 dokumen) menjadi satu halaman dan nilai 'next'-nya
+def halaman_cari_karyawan(docs, limit):
+    next_after = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_after = docs[-1]['nama']
+    return docs, next_after
+
+# Mengembalikan (items, next_after); next_after None jika tidak ada halaman berikutnya.
+def cari_karyawan_keyset(db_obj, q='', after=None, limit=CARI_KARYAWAN_LIMIT):
+    docs = list(
+        db_obj.karyawan.find(query_cari_karyawan(q, after), {'_id': 1, 'nama': 1})
+        .sort(URUTAN_CARI_KARYAWAN)
+        .limit(limit + 1)
+    )
+    docs, next_after = halaman_cari_karyawan(docs, limit)
+    items = [{'_id': str(doc['_id']), 'nama': doc['nama']} for doc in docs]
+    return items, next_after
+
+# Endpoint JSON untuk pemilih karyawan: ?q=awalan&after=nama_terakhir&limit=N
+@app.route('/karyawan/cari')
+def cari_karyawan():
+    db_obj = get_mongo_db()
+    if db_obj is None:
+        return jsonify({'error': 'Koneksi database gagal.'}), 503
+
+    q, after, limit = param_cari_karyawan(request.args)
+    items, next_after = cari_karyawan_keyset(db_obj, q, after, limit)
+    return jsonify({'items': items, 'next': next_after})
+
+# --- Fitur Tambah Karyawan ---
+@app.route('/add_karyawan', methods=['GET', 'POST'])
+@admin_required
+def add_karyawan():
+    db_obj = get_mongo_db()
+    if db_obj is None:
+        flash("Database tidak tersedia.", 'danger')
+        return redirect(url_for('slip_gaji'))
+    karyawan_collection = db_obj.karyawan
+    
+    if request.method == 'POST':
+        nama = request.form['nama']
+        no_rek = request.form['no_rek']
+        periode = request.form['periode']
+
+        if not nama or not no_rek or not periode:
+            flash('Semua kolom harus diisi!', 'danger')
+            return render_template('add_karyawan.html', form_data=request.form)
+
+        # Duplikasi nama ditangani oleh indeks unik 'nama_unik' (DuplicateKeyError)
+        try:
+            new_karyawan_data = {
+                'nama': nama,
+                'nama_lower': nama_lower(nama),
+                'no_rek': no_rek,
+                'periode': periode
+            }
+            result = karyawan_collection.insert_one(new_karyawan_data)
+            flash('Karyawan berhasil ditambahkan!', 'success')
+            return redirect(url_for('slip_gaji', karyawan_id=str(result.inserted_id)))
+        except DuplicateKeyError:
+            flash(f'Karyawan dengan nama "{nama}" sudah ada.', 'danger')
+            return render_template('add_karyawan.html', form_data=request.form)
+        except Exception as e:
+            flash(f'Terjadi kesalahan saat menambahkan karyawan: {e}', 'danger')
+
+    return render_template('add_karyawan.html', form_data={})
+
+# --- Fitur Edit Karyawan ---
+@app.route('/edit_karyawan/<karyawan_id>', methods=['GET', 'POST'])
+@admin_required
+def edit_karyawan(karyawan_id):
+    db_obj = get_mongo_db()
+    if db_obj is None:
+        flash("Database tidak tersedia.", 'danger')
+        return redirect(url_for('slip_gaji'))
+    karyawan_collection = db_obj.karyawan
+    
+    try:
+        karyawan = karyawan_collection.find_one({'_id': ObjectId(karyawan_id)})
+        if not karyawan:
+            flash("Karyawan tidak ditemukan.", 'danger')
+            return redirect(url_for('slip_gaji'))
+    except Exception:
+        flash("ID Karyawan tidak valid.", 'danger')
+        return redirect(url_for('slip_gaji'))
+
+    if request.method == 'POST':
+        nama = request.form['nama']
+        no_rek = request.form['no_rek']
+        periode = request.form['periode']
+
+        if not nama or not no_rek or not periode:
+            flash('Semua kolom harus diisi!', 'danger')
+            return render_template('edit_karyawan.html', karyawan=karyawan)
+
+        try:
+            karyawan_collection.update_one(
+                {'_id': ObjectId(karyawan_id)},
+                {'$set': {'nama': nama, 'nama_lower': nama_lower(nama), 'no_rek': no_rek, 'periode': periode}}
+            )
+            invalidasi_slip(karyawan_id)
+            flash('Data karyawan berhasil diperbarui!', 'success')
+            return redirect(url_for('slip_gaji', karyawan_id=karyawan_id))
+        except DuplicateKeyError:
+            flash(f'Karyawan dengan nama "{nama}" sudah ada.', 'danger')
+            return render_template('edit_karyawan.html', karyawan=karyawan)
+        except Exception as e:
+            flash(f'Terjadi kesalahan saat memperbarui karyawan: {e}', 'danger')
+
+    return render_template('edit_karyawan.html', karyawan=karyawan)
+
+
+# --- Fitur Tambah Absensi ---
+@app.route('/add_absensi/<karyawan_id>', methods=['GET', 'POST'])
+@admin_required
+def add_absensi(karyawan_id):
+    db_obj = get_mongo_db()
+    if db_obj is None:
+        flash("Database tidak tersedia.", 'danger')
+        return redirect(url_for('slip_gaji'))
+    karyawan_collection = db_obj.karyawan
+    absensi_collection = db_obj.absensi
+
+    try:
+        karyawan = karyawan_collection.find_one({'_id': ObjectId(karyawan_id)})
+        if not karyawan:
+            flash("Karyawan tidak ditemukan.", 'danger')
+            return redirect(url_for('slip_gaji'))
+    except Exception:
+        flash("ID Karyawan tidak valid.", 'danger')
+        return redirect(url_for('slip_gaji'))
+
+    if request.method == 'POST':
+        tanggal_str = request.form['tanggal']
+        status = request.form['status']
+        gaji_harian_str = request.form.get('gaji_harian')
+
+        try:
+            tanggal = datetime.datetime.strptime(tanggal_str, '%Y-%m-%d').date()
+            tanggal_dt = datetime.datetime.combine(tanggal, datetime.time())
+            gaji_harian = int(gaji_harian_str) if gaji_harian_str else None
+            nama_periode = periode_terkunci(db_obj, tanggal_dt)
+            if nama_periode:
+                flash(pesan_terkunci(tanggal_dt, nama_periode), 'danger')
+                return redirect(url_for('add_absensi', karyawan_id=karyawan_id))
+
+            # Upsert dengan $setOnInsert: satu round trip, dan catatan yang sudah ada
+            # tidak akan ditimpa (indeks unik karyawan_id+tanggal mencegah balapan insert)
+            result = absensi_collection.update_one(
+                {'karyawan_id': ObjectId(karyawan_id), 'tanggal': tanggal_dt},
+                {'$setOnInsert': {'status': status, 'gaji_harian': gaji_harian}},
+                upsert=True
+            )
+            if result.upserted_id is None:
+                flash(f'Absensi untuk tanggal {tanggal_str} sudah ada.', 'danger')
+                return redirect(url_for('add_absensi', karyawan_id=karyawan_id))
+            terapkan_rekap_delta(db_obj, baru={
+                'karyawan_id': karyawan['_id'],
+                'tanggal': tanggal_dt,
+                'status': status,
+                'gaji_harian': gaji_harian
+            })
+            invalidasi_slip(karyawan['_id'])
+
+            flash('Absensi berhasil ditambahkan!', 'success')
+            return redirect(url_for('slip_gaji', karyawan_id=karyawan_id))
+        except ValueError:
+            flash('Format tanggal atau gaji harian tidak valid.', 'danger')
+        except Exception as e:
+            flash(f'Terjadi kesalahan: {e}', 'danger')
+
+    return render_template('add_absensi.html', karyawan=karyawan)
+
+# --- Fitur Edit Absensi ---
+@app.route('/edit_absensi/<absensi_id>', methods=['GET', 'POST'])
+@admin_required
+def edit_absensi(absensi_id):
+    db_obj = get_mongo_db()
+    if db_obj is None:
+        flash("Database tidak tersedia.", 'danger')
+        return redirect(url_for('slip_gaji'))
+    karyawan_collection = db_obj.karyawan
+    absensi_collection = db_obj.absensi
 
     try:
         absensi = absensi_collection.find_one({'_id': ObjectId(absensi_id)})
+        if not absensi:
+            # Absensi periode yang sudah diarsipkan tetap bisa dibuka (hanya baca)
+            absensi = cari_absensi_arsip(db_obj, ObjectId(absensi_id))
         if not absensi:
             flash("Absensi tidak ditemukan.", 'danger')
             return redirect(url_for('slip_gaji'))
@@ -312,138 +1963,1656 @@ def edit_absensi(absensi_id):
     except Exception:
         flash("ID Absensi tidak valid.", 'danger')
         return redirect(url_for('slip_gaji'))
+    terkunci = periode_terkunci(db_obj, absensi['tanggal'])
+    if absensi.get('arsip') and not terkunci:
+        terkunci = 'arsip'
+
+    if request.method == 'POST' and terkunci:
+        flash(pesan_terkunci(absensi['tanggal'], terkunci), 'danger')
+        return redirect(url_for('edit_absensi', absensi_id=absensi_id))
+
+    if request.method == 'POST':
+        tanggal_str = request.form['tanggal']
+        status = request.form['status']
+        gaji_harian_str = request.form.get('gaji_harian')
+
+        try:
+            tanggal = datetime.datetime.strptime(tanggal_str, '%Y-%m-%d').date()
+            tanggal_dt = datetime.datetime.combine(tanggal, datetime.time())
+            gaji_harian = int(gaji_harian_str) if gaji_harian_str else None
+            nama_periode = periode_terkunci(db_obj, tanggal_dt)
+            if nama_periode:
+                flash(pesan_terkunci(tanggal_dt, nama_periode), 'danger')
+                return redirect(url_for('edit_absensi', absensi_id=absensi_id))
+
+            # Bentrok tanggal dengan catatan lain ditolak oleh indeks unik karyawan_id+tanggal.
+            # Dokumen sebelum update dipakai untuk menghitung selisih rekap_gaji.
+            lama = absensi_collection.find_one_and_update(
+                {'_id': ObjectId(absensi_id)},
+                {'$set': {
+                    'tanggal': tanggal_dt,
+                    'status': status,
+                    'gaji_harian': gaji_harian
+                }},
+                return_document=ReturnDocument.BEFORE
+            )
+            if lama:
+                terapkan_rekap_delta(db_obj, lama=lama, baru=dict(lama, tanggal=tanggal_dt, status=status, gaji_harian=gaji_harian))
+            invalidasi_slip(karyawan['_id'])
+            flash('Absensi berhasil diperbarui!', 'success')
+            return redirect(url_for('slip_gaji', karyawan_id=str(karyawan['_id'])))
+        except DuplicateKeyError:
+            flash(f'Tanggal {tanggal_str} sudah digunakan pada catatan absensi lain untuk karyawan ini.', 'danger')
+            return redirect(url_for('edit_absensi', absensi_id=absensi_id))
+        except ValueError:
+            flash('Format tanggal atau gaji harian tidak valid.', 'danger')
+        except Exception as e:
+            flash(f'Terjadi kesalahan: {e}', 'danger')
+
+    return render_template('edit_absensi.html', absensi=absensi, karyawan=karyawan, terkunci=terkunci)
+
+# --- Fitur Hapus Absensi ---
+@app.route('/delete_absensi/<absensi_id>', methods=['POST'])
+@admin_required
+def delete_absensi(absensi_id):
+    db_obj = get_mongo_db()
+    if db_obj is None:
+        flash("Database tidak tersedia.", 'danger')
+        return redirect(url_for('slip_gaji'))
+    absensi_collection = db_obj.absensi
+
+    try:
+        # Satu round trip: hapus sekaligus ambil dokumen lama untuk rekap_gaji.
+        # Tanggal di periode ditutup dikecualikan langsung di filter.
+        absensi = absensi_collection.find_one_and_delete(dict({'_id': ObjectId(absensi_id)}, **filter_tidak_terkunci(db_obj)))
+        if not absensi:
+            terkunci = absensi_collection.find_one({'_id': ObjectId(absensi_id)}) or cari_absensi_arsip(db_obj, ObjectId(absensi_id))
+            if terkunci:
+                flash(pesan_terkunci(terkunci['tanggal'], periode_terkunci(db_obj, terkunci['tanggal']) or 'arsip'), 'danger')
+                return redirect(url_for('slip_gaji', karyawan_id=str(terkunci['karyawan_id'])))
+            flash("Absensi tidak ditemukan.", 'danger')
+            return redirect(url_for('slip_gaji'))
+        
+        karyawan_id = str(absensi['karyawan_id'])
+        
+        terapkan_rekap_delta(db_obj, lama=absensi)
+        invalidasi_slip(absensi['karyawan_id'])
+        flash('Absensi berhasil dihapus!', 'success')
+    except Exception as e:
+        flash(f'Terjadi kesalahan saat menghapus absensi: {e}', 'danger')
+    return redirect(url_for('slip_gaji', karyawan_id=karyawan_id))
+
+# --- Fitur Isi Absensi per Periode (grid tanggal) ---
+# Pilihan status yang sama dengan form tambah/edit absensi
+STATUS_ABSENSI = ['Hadir', 'OFF', 'CUTI HARI BURUH', 'CUTI WAISAK', 'Sakit', 'Izin']
+# Batas panjang rentang grid agar form tetap ringan
+GRID_MAX_HARI = 62
+
+# Rentang default grid: bulan berjalan
+def rentang_bulan_ini():
+    hari_ini = datetime.date.today()
+    awal = hari_ini.replace(day=1)
+    akhir = (awal + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+    return datetime.datetime.combine(awal, datetime.time()), datetime.datetime.combine(akhir, datetime.time())
+
+@app.route('/absensi_grid/<karyawan_id>', methods=['GET', 'POST'])
+@admin_required
+def absensi_grid(karyawan_id):
+    db_obj = get_mongo_db()
+    if db_obj is None:
+        flash("Database tidak tersedia.", 'danger')
+        return redirect(url_for('slip_gaji'))
+
+    try:
+        karyawan = db_obj.karyawan.find_one({'_id': ObjectId(karyawan_id)})
+        if not karyawan:
+            flash("Karyawan tidak ditemukan.", 'danger')
+            return redirect(url_for('slip_gaji'))
+    except Exception:
+        flash("ID Karyawan tidak valid.", 'danger')
+        return redirect(url_for('slip_gaji'))
+
+    try:
+        start = parse_tanggal_param(request.args.get('start'))
+        end = parse_tanggal_param(request.args.get('end'))
+    except ValueError:
+        flash('Format tanggal tidak valid.', 'danger')
+        return redirect(url_for('absensi_grid', karyawan_id=karyawan_id))
+    if start is None or end is None:
+        start, end = rentang_bulan_ini()
+    jumlah_hari = (end - start).days + 1
+    if jumlah_hari < 1 or jumlah_hari > GRID_MAX_HARI:
+        flash(f'Rentang tanggal harus antara 1 dan {GRID_MAX_HARI} hari.', 'danger')
+        return redirect(url_for('absensi_grid', karyawan_id=karyawan_id))
+    tanggal_list = [start + datetime.timedelta(days=i) for i in range(jumlah_hari)]
+
+    if request.method == 'POST':
+        # Hanya sel yang berubah (dibanding nilai asal di hidden input) yang ditulis,
+        # semuanya dalam satu bulk_write berisi upsert dan delete.
+        ops = []
+        tanggal_diubah = []
+        terkunci = 0
+        try:
+            for tanggal_dt in tanggal_list:
+                key = tanggal_dt.strftime('%Y-%m-%d')
+                status = request.form.get(f'status_{key}', '').strip()
+                gaji_str = request.form.get(f'gaji_{key}', '').strip()
+                asal_status = request.form.get(f'asal_status_{key}', '')
+                asal_gaji = request.form.get(f'asal_gaji_{key}', '')
+                if status == asal_status and gaji_str == asal_gaji:
+                    continue
+                # Tanggal di periode ditutup tidak ditulis (form menampilkannya nonaktif)
+                if periode_terkunci(db_obj, tanggal_dt):
+                    terkunci += 1
+                    continue
+                filter_doc = {'karyawan_id': karyawan['_id'], 'tanggal': tanggal_dt}
+                if not status:
+                    if asal_status:
+                        ops.append(DeleteOne(filter_doc))
+                        tanggal_diubah.append(tanggal_dt)
+                    continue
+                gaji_harian = int(gaji_str) if gaji_str else None
+                tanggal_diubah.append(tanggal_dt)
+                ops.append(UpdateOne(
+                    filter_doc,
+                    {'$set': {'status': status, 'gaji_harian': gaji_harian}},
+                    upsert=True
+                ))
+        except ValueError:
+            flash('Gaji harian harus berupa angka.', 'danger')
+            return redirect(request.full_path)
+
+        if terkunci:
+            flash(f'{terkunci} tanggal termasuk periode yang sudah ditutup dan tidak disimpan.', 'warning')
+        if not ops:
+            flash('Tidak ada perubahan absensi.', 'info')
+        else:
+            try:
+                result = db_obj.absensi.bulk_write(ops, ordered=False)
+                hitung_ulang_rekap(db_obj, {(karyawan['_id'], tanggal_dt) for tanggal_dt in tanggal_diubah})
+                invalidasi_slip(karyawan['_id'])
+                flash(
+                    f'Absensi disimpan: {result.upserted_count} ditambahkan, '
+                    f'{result.modified_count} diperbarui, {result.deleted_count} dihapus.',
+                    'success'
+                )
+            except Exception as e:
+                flash(f'Terjadi kesalahan saat menyimpan absensi: {e}', 'danger')
+                return redirect(request.full_path)
+        return redirect(url_for(
+            'slip_gaji', karyawan_id=karyawan_id,
+            start=start.strftime('%Y-%m-%d'), end=end.strftime('%Y-%m-%d')
+        ))
+
+    # Satu query untuk semua absensi karyawan dalam rentang (ditambah arsip jika
+    # rentang menyentuh periode yang ditutup)
+    existing = {
+        doc['tanggal']: doc
+        for doc in db_obj.absensi.find(
+            {'karyawan_id': karyawan['_id'], 'tanggal': filter_rentang_tanggal(start, end)},
+            {'_id': 0, 'tanggal': 1, 'status': 1, 'gaji_harian': 1}
+        )
+    }
+    if rentang_berarsip(db_obj, start, end):
+        for doc in hari_arsip(db_obj, karyawan['_id'], start, end):
+            existing.setdefault(doc['tanggal'], doc)
+    baris = []
+    for tanggal_dt in tanggal_list:
+        doc = existing.get(tanggal_dt, {})
+        baris.append({
+            'tanggal': tanggal_dt,
+            'status': doc.get('status') or '',
+            'gaji_harian': '' if doc.get('gaji_harian') is None else str(doc['gaji_harian']),
+            'terkunci': periode_terkunci(db_obj, tanggal_dt) is not None,
+        })
+
+    return render_template(
+        'absensi_grid.html',
+        karyawan=karyawan,
+        baris=baris,
+        status_list=STATUS_ABSENSI,
+        start=start.strftime('%Y-%m-%d'),
+        end=end.strftime('%Y-%m-%d')
+    )
+
+# --- Fitur Import Absensi Massal (CSV/XLSX) ---
+# Jumlah baris yang diproses per batch (satu query karyawan + satu bulk_write per batch)
+IMPORT_BATCH_SIZE = 1000
+# Batas jumlah pesan error yang disimpan agar memori tetap konstan untuk file besar
+IMPORT_MAX_ERRORS = 50
+
+# Baca file CSV baris per baris sebagai dict (kolom dinormalisasi ke huruf kecil)
+def baca_baris_csv(stream):
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text_stream)
+    header = next(reader, None)
+    if not header:
+        return
+    kolom = [str(h).strip().lower() for h in header]
+    for nomor, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        yield nomor, dict(zip(kolom, row))
+
+# Baca sheet aktif file XLSX secara streaming (mode read_only openpyxl)
+def baca_baris_xlsx(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Import XLSX membutuhkan paket 'openpyxl'. Gunakan CSV atau pasang openpyxl.")
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return
+        kolom = [str(h).strip().lower() if h is not None else '' for h in header]
+        for nomor, row in enumerate(rows, start=2):
+            if all(cell is None or str(cell).strip() == '' for cell in row):
+                continue
+            yield nomor, dict(zip(kolom, row))
+    finally:
+        workbook.close()
+
+def baca_file_absensi(stream, filename):
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext == '.csv':
+        return baca_baris_csv(stream)
+    if ext in ('.xlsx', '.xlsm'):
+        return baca_baris_xlsx(stream)
+    raise ValueError('Format file tidak didukung. Gunakan .csv atau .xlsx.')
+
+# Ubah gaji harian (angka atau teks, termasuk 70000.0 dari sel XLSX) menjadi int.
+# Nilai pecahan seperti 70000.5 ditolak, bukan dibulatkan diam-diam.
+def parse_gaji_harian(nilai):
+    if isinstance(nilai, bool):
+        raise ValueError(f'gaji_harian harus berupa bilangan bulat: {nilai!r}')
+    if isinstance(nilai, int):
+        return nilai
+    if isinstance(nilai, float):
+        angka = nilai
+    else:
+        teks = str(nilai).strip()
+        try:
+            return int(teks)
+        except ValueError:
+            angka = float(teks)
+    if not angka.is_integer():
+        raise ValueError(f'gaji_harian harus berupa bilangan bulat: {nilai!r}')
+    return int(angka)
+
+# Ubah satu baris file menjadi (kunci_karyawan, tanggal, status, gaji_harian).
+# Kolom: karyawan (nama atau ID) / karyawan_id / nama, tanggal, status, gaji_harian.
+def parse_baris_absensi(row):
+    kunci = row.get('karyawan') or row.get('karyawan_id') or row.get('nama')
+    kunci = str(kunci).strip() if kunci is not None else ''
+    if not kunci:
+        raise ValueError('kolom karyawan kosong')
+
+    nilai_tanggal = row.get('tanggal')
+    if isinstance(nilai_tanggal, datetime.datetime):
+        tanggal = nilai_tanggal.date()
+    elif isinstance(nilai_tanggal, datetime.date):
+        tanggal = nilai_tanggal
+    else:
+        teks = str(nilai_tanggal or '').strip()
+        for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'):
+            try:
+                tanggal = datetime.datetime.strptime(teks, fmt).date()
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f'tanggal tidak valid: {teks!r}')
+
+    status = str(row.get('status') or '').strip()
+    if not status:
+        raise ValueError('kolom status kosong')
+
+    nilai_gaji = row.get('gaji_harian')
+    if nilai_gaji is None or str(nilai_gaji).strip() == '':
+        gaji_harian = None
+    else:
+        try:
+            gaji_harian = parse_gaji_harian(nilai_gaji)
+        except ValueError:
+            raise ValueError(f'gaji_harian tidak valid (harus bilangan bulat): {nilai_gaji!r}')
 
-    if request.method == 'POST':
-        tanggal_str = request.form['tanggal']
-        status = request.form['status']
-        gaji_harian_str = request.form.get('gaji_harian')
+    return kunci, datetime.datetime.combine(tanggal, datetime.time()), status, gaji_harian
+
+# Resolusi nama/ID karyawan untuk satu batch dalam satu query
+def resolve_karyawan_batch(db_obj, kunci_set):
+    ids = [ObjectId(k) for k in kunci_set if ObjectId.is_valid(k)]
+    names = list(kunci_set)
+    hasil = {}
+    for doc in db_obj.karyawan.find({'$or': [{'_id': {'$in': ids}}, {'nama': {'$in': names}}]}, {'nama': 1}):
+        hasil[str(doc['_id'])] = doc['_id']
+        hasil[doc['nama']] = doc['_id']
+    return hasil
+
+def _catat_error(stats, pesan):
+    stats['rejected'] += 1
+    if len(stats['errors']) < IMPORT_MAX_ERRORS:
+        stats['errors'].append(pesan)
 
+# Tulis satu batch baris yang sudah di-parse: resolve karyawan lalu satu bulk_write upsert
+def _proses_batch_import(db_obj, batch, stats):
+    karyawan_map = resolve_karyawan_batch(db_obj, {kunci for _, kunci, _, _, _ in batch})
+    ops = []
+    sudah = set()
+    for nomor, kunci, tanggal, status, gaji_harian in batch:
+        karyawan_id = karyawan_map.get(kunci)
+        if karyawan_id is None:
+            _catat_error(stats, f'Baris {nomor}: karyawan {kunci!r} tidak ditemukan')
+            continue
+        if (karyawan_id, tanggal) in sudah:
+            _catat_error(stats, f'Baris {nomor}: duplikat karyawan dan tanggal dalam file')
+            continue
+        nama_periode = periode_terkunci(db_obj, tanggal)
+        if nama_periode:
+            _catat_error(stats, f'Baris {nomor}: tanggal termasuk periode "{nama_periode}" yang sudah ditutup')
+            continue
+        sudah.add((karyawan_id, tanggal))
+        ops.append(UpdateOne(
+            {'karyawan_id': karyawan_id, 'tanggal': tanggal},
+            {'$set': {'status': status, 'gaji_harian': gaji_harian}},
+            upsert=True
+        ))
+    if not ops:
+        return
+    try:
+        result = db_obj.absensi.bulk_write(ops, ordered=False)
+        stats['inserted'] += result.upserted_count
+        stats['updated'] += result.matched_count
+    except BulkWriteError as e:
+        details = e.details
+        stats['inserted'] += details.get('nUpserted', 0)
+        stats['updated'] += details.get('nMatched', 0)
+        for err in details.get('writeErrors', []):
+            _catat_error(stats, f"Gagal menulis absensi: {err.get('errmsg')}")
+    # Bulan yang tersentuh batch ini dihitung ulang di rekap_gaji, dan cache slipnya dibuang
+    hitung_ulang_rekap(db_obj, sudah)
+    invalidasi_slip(*{karyawan_id for karyawan_id, _ in sudah})
+
+# Import absensi dari iterable (nomor_baris, dict) secara streaming per batch.
+# Mengembalikan statistik: inserted, updated, rejected, dan contoh pesan error.
+def import_absensi(db_obj, baris_iter, batch_size=IMPORT_BATCH_SIZE):
+    stats = {'inserted': 0, 'updated': 0, 'rejected': 0, 'errors': []}
+    batch = []
+    for nomor, row in baris_iter:
         try:
-            tanggal = datetime.datetime.strptime(tanggal_str, '%Y-%m-%d').date()
-            tanggal_dt = datetime.datetime.combine(tanggal, datetime.time())
-            gaji_harian = int(gaji_harian_str) if gaji_harian_str else None
+            batch.append((nomor,) + parse_baris_absensi(row))
+        except ValueError as e:
+            _catat_error(stats, f'Baris {nomor}: {e}')
+            continue
+        if len(batch) >= batch_size:
+            _proses_batch_import(db_obj, batch, stats)
+            batch = []
+    if batch:
+        _proses_batch_import(db_obj, batch, stats)
+    return stats
 
-            existing_record = absensi_collection.find_one({
-                'karyawan_id': karyawan['_id'],
-                'tanggal': tanggal_dt,
-                '_id': {'$ne': ObjectId(absensi_id)}
-            })
-            if existing_record:
-                flash(f'Tanggal {tanggal_str} sudah digunakan pada catatan absensi lain untuk karyawan ini.', 'danger')
-                return redirect(url_for('edit_absensi', absensi_id=absensi_id))
+@app.route('/admin/import_absensi', methods=['GET', 'POST'])
+@admin_required
+def import_absensi_upload():
+    hasil = None
+    if request.method == 'POST':
+        db_obj = get_mongo_db()
+        if db_obj is None:
+            flash("Database tidak tersedia.", 'danger')
+            return redirect(url_for('import_absensi_upload'))
 
-            absensi_collection.update_one(
-                {'_id': ObjectId(absensi_id)},
-                {'$set': {
-                    'tanggal': tanggal_dt,
-                    'status': status,
-                    'gaji_harian': gaji_harian
-                }}
+        file = request.files.get('file')
+        if not file or not file.filename:
+            flash('Pilih file CSV atau XLSX terlebih dahulu.', 'danger')
+            return redirect(url_for('import_absensi_upload'))
+
+        try:
+            hasil = import_absensi(db_obj, baca_file_absensi(file.stream, file.filename))
+            flash(
+                f"Import selesai: {hasil['inserted']} ditambahkan, {hasil['updated']} diperbarui, "
+                f"{hasil['rejected']} ditolak.",
+                'success' if not hasil['rejected'] else 'info'
             )
-            flash('Absensi berhasil diperbarui!', 'success')
-            return redirect(url_for('slip_gaji', karyawan_id=str(karyawan['_id'])))
+        except ValueError as e:
+            flash(str(e), 'danger')
+        except Exception as e:
+            flash(f'Terjadi kesalahan saat import absensi: {e}', 'danger')
+
+    return render_template('import_absensi.html', hasil=hasil)
+
+# --- Fitur Cetak Slip Massal (ZIP berisi HTML dan PDF) ---
+# Jumlah proses render; 1 berarti render berurutan di proses ini
+app.config['SLIP_WORKERS'] = int(os.environ.get('SLIP_WORKERS', os.cpu_count() or 1))
+# Jumlah slip yang dikirim ke pool per gelombang agar memori tetap terbatas
+SLIP_RENDER_CHUNK = 200
+
+# Satu agregasi untuk seluruh karyawan dalam periode: dikelompokkan per karyawan_id
+# lengkap dengan baris absensi, total, dan jumlah hari per status.
+def pipeline_slip_periode(start, end, arsip=False):
+    return tahap_absensi({'tanggal': filter_rentang_tanggal(start, end)}, arsip) + [
+        {'$sort': {'karyawan_id': 1, 'tanggal': 1}},
+        {'$group': dict({
+            '_id': '$karyawan_id',
+            'rows': {'$push': {'tanggal': '$tanggal', 'status': '$status', 'gaji_harian': '$gaji_harian'}},
+        }, **RINGKASAN_STATUS_GROUP)},
+        {'$lookup': {
+            'from': 'karyawan',
+            'localField': '_id',
+            'foreignField': '_id',
+            'as': 'karyawan',
+        }},
+        {'$unwind': '$karyawan'},
+        {'$addFields': {'karyawan': {'_id': '$karyawan._id', 'nama': '$karyawan.nama', 'no_rek': '$karyawan.no_rek'}}},
+        {'$sort': {'karyawan.nama': 1}},
+    ]
+
+def pdf_tersedia():
+    return importlib.util.find_spec('weasyprint') is not None
+
+def _nama_file_slip(karyawan):
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', karyawan.get('nama', '')).strip('_') or 'karyawan'
+    return f"{slug}_{karyawan['_id']}"
+
+# Render satu slip (dipanggil di proses pool, jadi harus fungsi tingkat modul)
+def render_slip_dokumen(doc, periode, pdf=False):
+    slip = {key: doc.get(key) or 0 for key in ('total_gaji', 'jumlah_hari', 'hadir', 'off', 'cuti')}
+    slip['lainnya'] = slip['jumlah_hari'] - slip['hadir'] - slip['off'] - slip['cuti']
+    slip['rows'] = doc['rows']
+    with app.app_context():
+        html = render_template('slip_gaji_cetak.html', karyawan=doc['karyawan'], slip=slip, periode=periode)
+    pdf_bytes = None
+    if pdf:
+        from weasyprint import HTML
+        pdf_bytes = HTML(string=html).write_pdf()
+    return _nama_file_slip(doc['karyawan']), html, pdf_bytes
+
+def _potong(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# Render slip dari cursor secara paralel (ProcessPoolExecutor), per gelombang.
+# Jika pool proses tidak tersedia (mis. runtime serverless tanpa /dev/shm),
+# render dilakukan berurutan di proses ini.
+def render_slip_massal(docs, periode, workers=1, pdf=False):
+    render = functools.partial(render_slip_dokumen, periode=periode, pdf=pdf)
+    executor = None
+    if workers > 1:
+        try:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError) as e:
+            app.logger.warning("Pool proses tidak tersedia, render berurutan: %s", e)
+    try:
+        for chunk in _potong(docs, SLIP_RENDER_CHUNK):
+            if executor is None:
+                yield from map(render, chunk)
+            else:
+                yield from executor.map(render, chunk, chunksize=max(1, len(chunk) // (workers * 4)))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+# Tulis semua slip periode ke file ZIP (fileobj yang dapat ditulis). Mengembalikan jumlah slip.
+def tulis_zip_slip(db_obj, start, end, fileobj, workers=1, pdf=False):
+    periode = format_periode(start, end)
+    cursor = db_obj.absensi.aggregate(pipeline_slip_periode(start, end, rentang_berarsip(db_obj, start, end)), allowDiskUse=True)
+    jumlah = 0
+    with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED) as arsip:
+        for nama_file, html, pdf_bytes in render_slip_massal(cursor, periode, workers, pdf):
+            arsip.writestr(f'html/{nama_file}.html', html)
+            if pdf_bytes is not None:
+                arsip.writestr(f'pdf/{nama_file}.pdf', pdf_bytes)
+            jumlah += 1
+    return jumlah
+
+@app.route('/admin/generate_slips', methods=['GET', 'POST'])
+@admin_required
+def generate_slips():
+    if request.method == 'POST':
+        db_obj = get_mongo_db()
+        if db_obj is None:
+            flash("Database tidak tersedia.", 'danger')
+            return redirect(url_for('generate_slips'))
+        try:
+            start = parse_tanggal_param(request.form.get('start'))
+            end = parse_tanggal_param(request.form.get('end'))
         except ValueError:
-            flash('Format tanggal atau gaji harian tidak valid.', 'danger')
+            start = end = None
+        if start is None or end is None or start > end:
+            flash('Rentang tanggal tidak valid.', 'danger')
+            return redirect(url_for('generate_slips'))
+
+        pdf = bool(request.form.get('pdf')) and pdf_tersedia()
+        if request.form.get('pdf') and not pdf:
+            flash("PDF tidak tersedia (paket 'weasyprint' belum terpasang); hanya HTML yang dibuat.", 'info')
+
+        # ZIP ditulis bertahap ke file sementara (memori hanya dipakai hingga 16 MB)
+        hasil = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+        try:
+            jumlah = tulis_zip_slip(db_obj, start, end, hasil, current_app.config['SLIP_WORKERS'], pdf)
         except Exception as e:
-            flash(f'Terjadi kesalahan: {e}', 'danger')
+            hasil.close()
+            flash(f'Terjadi kesalahan saat membuat slip: {e}', 'danger')
+            return redirect(url_for('generate_slips'))
+        if jumlah == 0:
+            hasil.close()
+            flash('Tidak ada absensi pada rentang tanggal tersebut.', 'info')
+            return redirect(url_for('generate_slips'))
+        hasil.seek(0)
+        return send_file(
+            hasil,
+            mimetype='application/zip',
+            as_attachment=True,
+            download_name=f"slip_gaji_{start.strftime('%Y%m%d')}_{end.strftime('%Y%m%d')}.zip"
+        )
+
+    start, end = rentang_bulan_ini()
+    return render_template(
+        'generate_slips.html',
+        start=start.strftime('%Y-%m-%d'),
+        end=end.strftime('%Y-%m-%d'),
+        pdf_tersedia=pdf_tersedia()
+    )
 
-    return render_template('edit_absensi.html', absensi=absensi, karyawan=karyawan)
+# --- Fitur Export Absensi per Periode (CSV/XLSX, streaming) ---
+# Jumlah dokumen per batch cursor; baris dikirim ke klien sambil cursor dibaca
+EXPORT_BATCH_SIZE = 2000
+# Ukuran potongan (byte) yang dikirim ke klien/file sekaligus
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_HEADER = ['Nama', 'No. Rekening', 'Tanggal', 'Status', 'Gaji Harian']
+EXPORT_FORMATS = ('csv', 'xlsx')
 
-# --- Fitur Hapus Absensi ---
-@app.route('/delete_absensi/<absensi_id>', methods=['POST'])
+# Absensi dalam rentang, diurutkan per karyawan lalu digabung dengan data karyawan.
+# Tanpa arsip, $sort hanya tidak memblokir jika planner memakai indeks karyawan_id_tanggal_unik
+# (bukan indeks lain yang cocok dengan filter rentang), karena itu indeksnya ditetapkan
+# lewat hint_export_absensi. Jika rentang mencakup periode yang diarsipkan,
+# $unionWith membuat $sort selalu memblokir: seluruh rentang diurutkan dulu (allowDiskUse)
+# sebelum baris pertama dikirim, jadi unduhan baru mengalir setelah pengurutan selesai.
+def pipeline_export_absensi(start, end, arsip=False):
+    return tahap_absensi({'tanggal': filter_rentang_tanggal(start, end)}, arsip) + [
+        {'$sort': {'karyawan_id': 1, 'tanggal': 1}},
+        {'$lookup': {'from': 'karyawan', 'localField': 'karyawan_id', 'foreignField': '_id', 'as': 'karyawan'}},
+        {'$project': {
+            '_id': 0, 'karyawan_id': 1, 'tanggal': 1, 'status': 1, 'gaji_harian': 1,
+            'nama': {'$arrayElemAt': ['$karyawan.nama', 0]},
+            'no_rek': {'$arrayElemAt': ['$karyawan.no_rek', 0]},
+        }},
+    ]
+
+# Opsi aggregate untuk export: hint indeks urutan hanya berguna tanpa arsip (lihat di atas);
+# dengan arsip pengurutan tetap memblokir, jadi planner dibiarkan memilih indeksnya sendiri.
+def hint_export_absensi(arsip=False):
+    return {} if arsip else {'hint': 'karyawan_id_tanggal_unik'}
+
+# Generator baris export: (jenis, nilai) dengan jenis 'header', 'data', 'subtotal', atau 'total'.
+# Subtotal ditulis setiap kali karyawan berganti, sehingga hanya satu karyawan yang diingat.
+def baris_export_absensi(db_obj, start, end, batch_size=EXPORT_BATCH_SIZE):
+    yield 'header', EXPORT_HEADER
+    arsip = rentang_berarsip(db_obj, start, end)
+    pipeline = pipeline_export_absensi(start, end, arsip)
+    cursor = db_obj.absensi.aggregate(pipeline, batchSize=batch_size, allowDiskUse=True, **hint_export_absensi(arsip))
+    sekarang = None
+    sub_hari = sub_gaji = 0
+    total_karyawan = total_hari = total_gaji = 0
+    with cursor:
+        for doc in cursor:
+            if sekarang is None or doc['karyawan_id'] != sekarang[0]:
+                if sekarang is not None:
+                    yield 'subtotal', [sekarang[1], sekarang[2], 'SUBTOTAL', f'{sub_hari} hari', sub_gaji]
+                sekarang = (doc['karyawan_id'], doc.get('nama') or str(doc['karyawan_id']), doc.get('no_rek') or '')
+                sub_hari = sub_gaji = 0
+                total_karyawan += 1
+            gaji = doc.get('gaji_harian') or 0
+            sub_hari += 1
+            sub_gaji += gaji
+            total_hari += 1
+            total_gaji += gaji
+            yield 'data', [sekarang[1], sekarang[2], doc['tanggal'], doc.get('status', ''), doc.get('gaji_harian')]
+    if sekarang is not None:
+        yield 'subtotal', [sekarang[1], sekarang[2], 'SUBTOTAL', f'{sub_hari} hari', sub_gaji]
+    yield 'total', ['TOTAL', f'{total_karyawan} karyawan', '', f'{total_hari} hari', total_gaji]
+
+def stream_csv(baris_iter):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM agar Excel membaca file sebagai UTF-8
+    buffer.write('\ufeff')
+    for _, nilai in baris_iter:
+        writer.writerow([v.strftime('%Y-%m-%d') if isinstance(v, datetime.datetime) else v for v in nilai])
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+class _PenampungZip:
+    """File tulis-saja untuk zipfile; byte ditampung sampai diambil oleh generator.
+
+    Karena tidak mendukung seek/tell, zipfile menulis entri secara berurutan
+    (dengan data descriptor) sehingga XLSX dapat dikirim sebelum selesai dibuat.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def write(self, data):
+        self._buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def ambil(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+_XLSX_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_XLSX_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_XLSX_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_XLSX_BERKAS_TETAP = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><Relationships xmlns="{_XLSX_PKG_REL}">'
+        f'<Relationship Id="rId1" Type="{_XLSX_REL}/officeDocument" Target="xl/workbook.xml"/></Relationships>'
+    ),
+    'xl/workbook.xml': (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><workbook xmlns="{_XLSX_NS}" xmlns:r="{_XLSX_REL}">'
+        '<sheets><sheet name="Absensi" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><Relationships xmlns="{_XLSX_PKG_REL}">'
+        f'<Relationship Id="rId1" Type="{_XLSX_REL}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{_XLSX_REL}/styles" Target="styles.xml"/></Relationships>'
+    ),
+    # Gaya 1: tanggal (format bawaan 14), gaya 2: tebal untuk judul/subtotal/total
+    'xl/styles.xml': (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><styleSheet xmlns="{_XLSX_NS}">'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+_XML_TIDAK_VALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_EPOCH_EXCEL = datetime.datetime(1899, 12, 30)
+
+def _sel_xlsx(nilai, tebal):
+    gaya = ' s="2"' if tebal else ''
+    if nilai is None or nilai == '':
+        return '<c/>'
+    if isinstance(nilai, datetime.datetime):
+        return f'<c s="1"><v>{(nilai - _EPOCH_EXCEL).days}</v></c>'
+    if isinstance(nilai, (int, float)) and not isinstance(nilai, bool):
+        return f'<c{gaya}><v>{nilai}</v></c>'
+    teks = escape_xml(_XML_TIDAK_VALID.sub('', str(nilai)))
+    return f'<c t="inlineStr"{gaya}><is><t xml:space="preserve">{teks}</t></is></c>'
+
+def stream_xlsx(baris_iter):
+    out = _PenampungZip()
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for nama, isi in _XLSX_BERKAS_TETAP.items():
+            zf.writestr(nama, isi)
+        yield out.ambil()
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><worksheet xmlns="{_XLSX_NS}"><sheetData>'.encode('utf-8'))
+            for nomor, (jenis, nilai) in enumerate(baris_iter, start=1):
+                sel = ''.join(_sel_xlsx(v, jenis != 'data') for v in nilai)
+                sheet.write(f'<row r="{nomor}">{sel}</row>'.encode('utf-8'))
+                if len(out) >= EXPORT_CHUNK_BYTES:
+                    yield out.ambil()
+            sheet.write(b'</sheetData></worksheet>')
+    yield out.ambil()
+
+def export_absensi(db_obj, start, end, fmt='csv', batch_size=EXPORT_BATCH_SIZE):
+    """Generator potongan byte file export absensi untuk rentang tanggal."""
+    baris = baris_export_absensi(db_obj, start, end, batch_size)
+    return stream_xlsx(baris) if fmt == 'xlsx' else stream_csv(baris)
+
+def _nama_file_export(start, end, fmt):
+    return f"absensi_{start.strftime('%Y%m%d')}_{end.strftime('%Y%m%d')}.{fmt}"
+
+@app.route('/admin/export_absensi')
 @admin_required
-def delete_absensi(absensi_id):
+def export_absensi_download():
+    start_str = request.args.get('start', '')
+    end_str = request.args.get('end', '')
+    fmt = request.args.get('format', 'csv')
+    if not (start_str or end_str):
+        start, end = rentang_bulan_ini()
+        return render_template('export_absensi.html', start=start.strftime('%Y-%m-%d'),
+                               end=end.strftime('%Y-%m-%d'), format=fmt)
+    try:
+        start = parse_tanggal_param(start_str)
+        end = parse_tanggal_param(end_str)
+    except ValueError:
+        start = end = None
+    if start is None or end is None or start > end or fmt not in EXPORT_FORMATS:
+        flash('Rentang tanggal atau format export tidak valid.', 'danger')
+        return render_template('export_absensi.html', start=start_str, end=end_str, format=fmt)
+
     db_obj = get_mongo_db()
     if db_obj is None:
         flash("Database tidak tersedia.", 'danger')
-        return redirect(url_for('slip_gaji'))
-    absensi_collection = db_obj.absensi
+        return render_template('export_absensi.html', start=start_str, end=end_str, format=fmt)
+
+    mimetype = ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+                if fmt == 'xlsx' else 'text/csv; charset=utf-8')
+    response = Response(stream_with_context(export_absensi(db_obj, start, end, fmt)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{_nama_file_export(start, end, fmt)}"'
+    # Matikan buffering proxy (nginx) agar unduhan langsung dimulai
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# --- API JSON v1 (async) ---
+# Token opsional untuk klien non-browser (HR/mobile): 'Authorization: Bearer <API_TOKEN>'
+app.config['API_TOKEN'] = os.environ.get('API_TOKEN')
+# Batas jumlah karyawan per permintaan slip batch
+API_BATCH_MAX_IDS = 200
+# Respons JSON ringkas (tanpa indentasi/spasi)
+app.json.compact = True
+
+
+class AsyncMongoRunner:
+    """Menjalankan query Motor pada satu event loop latar belakang per proses.
+
+    View async Flask dijalankan di event loop baru untuk setiap request, sedangkan
+    klien Motor terikat pada satu loop. Karena itu klien (beserta pool koneksinya)
+    hidup di loop milik thread latar belakang, dan view menunggu hasilnya lewat
+    asyncio.wrap_future sehingga beberapa query tetap dapat berjalan bersamaan.
+    """
+
+    def __init__(self, config, db_name, client_factory=None):
+        self.config = config
+        self.db_name = db_name
+        self.client_factory = client_factory
+        self._lock = threading.Lock()
+        self._loop = None
+        self._client = None
+        self._pid = None
+
+    def _mulai(self):
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return
+            factory = self.client_factory
+            if factory is None:
+                from motor.motor_asyncio import AsyncIOMotorClient
+                factory = AsyncIOMotorClient
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='async-mongo', daemon=True).start()
+            self._client = factory(
+                self.config['MONGO_URI'],
+                io_loop=loop,
+                maxPoolSize=self.config['MONGO_MAX_POOL_SIZE'],
+                minPoolSize=self.config['MONGO_MIN_POOL_SIZE'],
+                maxIdleTimeMS=self.config['MONGO_MAX_IDLE_TIME_MS'],
+                serverSelectionTimeoutMS=self.config['MONGO_SERVER_SELECTION_TIMEOUT_MS'],
+                connectTimeoutMS=self.config['MONGO_CONNECT_TIMEOUT_MS'],
+                socketTimeoutMS=self.config['MONGO_SOCKET_TIMEOUT_MS'],
+                event_listeners=MONGO_EVENT_LISTENERS,
+            )
+            self._loop = loop
+            self._pid = os.getpid()
+
+    async def jalankan(self, fungsi, *args):
+        """Jalankan coroutine fungsi(db, *args) di loop latar belakang dan tunggu hasilnya."""
+        self._mulai()
+        db = self._client.get_database(self.db_name)
+        future = asyncio.run_coroutine_threadsafe(fungsi(db, *args), self._loop)
+        mulai = time.perf_counter()
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            # Event perintah Motor terjadi di thread lain, jadi waktu tunggu dicatat di sini.
+            # Query yang berjalan bersamaan (asyncio.gather) ikut dijumlahkan.
+            if has_request_context():
+                g.db_detik = g.get('db_detik', 0.0) + time.perf_counter() - mulai
+
+    def reset(self):
+        with self._lock:
+            if self._client is not None:
+                try:
+                    self._client.close()
+                except Exception:
+                    pass
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+            self._client = None
+            self._loop = None
+
+
+api_mongo = AsyncMongoRunner(app.config, "slip_gaji_db")
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
 
+@app.errorhandler(ApiError)
+def handle_api_error(e):
+    return jsonify({'error': e.message}), e.status
+
+def _api_token_valid():
+    token = app.config['API_TOKEN']
+    auth = request.headers.get('Authorization', '')
+    return bool(token) and auth.startswith('Bearer ') and hmac.compare_digest(auth[7:], token)
+
+# Dekorator untuk endpoint API yang mengubah data: sesi admin atau API token
+def api_admin_required(f):
+    from functools import wraps
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        if not (is_admin_logged_in() or _api_token_valid()):
+            return jsonify({'error': 'Autentikasi admin diperlukan.'}), 401
+        return await f(*args, **kwargs)
+    return decorated_function
+
+def _api_object_id(value, nama='id'):
+    if not value or not ObjectId.is_valid(str(value)):
+        raise ApiError(f'{nama} tidak valid.')
+    return ObjectId(str(value))
+
+def _api_tanggal(value, nama='tanggal'):
     try:
-        absensi = absensi_collection.find_one({'_id': ObjectId(absensi_id)})
-        if not absensi:
-            flash("Absensi tidak ditemukan.", 'danger')
-            return redirect(url_for('slip_gaji'))
-        
-        karyawan_id = str(absensi['karyawan_id'])
-        
-        absensi_collection.delete_one({'_id': ObjectId(absensi_id)})
-        flash('Absensi berhasil dihapus!', 'success')
-    except Exception as e:
-        flash(f'Terjadi kesalahan saat menghapus absensi: {e}', 'danger')
-    return redirect(url_for('slip_gaji', karyawan_id=karyawan_id))
+        return parse_tanggal_param(value)
+    except (TypeError, ValueError):
+        raise ApiError(f'{nama} harus berformat YYYY-MM-DD.')
+
+def _api_rentang(sumber=None):
+    sumber = request.args if sumber is None else sumber
+    start = _api_tanggal(sumber.get('start'), 'start')
+    end = _api_tanggal(sumber.get('end'), 'end')
+    if start and end and start > end:
+        raise ApiError('start tidak boleh setelah end.')
+    return start, end
+
+# Tolak perubahan absensi pada periode yang sudah ditutup (409)
+async def _q_periode_ditutup(db):
+    return await db.periode.find(CachePeriodeDitutup.FILTER, CachePeriodeDitutup.PROYEKSI).to_list(length=None)
+
+# Pastikan cache periode ditutup segar, dibaca lewat Motor (bukan klien sync yang memblokir).
+# Setelah ini fungsi kunci periode dapat dipanggil dengan db_obj None, termasuk dari query
+# Motor yang menghitung ulang rekap. Kegagalan koneksi diteruskan sebagai 503.
+async def _api_periode_ditutup():
+    if periode_ditutup.segar() is None:
+        periode_ditutup.simpan(await api_mongo.jalankan(_q_periode_ditutup))
+
+async def _api_cek_terkunci(tanggal, arsip=False):
+    await _api_periode_ditutup()
+    nama = periode_terkunci(None, tanggal)
+    if nama or arsip:
+        raise ApiError(pesan_terkunci(tanggal, nama or 'arsip'), 409)
+
+def _json_tanggal(value):
+    return value.strftime('%Y-%m-%d') if value else None
+
+def _json_karyawan(doc):
+    return {'id': str(doc['_id']), 'nama': doc.get('nama'), 'no_rek': doc.get('no_rek'), 'periode': doc.get('periode')}
+
+def _json_absensi(doc):
+    hasil = {'tanggal': _json_tanggal(doc['tanggal']), 'status': doc.get('status'), 'gaji_harian': doc.get('gaji_harian')}
+    if '_id' in doc:
+        hasil['id'] = str(doc['_id'])
+    if 'karyawan_id' in doc:
+        hasil['karyawan_id'] = str(doc['karyawan_id'])
+    if doc.get('arsip'):
+        hasil['arsip'] = True
+    return hasil
+
+def _json_slip(karyawan, slip):
+    hasil = {field: slip[field] for field in REKAP_FIELDS}
+    hasil['karyawan'] = _json_karyawan(karyawan)
+    hasil['absensi'] = [_json_absensi(row) for row in slip['rows']]
+    if 'page' in slip:
+        hasil['page'] = slip['page']
+        hasil['pages'] = slip['pages']
+    return hasil
+
+async def _q_karyawan(db, karyawan_id):
+    return await db.karyawan.find_one({'_id': karyawan_id}, {'nama': 1, 'no_rek': 1, 'periode': 1})
+
+async def _q_slip(db, match, page, per_page, arsip=False):
+    docs = await db.absensi.aggregate(pipeline_slip(match, page, per_page, arsip)).to_list(length=1)
+    return ringkasan_dari_facet(docs[0] if docs else None, page, per_page)
+
+async def _q_cari_karyawan(db, query, limit):
+    cursor = db.karyawan.find(query, {'_id': 1, 'nama': 1}).sort(URUTAN_CARI_KARYAWAN).limit(limit + 1)
+    return await cursor.to_list(length=limit + 1)
+
+async def _q_karyawan_banyak(db, ids):
+    cursor = db.karyawan.find({'_id': {'$in': ids}}, {'nama': 1, 'no_rek': 1, 'periode': 1})
+    return await cursor.to_list(length=None)
+
+async def _q_slip_banyak(db, ids, start, end, arsip=False):
+    match = {'karyawan_id': {'$in': ids}}
+    rentang = filter_rentang_tanggal(start, end)
+    if rentang:
+        match['tanggal'] = rentang
+    pipeline = tahap_absensi(match, arsip) + [
+        {'$sort': {'karyawan_id': 1, 'tanggal': 1}},
+        {'$group': dict({
+            '_id': '$karyawan_id',
+            'rows': {'$push': {'tanggal': '$tanggal', 'status': '$status', 'gaji_harian': '$gaji_harian'}},
+        }, **RINGKASAN_STATUS_GROUP)},
+    ]
+    return await db.absensi.aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+
+async def _q_absensi(db, absensi_id):
+    doc = await db.absensi.find_one({'_id': absensi_id})
+    if doc is None:
+        doc = _absensi_dari_arsip(await db.absensi_arsip.find_one(
+            {'hari._id': absensi_id}, {'karyawan_id': 1, 'hari': {'$elemMatch': {'_id': absensi_id}}}
+        ))
+    return doc
+
+async def _q_rekap_delta(db, lama, baru):
+    ops = ops_rekap_delta(lama, baru)
+    if not ops:
+        return
+    result = await db.rekap_gaji.bulk_write(ops, ordered=False)
+    kosong = filter_rekap_kosong(lama)
+    if kosong is not None:
+        await db.rekap_gaji.delete_one(kosong)
+    if not result.upserted_ids:
+        return
+    # Dokumen rekap baru dihitung ulang seperti pada terapkan_rekap_delta. Daftar periode
+    # ditutup sudah dimuat ke cache oleh _api_periode_ditutup sebelum rute API menulis.
+    baru_dibuat = await db.rekap_gaji.find(
+        {'_id': {'$in': list(result.upserted_ids.values())}}, {'karyawan_id': 1, 'bulan': 1}
+    ).to_list(length=None)
+    pasangan, pipeline = _rencana_hitung_ulang(None, {(doc['karyawan_id'], doc['bulan']) for doc in baru_dibuat})
+    if pasangan is not None:
+        hasil = await db.absensi.aggregate(pipeline).to_list(length=None)
+        await db.rekap_gaji.bulk_write(_ops_hitung_ulang(pasangan, hasil), ordered=False)
+
+async def _q_tambah_absensi(db, doc):
+    result = await db.absensi.update_one(
+        {'karyawan_id': doc['karyawan_id'], 'tanggal': doc['tanggal']},
+        {'$setOnInsert': {'status': doc['status'], 'gaji_harian': doc['gaji_harian']}},
+        upsert=True
+    )
+    if result.upserted_id is None:
+        return None
+    await _q_rekap_delta(db, None, doc)
+    return result.upserted_id
+
+async def _q_ubah_absensi(db, absensi_id, perubahan):
+    lama = await db.absensi.find_one_and_update(
+        {'_id': absensi_id}, {'$set': perubahan}, return_document=ReturnDocument.BEFORE
+    )
+    if lama is None:
+        return None, None
+    baru = dict(lama, **perubahan)
+    await _q_rekap_delta(db, lama, baru)
+    return lama, baru
+
+async def _q_hapus_absensi(db, absensi_id, filter_tambahan=None):
+    lama = await db.absensi.find_one_and_delete(dict({'_id': absensi_id}, **(filter_tambahan or {})))
+    if lama is not None:
+        await _q_rekap_delta(db, lama, None)
+    return lama
+
+# Validasi body JSON absensi; partial=True untuk update sebagian (PATCH/PUT)
+def _api_body_absensi(partial=False):
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise ApiError('Body harus berupa objek JSON.')
+    hasil = {}
+    if 'tanggal' in data or not partial:
+        hasil['tanggal'] = _api_tanggal(data.get('tanggal'))
+        if hasil['tanggal'] is None:
+            raise ApiError('tanggal wajib diisi.')
+    if 'status' in data or not partial:
+        status = str(data.get('status') or '').strip()
+        if not status:
+            raise ApiError('status wajib diisi.')
+        hasil['status'] = status
+    if 'gaji_harian' in data or not partial:
+        gaji = data.get('gaji_harian')
+        if gaji in (None, ''):
+            hasil['gaji_harian'] = None
+        elif isinstance(gaji, bool) or not isinstance(gaji, (int, float, str)):
+            raise ApiError('gaji_harian harus berupa bilangan bulat.')
+        else:
+            try:
+                hasil['gaji_harian'] = parse_gaji_harian(gaji)
+            except ValueError:
+                raise ApiError('gaji_harian harus berupa bilangan bulat.')
+    return data, hasil
+
+@app.route('/api/v1/karyawan')
+async def api_karyawan_list():
+    q, after, limit = param_cari_karyawan(request.args)
+    docs = await api_mongo.jalankan(_q_cari_karyawan, query_cari_karyawan(q, after), limit)
+    docs, next_after = halaman_cari_karyawan(docs, limit)
+    return jsonify({'items': [{'id': str(d['_id']), 'nama': d['nama']} for d in docs], 'next': next_after})
+
+@app.route('/api/v1/karyawan/<karyawan_id>/slip')
+async def api_slip(karyawan_id):
+    oid = _api_object_id(karyawan_id, 'karyawan_id')
+    start, end = _api_rentang()
+    page = max(request.args.get('page', 1, type=int) or 1, 1)
+    per_page = min(max(request.args.get('per_page', SLIP_PER_PAGE, type=int) or SLIP_PER_PAGE, 1), 366)
+    await _api_periode_ditutup()
+    arsip = rentang_berarsip(None, start, end)
+    # Data karyawan dan agregasi slip tidak saling bergantung: jalankan bersamaan
+    karyawan, slip = await asyncio.gather(
+        api_mongo.jalankan(_q_karyawan, oid),
+        api_mongo.jalankan(_q_slip, match_slip(oid, start, end), page, per_page, arsip),
+    )
+    if karyawan is None:
+        raise ApiError('Karyawan tidak ditemukan.', 404)
+    return jsonify(_json_slip(karyawan, slip))
+
+@app.route('/api/v1/slip/batch', methods=['POST'])
+async def api_slip_batch():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('ids'), list):
+        raise ApiError("Body harus berisi daftar 'ids'.")
+    if len(data['ids']) > API_BATCH_MAX_IDS:
+        raise ApiError(f'Maksimal {API_BATCH_MAX_IDS} karyawan per permintaan.')
+    ids = list(dict.fromkeys(_api_object_id(i, 'ids') for i in data['ids']))
+    start, end = _api_rentang(data)
+
+    await _api_periode_ditutup()
+    karyawan_docs, slip_docs = await asyncio.gather(
+        api_mongo.jalankan(_q_karyawan_banyak, ids),
+        api_mongo.jalankan(_q_slip_banyak, ids, start, end, rentang_berarsip(None, start, end)),
+    )
+    karyawan_map = {doc['_id']: doc for doc in karyawan_docs}
+    slip_map = {doc['_id']: doc for doc in slip_docs}
+    items = []
+    for oid in ids:
+        karyawan = karyawan_map.get(oid)
+        if karyawan is None:
+            continue
+        slip = ringkasan_kosong()
+        slip['rows'] = []
+        doc = slip_map.get(oid)
+        if doc:
+            for field in ('total_gaji', 'jumlah_hari', 'hadir', 'off', 'cuti'):
+                slip[field] = doc.get(field) or 0
+            slip['lainnya'] = slip['jumlah_hari'] - slip['hadir'] - slip['off'] - slip['cuti']
+            slip['rows'] = doc['rows']
+        items.append(_json_slip(karyawan, slip))
+    tidak_ditemukan = [str(oid) for oid in ids if oid not in karyawan_map]
+    return jsonify({'items': items, 'not_found': tidak_ditemukan})
+
+@app.route('/api/v1/absensi', methods=['POST'])
+@api_admin_required
+async def api_absensi_create():
+    data, doc = _api_body_absensi()
+    doc['karyawan_id'] = _api_object_id(data.get('karyawan_id'), 'karyawan_id')
+    if await api_mongo.jalankan(_q_karyawan, doc['karyawan_id']) is None:
+        raise ApiError('Karyawan tidak ditemukan.', 404)
+    await _api_cek_terkunci(doc['tanggal'])
+    absensi_id = await api_mongo.jalankan(_q_tambah_absensi, doc)
+    if absensi_id is None:
+        raise ApiError(f"Absensi untuk tanggal {_json_tanggal(doc['tanggal'])} sudah ada.", 409)
+    invalidasi_slip(doc['karyawan_id'])
+    return jsonify(_json_absensi(dict(doc, _id=absensi_id))), 201
+
+@app.route('/api/v1/absensi/<absensi_id>', methods=['GET'])
+async def api_absensi_get(absensi_id):
+    doc = await api_mongo.jalankan(_q_absensi, _api_object_id(absensi_id))
+    if doc is None:
+        raise ApiError('Absensi tidak ditemukan.', 404)
+    return jsonify(_json_absensi(doc))
+
+@app.route('/api/v1/absensi/<absensi_id>', methods=['PUT', 'PATCH'])
+@api_admin_required
+async def api_absensi_update(absensi_id):
+    oid = _api_object_id(absensi_id)
+    _, perubahan = _api_body_absensi(partial=request.method == 'PATCH')
+    if not perubahan:
+        raise ApiError('Tidak ada field yang diubah.')
+    # Dibaca dulu agar absensi di periode ditutup (atau di arsip) ditolak sebelum ditulis
+    sekarang = await api_mongo.jalankan(_q_absensi, oid)
+    if sekarang is None:
+        raise ApiError('Absensi tidak ditemukan.', 404)
+    await _api_cek_terkunci(sekarang['tanggal'], sekarang.get('arsip'))
+    if 'tanggal' in perubahan:
+        await _api_cek_terkunci(perubahan['tanggal'])
+    try:
+        lama, baru = await api_mongo.jalankan(_q_ubah_absensi, oid, perubahan)
+    except DuplicateKeyError:
+        raise ApiError('Tanggal sudah digunakan pada catatan absensi lain untuk karyawan ini.', 409)
+    if lama is None:
+        raise ApiError('Absensi tidak ditemukan.', 404)
+    invalidasi_slip(baru['karyawan_id'])
+    return jsonify(_json_absensi(baru))
+
+@app.route('/api/v1/absensi/<absensi_id>', methods=['DELETE'])
+@api_admin_required
+async def api_absensi_delete(absensi_id):
+    oid = _api_object_id(absensi_id)
+    await _api_periode_ditutup()
+    lama = await api_mongo.jalankan(_q_hapus_absensi, oid, filter_tidak_terkunci(None))
+    if lama is None:
+        sekarang = await api_mongo.jalankan(_q_absensi, oid)
+        if sekarang is None:
+            raise ApiError('Absensi tidak ditemukan.', 404)
+        await _api_cek_terkunci(sekarang['tanggal'], True)
+    invalidasi_slip(lama['karyawan_id'])
+    return '', 204
+
+# --- Metrik Prometheus ---
+# Sesi admin atau 'Authorization: Bearer <API_TOKEN>' agar dapat di-scrape oleh Prometheus
+@app.route('/admin/metrics')
+def admin_metrics():
+    if not (is_admin_logged_in() or _api_token_valid()):
+        return 'Autentikasi admin diperlukan.\n', 401, {'Content-Type': 'text/plain; charset=utf-8'}
+    metrik.gauge_atur('slip_gaji_slip_cache_entries', 'Jumlah slip di cache lokal proses ini.',
+                      nilai=len(slip_cache))
+    metrik.gauge_atur('slip_gaji_dashboard_cache_entries', 'Jumlah hasil dashboard di cache lokal proses ini.',
+                      nilai=len(dashboard_cache))
+    response = make_response(metrik.render())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.cache_control.no_store = True
+    return response
+
+
+# --- Perintah CLI Kustom untuk Membuat Indeks ---
+@app.cli.command('ensure-indexes')
+@with_appcontext
+def ensure_indexes_command():
+    """Buat indeks unik untuk koleksi karyawan dan absensi."""
+    db_obj = mongo_manager.get_db()
+    if db_obj is None:
+        click.echo("KESALAHAN: Koneksi MongoDB tidak terjalin.")
+        return
+    try:
+        ensure_indexes(db_obj)
+        click.echo("Indeks berhasil dibuat/diverifikasi:")
+        click.echo("  absensi: karyawan_id_tanggal_unik (karyawan_id, tanggal) unik")
+        click.echo("  karyawan: nama_unik (nama) unik")
+        click.echo("  karyawan: nama_lower_nama (nama_lower, nama)")
+        click.echo("  rekap_gaji: karyawan_id_bulan_unik (karyawan_id, bulan) unik")
+        click.echo("  periode: mulai_selesai_unik (mulai, selesai) unik")
+        click.echo("  absensi_arsip: karyawan_id_bulan_unik (karyawan_id, bulan) unik, bulan, hari_id (hari._id)")
+        click.echo("  admins: username_unik (username) unik")
+    except OperationFailure as e:
+        click.echo(f"KESALAHAN: Gagal membuat indeks: {e}")
+        click.echo("Kemungkinan masih ada data duplikat. Bersihkan duplikat lalu jalankan ulang perintah ini.")
 
 # --- Perintah CLI Kustom untuk Inisialisasi Database ---
 @app.cli.command('init-db')
+@click.option('--admin-username', default='admin', show_default=True, help='Username admin pertama jika belum ada admin.')
+@click.option('--admin-password', default=None, help='Kata sandi admin pertama (ditanyakan jika tidak diberikan).')
 @with_appcontext
-def init_db_command():
+def init_db_command(admin_username, admin_password):
     """Bersihkan data yang ada dan buat koleksi baru, lalu isi dengan data contoh."""
-    # Menggunakan MongoClient secara langsung untuk perintah CLI
-    # Ini akan memastikan koneksi langsung tanpa perantara Flask-PyMongo
+    # Menggunakan connection manager yang sama dengan rute web
+    db_obj = mongo_manager.get_db()
+    if db_obj is None:
+        click.echo("KESALAHAN: Koneksi MongoDB tidak terjalin. Tidak dapat menginisialisasi database.")
+        return
+    click.echo(f"DEBUG: Nama database yang diakses di CLI: {db_obj.name}")
+
     try:
-        # Menggunakan 'with' statement untuk memastikan klien ditutup dengan benar
-        with MongoClient(app.config["MONGO_URI"]) as client:
-            # Coba ping database untuk memastikan koneksi aktif
-            client.admin.command('ping')
-            
-            # Dapatkan objek database yang benar
-            # Karena URI Anda tidak menentukan database, kita secara eksplisit menentukannya di sini.
-            db_obj = client.get_database("slip_gaji_db") # Ganti dengan nama database Anda yang sebenarnya
-            
-            click.echo("DEBUG: Koneksi MongoDB berhasil dibuat dan diuji (melalui MongoClient langsung).")
-            click.echo(f"DEBUG: Nama database yang diakses di CLI: {db_obj.name}")
+        karyawan_collection = db_obj.karyawan
+        absensi_collection = db_obj.absensi
 
-            # Tambahkan debug print untuk melacak nilai db_obj sebelum operasi
-            click.echo(f"DEBUG: db_obj sebelum operasi di init_db_command: {db_obj}")
-            click.echo(f"DEBUG: Tipe db_obj: {type(db_obj)}")
-            click.echo(f"DEBUG: db_obj is None: {db_obj is None}")
+        click.echo('Membersihkan data yang ada...')
+        karyawan_collection.delete_many({})
+        absensi_collection.delete_many({})
+        db_obj.rekap_gaji.delete_many({})
+        db_obj.absensi_arsip.delete_many({})
+        db_obj.periode.delete_many({})
+        invalidasi_slip('*')
+        click.echo('Koleksi dibersihkan.')
 
-            if db_obj is None: # Ini seharusnya tidak terjadi jika ping berhasil
-                click.echo("KESALAHAN: Koneksi MongoDB tidak terjalin. Objek database adalah None.")
-                return
+        ensure_indexes(db_obj)
+        click.echo('Indeks dipastikan.')
 
-            karyawan_collection = db_obj.karyawan
-            absensi_collection = db_obj.absensi
-
-            click.echo('Membersihkan data yang ada...')
-            karyawan_collection.delete_many({})
-            absensi_collection.delete_many({})
-            click.echo('Koleksi dibersihkan.')
-
-            if karyawan_collection.count_documents({}) == 0:
-                click.echo("Menambahkan contoh data ke database...")
-                
-                eka_data = {
-                    'nama': 'Eka Saputra',
-                    'no_rek': '7611053294 BCA a/n Rusdiyana',
-                    'periode': '01-16 Mei 2025'
-                }
-                result_eka = karyawan_collection.insert_one(eka_data)
-                eka_id = result_eka.inserted_id
-
-                absensi_data = [
-                    {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 1), 'status': 'CUTI HARI BURUH', 'gaji_harian': None},
-                    {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 2), 'status': 'Hadir', 'gaji_harian': 70000},
-                    {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 3), 'status': 'Hadir', 'gaji_harian': 70000},
-                    {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 4), 'status': 'OFF', 'gaji_harian': None},
-                    {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 5), 'status': 'Hadir', 'gaji_harian': 70000},
-                    {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 6), 'status': 'Hadir', 'gaji_harian': 70000},
-                    {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 7), 'status': 'Hadir', 'gaji_harian': 70000},
-                    {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 8), 'status': 'Hadir', 'gaji_harian': 70000},
-                    {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 9), 'status': 'Hadir', 'gaji_harian': 70000},
-                    {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 10), 'status': 'OFF', 'gaji_harian': None},
-                    {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 11), 'status': 'OFF', 'gaji_harian': None},
-                    {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 12), 'status': 'CUTI WAISAK', 'gaji_harian': None},
-                    {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 13), 'status': 'CUTI WAISAK', 'gaji_harian': None},
-                    {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 14), 'status': 'Hadir', 'gaji_harian': 70000},
-                    {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 15), 'status': 'Hadir', 'gaji_harian': 70000},
-                ]
-                absensi_collection.insert_many(absensi_data)
-                click.echo("Contoh data berhasil ditambahkan.")
-            else:
-                click.echo("Data karyawan sudah ada, tidak menambahkan contoh data.")
+        # Koleksi admins tidak ikut dibersihkan; admin pertama dibuat jika belum ada admin
+        # sama sekali, dengan kata sandi yang ditanyakan (tidak ada kata sandi bawaan)
+        if not (app.config['ADMIN_USERNAME'] and app.config['ADMIN_PASSWORD_HASH']) \
+                and db_obj.admins.find_one({}, {'_id': 1}) is None:
+            if not admin_password:
+                admin_password = click.prompt(f"Kata sandi untuk admin '{admin_username}'", hide_input=True, confirmation_prompt=True)
+            db_obj.admins.insert_one({
+                'username': admin_username,
+                'password_hash': generate_password_hash(admin_password),
+                'dibuat': datetime.datetime.utcnow(),
+            })
+            click.echo(f"Admin '{admin_username}' ditambahkan.")
+
+        if karyawan_collection.count_documents({}) == 0:
+            click.echo("Menambahkan contoh data ke database...")
+            
+            eka_data = {
+                'nama': 'Eka Saputra',
+                'nama_lower': nama_lower('Eka Saputra'),
+                'no_rek': '7611053294 BCA a/n Rusdiyana',
+                'periode': '01-16 Mei 2025'
+            }
+            result_eka = karyawan_collection.insert_one(eka_data)
+            eka_id = result_eka.inserted_id
+
+            absensi_data = [
+                {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 1), 'status': 'CUTI HARI BURUH', 'gaji_harian': None},
+                {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 2), 'status': 'Hadir', 'gaji_harian': 70000},
+                {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 3), 'status': 'Hadir', 'gaji_harian': 70000},
+                {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 4), 'status': 'OFF', 'gaji_harian': None},
+                {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 5), 'status': 'Hadir', 'gaji_harian': 70000},
+                {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 6), 'status': 'Hadir', 'gaji_harian': 70000},
+                {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 7), 'status': 'Hadir', 'gaji_harian': 70000},
+                {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 8), 'status': 'Hadir', 'gaji_harian': 70000},
+                {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 9), 'status': 'Hadir', 'gaji_harian': 70000},
+                {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 10), 'status': 'OFF', 'gaji_harian': None},
+                {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 11), 'status': 'OFF', 'gaji_harian': None},
+                {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 12), 'status': 'CUTI WAISAK', 'gaji_harian': None},
+                {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 13), 'status': 'CUTI WAISAK', 'gaji_harian': None},
+                {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 14), 'status': 'Hadir', 'gaji_harian': 70000},
+                {'karyawan_id': eka_id, 'tanggal': datetime.datetime(2025, 5, 15), 'status': 'Hadir', 'gaji_harian': 70000},
+            ]
+            absensi_collection.insert_many(absensi_data)
+            hitung_ulang_rekap(db_obj, {(eka_id, item['tanggal']) for item in absensi_data})
+            mulai, selesai = parse_periode_teks(eka_data['periode'])
+            db_obj.periode.update_one(
+                {'mulai': mulai, 'selesai': selesai},
+                {'$setOnInsert': {'nama': eka_data['periode'], 'ditutup': False, 'dibuat': datetime.datetime.utcnow()}},
+                upsert=True
+            )
+            click.echo("Contoh data berhasil ditambahkan.")
+        else:
+            click.echo("Data karyawan sudah ada, tidak menambahkan contoh data.")
 
     except Exception as e:
         click.echo(f"KESALAHAN: Terjadi kesalahan fatal saat inisialisasi atau operasi database: {e}")
-        click.echo("Koneksi MongoDB tidak terjalin. Tidak dapat menginisialisasi database.")
         return
+
+# --- Perintah CLI Kustom untuk Admin ---
+@app.cli.command('create-admin')
+@click.argument('username')
+@click.password_option('--password', help='Kata sandi admin (ditanyakan jika tidak diberikan).')
+@click.option('--hash-only', is_flag=True, help='Hanya cetak hash untuk ADMIN_PASSWORD_HASH tanpa menyimpan ke database.')
+@with_appcontext
+def create_admin_command(username, password, hash_only):
+    """Buat admin baru atau ganti kata sandi admin yang sudah ada."""
+    password_hash = generate_password_hash(password)
+    if hash_only:
+        click.echo(password_hash)
+        return
+    db_obj = mongo_manager.get_db()
+    if db_obj is None:
+        click.echo("KESALAHAN: Koneksi MongoDB tidak terjalin.")
+        return
+    sekarang = datetime.datetime.utcnow()
+    result = db_obj.admins.update_one(
+        {'username': username},
+        {'$set': {'password_hash': password_hash, 'diperbarui': sekarang},
+         '$setOnInsert': {'dibuat': sekarang}},
+        upsert=True
+    )
+    if result.upserted_id is not None:
+        click.echo(f"Admin '{username}' berhasil dibuat.")
+    else:
+        click.echo(f"Kata sandi admin '{username}' berhasil diperbarui.")
+
+# --- Perintah CLI Kustom untuk Migrasi Periode ---
+@app.cli.command('migrate-periode')
+@click.option('--dry-run', is_flag=True, help='Hanya tampilkan hasil parsing tanpa menulis ke database.')
+@with_appcontext
+def migrate_periode_command(dry_run):
+    """Buat dokumen 'periode' dari teks karyawan.periode yang sudah ada."""
+    db_obj = mongo_manager.get_db()
+    if db_obj is None:
+        click.echo("KESALAHAN: Koneksi MongoDB tidak terjalin.")
+        return
+
+    # Teks periode biasanya sama untuk banyak karyawan, jadi cukup parse nilai yang berbeda saja
+    rentang_per_teks = {}
+    gagal = []
+    for teks in db_obj.karyawan.distinct('periode'):
+        if not isinstance(teks, str) or not teks.strip():
+            continue
+        try:
+            rentang_per_teks[teks] = parse_periode_teks(teks)
+        except ValueError as e:
+            gagal.append((teks, e))
+
+    for teks, (mulai, selesai) in sorted(rentang_per_teks.items(), key=lambda item: item[1]):
+        click.echo(f"  {teks!r}: {mulai:%Y-%m-%d} s/d {selesai:%Y-%m-%d}")
+    for teks, e in gagal:
+        click.echo(f"  GAGAL {teks!r}: {e}")
+    if dry_run or not rentang_per_teks:
+        click.echo(f"{len(rentang_per_teks)} teks periode dikenali, {len(gagal)} gagal. Tidak ada yang ditulis.")
+        return
+
+    # Teks berbeda dengan rentang sama ('01-16 Mei 2025' dan '1-16 mei 2025') menjadi satu periode
+    sekarang = datetime.datetime.utcnow()
+    ops = {}
+    for teks, (mulai, selesai) in rentang_per_teks.items():
+        ops.setdefault((mulai, selesai), UpdateOne(
+            {'mulai': mulai, 'selesai': selesai},
+            {'$setOnInsert': {'nama': teks.strip(), 'ditutup': False, 'dibuat': sekarang}},
+            upsert=True
+        ))
+    result = db_obj.periode.bulk_write(list(ops.values()), ordered=False)
+    invalidasi_slip('*')
+    click.echo(f"{result.upserted_count} periode baru dibuat, {len(ops) - result.upserted_count} sudah ada, "
+               f"{len(gagal)} teks gagal diparse.")
+
+# --- Perintah CLI Kustom untuk Migrasi nama_lower ---
+@app.cli.command('migrate-nama-lower')
+@click.option('--batch-size', default=1000, show_default=True, help='Jumlah karyawan per bulk_write.')
+@with_appcontext
+def migrate_nama_lower_command(batch_size):
+    """Isi 'nama_lower' untuk karyawan lama agar muncul di pencarian nama."""
+    db_obj = mongo_manager.get_db()
+    if db_obj is None:
+        click.echo("KESALAHAN: Koneksi MongoDB tidak terjalin.")
+        return
+
+    # Nama yang diubah di luar aplikasi juga diperbaiki, bukan hanya yang belum punya nama_lower
+    ops = (
+        UpdateOne({'_id': doc['_id']}, {'$set': {'nama_lower': nama_lower(doc['nama'])}})
+        for doc in db_obj.karyawan.find({}, {'nama': 1, 'nama_lower': 1})
+        if isinstance(doc.get('nama'), str) and doc.get('nama_lower') != nama_lower(doc['nama'])
+    )
+    jumlah = 0
+    for chunk in _potong(ops, batch_size):
+        db_obj.karyawan.bulk_write(chunk, ordered=False)
+        jumlah += len(chunk)
+    click.echo(f"nama_lower diisi untuk {jumlah} karyawan.")
+
+# --- Perintah CLI Kustom untuk Import Absensi ---
+@app.cli.command('import-absensi')
+@click.argument('file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=IMPORT_BATCH_SIZE, show_default=True, help='Jumlah baris per bulk_write.')
+@with_appcontext
+def import_absensi_command(file, batch_size):
+    """Import absensi massal dari file CSV/XLSX (upsert per karyawan dan tanggal)."""
+    db_obj = mongo_manager.get_db()
+    if db_obj is None:
+        click.echo("KESALAHAN: Koneksi MongoDB tidak terjalin.")
+        return
+    try:
+        with open(file, 'rb') as stream:
+            hasil = import_absensi(db_obj, baca_file_absensi(stream, file), batch_size=batch_size)
+    except ValueError as e:
+        click.echo(f"KESALAHAN: {e}")
+        return
+    click.echo(f"Ditambahkan: {hasil['inserted']}")
+    click.echo(f"Diperbarui: {hasil['updated']}")
+    click.echo(f"Ditolak: {hasil['rejected']}")
+    for pesan in hasil['errors']:
+        click.echo(f"  - {pesan}")
+    if hasil['rejected'] > len(hasil['errors']):
+        click.echo(f"  ... dan {hasil['rejected'] - len(hasil['errors'])} error lainnya")
+
+# --- Perintah CLI Kustom untuk Cetak Slip Massal ---
+@app.cli.command('generate-slips')
+@click.option('--from', 'tanggal_dari', required=True, help='Tanggal awal periode (YYYY-MM-DD).')
+@click.option('--to', 'tanggal_sampai', required=True, help='Tanggal akhir periode (YYYY-MM-DD).')
+@click.option('--output', '-o', default=None, help='File ZIP tujuan (default: slip_gaji_<dari>_<sampai>.zip).')
+@click.option('--workers', default=None, type=int, help='Jumlah proses render (default: SLIP_WORKERS).')
+@click.option('--pdf/--no-pdf', default=True, show_default=True, help='Sertakan PDF jika weasyprint tersedia.')
+@with_appcontext
+def generate_slips_command(tanggal_dari, tanggal_sampai, output, workers, pdf):
+    """Buat slip gaji semua karyawan untuk satu periode ke dalam satu file ZIP."""
+    try:
+        start = parse_tanggal_param(tanggal_dari)
+        end = parse_tanggal_param(tanggal_sampai)
+    except ValueError:
+        click.echo("KESALAHAN: Format tanggal harus YYYY-MM-DD.")
+        return
+    if start > end:
+        click.echo("KESALAHAN: Tanggal awal tidak boleh setelah tanggal akhir.")
+        return
+
+    db_obj = mongo_manager.get_db()
+    if db_obj is None:
+        click.echo("KESALAHAN: Koneksi MongoDB tidak terjalin.")
+        return
+
+    if pdf and not pdf_tersedia():
+        click.echo("PERINGATAN: Paket 'weasyprint' tidak terpasang; hanya HTML yang dibuat.")
+        pdf = False
+    workers = workers or app.config['SLIP_WORKERS']
+    output = output or f"slip_gaji_{start.strftime('%Y%m%d')}_{end.strftime('%Y%m%d')}.zip"
+
+    mulai = time.perf_counter()
+    with open(output, 'wb') as fileobj:
+        jumlah = tulis_zip_slip(db_obj, start, end, fileobj, workers, pdf)
+    click.echo(f"{jumlah} slip ditulis ke {output} dalam {time.perf_counter() - mulai:.2f} detik ({workers} proses).")
+
+# --- Perintah CLI Kustom untuk Export Absensi ---
+@app.cli.command('export-absensi')
+@click.option('--from', 'tanggal_dari', required=True, help='Tanggal awal periode (YYYY-MM-DD).')
+@click.option('--to', 'tanggal_sampai', required=True, help='Tanggal akhir periode (YYYY-MM-DD).')
+@click.option('--format', 'fmt', type=click.Choice(EXPORT_FORMATS), default='csv', show_default=True)
+@click.option('--output', '-o', default=None, help='File tujuan (default: absensi_<dari>_<sampai>.<format>).')
+@click.option('--batch-size', default=EXPORT_BATCH_SIZE, show_default=True, help='Jumlah dokumen per batch cursor.')
+@with_appcontext
+def export_absensi_command(tanggal_dari, tanggal_sampai, fmt, output, batch_size):
+    """Export semua absensi dan total gaji satu periode ke CSV/XLSX."""
+    try:
+        start = parse_tanggal_param(tanggal_dari)
+        end = parse_tanggal_param(tanggal_sampai)
+    except ValueError:
+        click.echo("KESALAHAN: Format tanggal harus YYYY-MM-DD.")
+        return
+    if start > end:
+        click.echo("KESALAHAN: Tanggal awal tidak boleh setelah tanggal akhir.")
+        return
+
+    db_obj = mongo_manager.get_db()
+    if db_obj is None:
+        click.echo("KESALAHAN: Koneksi MongoDB tidak terjalin.")
+        return
+
+    output = output or _nama_file_export(start, end, fmt)
+    mulai = time.perf_counter()
+    ukuran = 0
+    with open(output, 'wb') as fileobj:
+        for potongan in export_absensi(db_obj, start, end, fmt, batch_size):
+            fileobj.write(potongan)
+            ukuran += len(potongan)
+    click.echo(f"Export ditulis ke {output} ({ukuran / 1024:.1f} KB) dalam {time.perf_counter() - mulai:.2f} detik.")
+
+# --- Perintah CLI Kustom untuk Rekap Gaji ---
+@app.cli.command('rebuild-rekap')
+@click.option('--check', is_flag=True, help='Hanya periksa drift tanpa menulis perubahan.')
+@with_appcontext
+def rebuild_rekap_command(check):
+    """Hitung ulang koleksi rekap_gaji dari absensi dan laporkan drift."""
+    db_obj = mongo_manager.get_db()
+    if db_obj is None:
+        click.echo("KESALAHAN: Koneksi MongoDB tidak terjalin.")
+        return
+    stats = bangun_ulang_rekap(db_obj, tulis=not check)
+    click.echo(f"Rekap dihitung dari absensi: {stats['dihitung']}")
+    click.echo(f"Cocok: {stats['cocok']}")
+    click.echo(f"Berbeda: {stats['berbeda']}")
+    click.echo(f"Hilang: {stats['hilang']}")
+    click.echo(f"Usang: {stats['usang']}")
+    drift = stats['berbeda'] + stats['hilang'] + stats['usang']
+    if check:
+        click.echo("Tidak ada drift." if drift == 0 else f"Ditemukan {drift} dokumen rekap yang drift (jalankan tanpa --check untuk memperbaiki).")
+    else:
+        click.echo(f"{drift} dokumen rekap diperbaiki.")
+
+# --- Perintah CLI Kustom untuk Arsip Absensi ---
+@app.cli.command('archive-period')
+@click.argument('periode', required=False)
+@click.option('--all', 'semua', is_flag=True, help='Arsipkan semua periode yang ditutup.')
+@click.option('--batch-size', default=ARSIP_BATCH_SIZE, show_default=True, type=int, help='Jumlah absensi per batch.')
+@with_appcontext
+def archive_period_command(periode, semua, batch_size):
+    """Pindahkan absensi periode yang ditutup (ObjectId atau nama) ke absensi_arsip."""
+    db_obj = mongo_manager.get_db()
+    if db_obj is None:
+        click.echo("KESALAHAN: Koneksi MongoDB tidak terjalin.")
+        return
+    if semua:
+        daftar = list(db_obj.periode.find({'ditutup': True}).sort('mulai', ASCENDING))
+    elif periode:
+        ditemukan = cari_periode(db_obj, periode)
+        if ditemukan is None:
+            click.echo(f"KESALAHAN: Periode {periode!r} tidak ditemukan.")
+            return
+        if not ditemukan.get('ditutup'):
+            click.echo(f'KESALAHAN: Periode "{ditemukan["nama"]}" belum ditutup; tutup dulu sebelum diarsipkan.')
+            return
+        daftar = [ditemukan]
+    else:
+        click.echo("KESALAHAN: Sebutkan PERIODE atau gunakan --all.")
+        return
+    for p in daftar:
+        stats = arsipkan_periode(db_obj, p, batch_size=batch_size)
+        click.echo(
+            f'Periode "{p["nama"]}": {stats["diarsipkan"]} hari diarsipkan ke {stats["dokumen"]} dokumen, '
+            f'{stats["dilewati"]} sudah ada di arsip.'
+        )
+
+@app.cli.command('reopen-period')
+@click.argument('periode')
+@with_appcontext
+def reopen_period_command(periode):
+    """Buka kembali periode (ObjectId atau nama) dan kembalikan absensinya dari arsip."""
+    db_obj = mongo_manager.get_db()
+    if db_obj is None:
+        click.echo("KESALAHAN: Koneksi MongoDB tidak terjalin.")
+        return
+    ditemukan = cari_periode(db_obj, periode)
+    if ditemukan is None:
+        click.echo(f"KESALAHAN: Periode {periode!r} tidak ditemukan.")
+        return
+    dikembalikan = buka_kembali_periode(db_obj, ditemukan)
+    click.echo(f'Periode "{ditemukan["nama"]}" dibuka kembali; {dikembalikan} hari dikembalikan ke absensi.')
+
+# --- Perintah CLI Kustom untuk Data Benchmark ---
+NAMA_DEPAN_BENCH = ['Agus', 'Budi', 'Citra', 'Dewi', 'Eka', 'Fajar', 'Gita', 'Hadi', 'Indah', 'Joko',
+                    'Kartika', 'Lestari', 'Made', 'Nur', 'Putri', 'Rudi', 'Sari', 'Teguh', 'Wati', 'Yoga']
+NAMA_BELAKANG_BENCH = ['Saputra', 'Wijaya', 'Santoso', 'Pratama', 'Lestari', 'Hidayat', 'Kusuma',
+                       'Nugroho', 'Permata', 'Siregar', 'Situmorang', 'Wibowo', 'Rahmawati', 'Setiawan']
+BANK_BENCH = ['BCA', 'BRI', 'BNI', 'Mandiri']
+GAJI_HARIAN_BENCH = [60000, 65000, 70000, 75000, 80000]
+
+# Status satu hari kerja sintetis: Minggu OFF, sisanya sebagian besar Hadir
+def _status_bench(rng, tanggal):
+    if tanggal.weekday() == 6:
+        return 'OFF'
+    r = rng.random()
+    if r < 0.88:
+        return 'Hadir'
+    if r < 0.93:
+        return 'OFF'
+    if r < 0.96:
+        return rng.choice(['CUTI HARI BURUH', 'CUTI WAISAK'])
+    return rng.choice(['Sakit', 'Izin'])
+
+# Koleksi yang di-drop sebelum seed ulang. Periode dan arsipnya ikut dibuang: periode
+# ditutup dari run sebelumnya akan mengunci dan mengarsipkan tanggal data baru.
+KOLEKSI_SEED_BENCH = ('karyawan', 'absensi', 'rekap_gaji', 'absensi_arsip', 'periode')
+
+# Isi database dengan karyawan dan absensi sintetis memakai insert_many per batch.
+# Dokumen dibuat lewat generator sehingga memori tetap konstan berapa pun jumlahnya.
+def seed_data_bench(db_obj, employees, days, start, batch_size=10000, seed=42):
+    rng = random.Random(seed)
+    karyawan_docs = []
+    for i in range(employees):
+        nama = f"{rng.choice(NAMA_DEPAN_BENCH)} {rng.choice(NAMA_BELAKANG_BENCH)} {i + 1:06d}"
+        karyawan_docs.append({
+            '_id': ObjectId(),
+            'nama': nama,
+            'nama_lower': nama_lower(nama),
+            'no_rek': f"{rng.randrange(10**9, 10**10)} {rng.choice(BANK_BENCH)}",
+            'periode': f"{start.strftime('%d %b %Y')} - {(start + datetime.timedelta(days=days - 1)).strftime('%d %b %Y')}",
+        })
+    for chunk in _potong(karyawan_docs, batch_size):
+        db_obj.karyawan.insert_many(chunk, ordered=False)
+
+    def absensi_docs():
+        for karyawan in karyawan_docs:
+            gaji = rng.choice(GAJI_HARIAN_BENCH)
+            for d in range(days):
+                tanggal = start + datetime.timedelta(days=d)
+                status = _status_bench(rng, tanggal)
+                yield {
+                    'karyawan_id': karyawan['_id'],
+                    'tanggal': tanggal,
+                    'status': status,
+                    'gaji_harian': gaji if status == 'Hadir' else None,
+                }
+
+    jumlah_absensi = 0
+    for chunk in _potong(absensi_docs(), batch_size):
+        db_obj.absensi.insert_many(chunk, ordered=False)
+        jumlah_absensi += len(chunk)
+    return len(karyawan_docs), jumlah_absensi
+
+@app.cli.command('seed-bench')
+@click.option('--employees', default=200, show_default=True, help='Jumlah karyawan sintetis.')
+@click.option('--days', default=31, show_default=True, help='Jumlah hari absensi per karyawan.')
+@click.option('--start-date', default='2025-01-01', show_default=True, help='Tanggal absensi pertama (YYYY-MM-DD).')
+@click.option('--batch-size', default=10000, show_default=True, help='Jumlah dokumen per insert_many.')
+@click.option('--seed', default=42, show_default=True, help='Seed random agar data dapat direproduksi.')
+@click.option('--drop', is_flag=True, help='Drop koleksi karyawan/absensi/rekap_gaji/absensi_arsip/periode terlebih dahulu.')
+@with_appcontext
+def seed_bench_command(employees, days, start_date, batch_size, seed, drop):
+    """Isi database dengan data sintetis berskala besar untuk benchmark."""
+    try:
+        start = parse_tanggal_param(start_date)
+    except ValueError:
+        click.echo("KESALAHAN: Format --start-date harus YYYY-MM-DD.")
+        return
+    db_obj = mongo_manager.get_db()
+    if db_obj is None:
+        click.echo("KESALAHAN: Koneksi MongoDB tidak terjalin.")
+        return
+
+    if drop:
+        # drop() jauh lebih murah daripada delete_many({}) untuk koleksi besar
+        for nama in KOLEKSI_SEED_BENCH:
+            db_obj.drop_collection(nama)
+        periode_ditutup.invalidate()
+        invalidasi_slip('*')
+        click.echo(f"Koleksi {', '.join(KOLEKSI_SEED_BENCH)} di-drop.")
+    ensure_indexes(db_obj)
+
+    mulai = time.perf_counter()
+    try:
+        jumlah_karyawan, jumlah_absensi = seed_data_bench(db_obj, employees, days, start, batch_size, seed)
+    except BulkWriteError as e:
+        click.echo(f"KESALAHAN: Gagal menulis data (nama/tanggal bentrok? coba --drop): {e.details.get('writeErrors', [])[:1]}")
+        return
+    durasi = time.perf_counter() - mulai
+    click.echo(f"{jumlah_karyawan} karyawan dan {jumlah_absensi} absensi ditulis dalam {durasi:.2f} detik "
+               f"({jumlah_absensi / max(durasi, 1e-9):,.0f} dokumen/detik).")
+
+    stats = bangun_ulang_rekap(db_obj)
+    invalidasi_slip('*')
+    click.echo(f"Rekap gaji dibangun ulang: {stats['dihitung']} dokumen.")
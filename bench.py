@@ -0,0 +1,336 @@
+"""Benchmark rute utama aplikasi slip gaji melalui Flask test client.
+
+Contoh:
+    # Terhadap MongoDB lokal (isi data dulu dengan: flask seed-bench --employees 500 --days 90 --drop)
+    python bench.py --requests 200 --output hasil.json
+
+    # Tanpa server MongoDB, memakai mongomock sebagai pengganti in-memory
+    python bench.py --mongomock --employees 200 --days 62 --output hasil.json
+
+    # Bandingkan dengan hasil sebelumnya; exit code 1 jika p95 memburuk melebihi ambang
+    python bench.py --mongomock --compare baseline.json --threshold 0.25
+
+    # Anggaran cold start: waktu import app.py dan latensi request pertama di proses baru
+    python bench.py --mongomock --cold-start 5 --import-budget-ms 600 --first-request-budget-ms 300
+
+Untuk setiap skenario dilaporkan latensi p50/p95/p99, throughput, dan rata-rata
+jumlah perintah MongoDB (round trip) per request. Round trip dihitung dengan
+pymongo.monitoring sehingga tidak tersedia saat memakai mongomock.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from pymongo import monitoring
+
+# SECRET_KEY wajib ada saat app diimport; nilai ini hanya untuk benchmark
+os.environ.setdefault('SECRET_KEY', 'bench-secret-key')
+
+
+class PenghitungPerintah(monitoring.CommandListener):
+    """Menghitung perintah MongoDB yang dikirim (satu perintah = satu round trip)."""
+
+    def __init__(self):
+        self.jumlah = 0
+        self.aktif = True
+
+    def started(self, event):
+        self.jumlah += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# Dijalankan di proses Python baru untuk setiap pengukuran cold start.
+# mongomock baru diimport setelah app agar modul pymongo tidak ikut ter-import lebih dulu.
+SKRIP_COLD_START = """
+import json, os, sys, time
+mulai = time.perf_counter()
+import app as appmod
+import_ms = (time.perf_counter() - mulai) * 1000
+if os.environ.get('BENCH_MONGOMOCK'):
+    import mongomock
+    klien = mongomock.MongoClient()
+    # Satu karyawan agar halaman slip benar-benar dirender, bukan dialihkan karena data kosong
+    klien.slip_gaji_db.karyawan.insert_one({'nama': 'Cold Start', 'nama_lower': 'cold start', 'no_rek': '-', 'periode': ''})
+    appmod.mongo_manager.client_factory = lambda *a, **k: klien
+client = appmod.app.test_client()
+mulai = time.perf_counter()
+response = client.get(sys.argv[1])
+request_ms = (time.perf_counter() - mulai) * 1000
+print(json.dumps({'import_ms': import_ms, 'first_request_ms': request_ms, 'status': response.status_code,
+                  'db_terhubung': appmod.mongo_manager._client is not None}))
+"""
+
+
+def ukur_cold_start(args):
+    env = dict(os.environ)
+    if args.mongomock:
+        env['BENCH_MONGOMOCK'] = '1'
+    folder = os.path.dirname(os.path.abspath(__file__))
+    hasil = []
+    for _ in range(args.cold_start):
+        keluaran = subprocess.run(
+            [sys.executable, '-c', SKRIP_COLD_START, args.cold_start_path],
+            cwd=folder, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        data = json.loads(keluaran.strip().splitlines()[-1])
+        if data['status'] >= 400:
+            raise RuntimeError(f"cold start: status {data['status']}")
+        hasil.append(data)
+    import_ms = [d['import_ms'] for d in hasil]
+    request_ms = [d['first_request_ms'] for d in hasil]
+    return {
+        'runs': len(hasil),
+        'path': args.cold_start_path,
+        'db_terhubung': all(d['db_terhubung'] for d in hasil),
+        'import_ms_p50': persentil(import_ms, 50),
+        'import_ms_max': max(import_ms),
+        'first_request_ms_p50': persentil(request_ms, 50),
+        'first_request_ms_max': max(request_ms),
+    }
+
+
+def persentil(data, p):
+    if not data:
+        return None
+    data = sorted(data)
+    k = (len(data) - 1) * p / 100.0
+    f = int(k)
+    c = min(f + 1, len(data) - 1)
+    return data[f] + (data[c] - data[f]) * (k - f)
+
+
+def jalankan_skenario(nama, fungsi, jumlah, warmup, penghitung):
+    for i in range(warmup):
+        fungsi(i)
+    latensi = []
+    round_trips = []
+    mulai_total = time.perf_counter()
+    for i in range(jumlah):
+        sebelum = penghitung.jumlah
+        mulai = time.perf_counter()
+        response = fungsi(warmup + i)
+        latensi.append((time.perf_counter() - mulai) * 1000)
+        round_trips.append(penghitung.jumlah - sebelum)
+        if response.status_code >= 500:
+            raise RuntimeError(f'{nama}: status {response.status_code}')
+    durasi = time.perf_counter() - mulai_total
+    return {
+        'requests': jumlah,
+        'p50_ms': persentil(latensi, 50),
+        'p95_ms': persentil(latensi, 95),
+        'p99_ms': persentil(latensi, 99),
+        'mean_ms': statistics.fmean(latensi) if latensi else None,
+        'throughput_rps': jumlah / durasi if durasi else None,
+        'db_round_trips_per_request': statistics.fmean(round_trips) if penghitung.aktif else None,
+    }
+
+
+def siapkan_app(args):
+    penghitung = PenghitungPerintah()
+    # Listener global harus terdaftar sebelum MongoClient dibuat
+    monitoring.register(penghitung)
+    import app as appmod
+
+    penghitung.aktif = not args.mongomock
+    if args.mongomock:
+        import mongomock
+        klien = mongomock.MongoClient()
+        appmod.mongo_manager.client_factory = lambda *a, **k: klien
+
+    db_obj = appmod.mongo_manager.get_db()
+    if db_obj is None:
+        sys.exit('KESALAHAN: MongoDB tidak dapat dijangkau. Gunakan --mongomock atau atur MONGO_URI.')
+
+    if args.mongomock or args.seed:
+        for nama in appmod.KOLEKSI_SEED_BENCH:
+            db_obj.drop_collection(nama)
+        appmod.periode_ditutup.invalidate()
+        appmod.ensure_indexes(db_obj)
+        start = datetime.datetime(2025, 1, 1)
+        appmod.seed_data_bench(db_obj, args.employees, args.days, start)
+        appmod.bangun_ulang_rekap(db_obj)
+        # Admin dengan kata sandi yang diketahui agar skenario login mengukur verifikasi hash
+        db_obj.admins.replace_one(
+            {'username': args.admin_user},
+            {'username': args.admin_user, 'password_hash': appmod.generate_password_hash(args.admin_password),
+             'dibuat': datetime.datetime.utcnow()},
+            upsert=True
+        )
+    return appmod, db_obj, penghitung
+
+
+def buat_skenario(appmod, db_obj, args):
+    rng = random.Random(args.random_seed)
+    karyawan_ids = [str(doc['_id']) for doc in db_obj.karyawan.find({}, {'_id': 1}).limit(5000)]
+    # Target edit dipilih sebelum pengukuran agar request terukur tidak ikut membaca database
+    absensi_target = [(str(doc['_id']), doc['tanggal'].strftime('%Y-%m-%d'))
+                      for doc in db_obj.absensi.find({}, {'tanggal': 1}).limit(5000)]
+    if not karyawan_ids or not absensi_target:
+        sys.exit('KESALAHAN: Database kosong. Jalankan dengan --seed atau flask seed-bench terlebih dahulu.')
+    awal = db_obj.absensi.find_one({}, sort=[('tanggal', 1)])['tanggal']
+    akhir = db_obj.absensi.find_one({}, sort=[('tanggal', -1)])['tanggal']
+
+    app = appmod.app
+    anonim = app.test_client()
+    admin = app.test_client()
+    with admin.session_transaction() as sess:
+        sess['admin_logged_in'] = True
+
+    def slip_gaji(i):
+        # Rentang satu bulan acak di dalam data, tanpa cache
+        bulan = awal + datetime.timedelta(days=rng.randrange(max((akhir - awal).days, 1)))
+        start = bulan.replace(day=1)
+        end = (start + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+        return anonim.get(f"/slip_gaji/{rng.choice(karyawan_ids)}?start={start:%Y-%m-%d}&end={end:%Y-%m-%d}")
+
+    cached_ids = karyawan_ids[:10]
+
+    def slip_gaji_cache(i):
+        return anonim.get(f"/slip_gaji/{cached_ids[i % len(cached_ids)]}")
+
+    def add_absensi(i):
+        # Tanggal setelah data seed agar setiap request benar-benar menyisipkan absensi baru
+        karyawan_id = karyawan_ids[i % len(karyawan_ids)]
+        tanggal = akhir + datetime.timedelta(days=1 + i // len(karyawan_ids))
+        return admin.post(f'/add_absensi/{karyawan_id}', data={
+            'tanggal': tanggal.strftime('%Y-%m-%d'), 'status': 'Hadir', 'gaji_harian': '70000'
+        })
+
+    def edit_absensi(i):
+        absensi_id, tanggal = rng.choice(absensi_target)
+        return admin.post(f"/edit_absensi/{absensi_id}", data={
+            'tanggal': tanggal,
+            'status': rng.choice(['Hadir', 'OFF', 'Izin']),
+            'gaji_harian': '70000',
+        })
+
+    def login(i):
+        response = app.test_client().post('/admin/login', data={
+            'username': args.admin_user, 'password': args.admin_password
+        })
+        # Login gagal hanya mengukur penolakan cepat tanpa verifikasi hash
+        if response.status_code != 302:
+            raise RuntimeError(f'login: gagal masuk sebagai {args.admin_user!r}; periksa --admin-user/--admin-password')
+        return response
+
+    return {
+        'slip_gaji': (slip_gaji, lambda: setattr(appmod.slip_cache, 'max_entries', 0)),
+        'slip_gaji_cache': (slip_gaji_cache, lambda: setattr(appmod.slip_cache, 'max_entries', args.cache_entries)),
+        'add_absensi': (add_absensi, None),
+        'edit_absensi': (edit_absensi, None),
+        'login': (login, None),
+    }
+
+
+def bandingkan(hasil, baseline, ambang):
+    regresi = []
+    for nama, data in hasil['scenarios'].items():
+        lama = baseline.get('scenarios', {}).get(nama)
+        if not lama or not lama.get('p95_ms') or not data.get('p95_ms'):
+            continue
+        rasio = data['p95_ms'] / lama['p95_ms'] - 1
+        tanda = 'REGRESI' if rasio > ambang else 'ok'
+        print(f"  {nama:<16} p95 {lama['p95_ms']:8.2f} -> {data['p95_ms']:8.2f} ms ({rasio:+.1%}) {tanda}")
+        if rasio > ambang:
+            regresi.append(nama)
+    return regresi
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongomock', action='store_true', help='Pakai mongomock (in-memory) sebagai pengganti MongoDB.')
+    parser.add_argument('--seed', action='store_true', help='Drop dan isi ulang database target sebelum benchmark.')
+    parser.add_argument('--employees', type=int, default=200)
+    parser.add_argument('--days', type=int, default=62)
+    parser.add_argument('--requests', type=int, default=200, help='Jumlah request terukur per skenario.')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--scenario', action='append', help='Jalankan skenario tertentu saja (boleh berulang).')
+    parser.add_argument('--cache-entries', type=int, default=512)
+    parser.add_argument('--admin-user', default=os.environ.get('BENCH_ADMIN_USER', 'admin'))
+    parser.add_argument('--admin-password', default=os.environ.get('BENCH_ADMIN_PASSWORD', 'bench-password'),
+                        help='Kata sandi admin untuk skenario login; dengan --mongomock/--seed admin ini dibuat.')
+    parser.add_argument('--random-seed', type=int, default=1)
+    parser.add_argument('--output', help='Simpan hasil sebagai JSON.')
+    parser.add_argument('--compare', help='File JSON hasil sebelumnya sebagai pembanding.')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Ambang regresi p95 relatif (0.2 = 20%%).')
+    parser.add_argument('--cold-start', type=int, default=0, metavar='N',
+                        help='Ukur cold start sebanyak N proses baru (tanpa menjalankan skenario).')
+    parser.add_argument('--cold-start-path', default='/',
+                        help='Path request pertama saat cold start (sebaiknya membaca database).')
+    parser.add_argument('--import-budget-ms', type=float, help='Batas median waktu import app.py.')
+    parser.add_argument('--first-request-budget-ms', type=float, help='Batas median latensi request pertama.')
+    args = parser.parse_args()
+
+    if args.cold_start:
+        data = ukur_cold_start(args)
+        print(f"Cold start ({data['runs']}x, {data['path']}, {'mongomock' if args.mongomock else 'mongodb'}):")
+        print(f"  import        p50 {data['import_ms_p50']:8.1f} ms  max {data['import_ms_max']:8.1f} ms")
+        print(f"  request awal  p50 {data['first_request_ms_p50']:8.1f} ms  max {data['first_request_ms_max']:8.1f} ms")
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump({'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                           'python': platform.python_version(), 'cold_start': data}, f, indent=2)
+            print(f"Hasil disimpan ke {args.output}")
+        lewat = []
+        if args.import_budget_ms is not None and data['import_ms_p50'] > args.import_budget_ms:
+            lewat.append(f"import {data['import_ms_p50']:.1f} ms > {args.import_budget_ms:.1f} ms")
+        if args.first_request_budget_ms is not None and data['first_request_ms_p50'] > args.first_request_budget_ms:
+            lewat.append(f"request awal {data['first_request_ms_p50']:.1f} ms > {args.first_request_budget_ms:.1f} ms")
+        for pesan in lewat:
+            print(f"MELEBIHI ANGGARAN: {pesan}")
+        sys.exit(1 if lewat else 0)
+
+    appmod, db_obj, penghitung = siapkan_app(args)
+    skenario = buat_skenario(appmod, db_obj, args)
+    dipilih = args.scenario or list(skenario)
+
+    hasil = {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'backend': 'mongomock' if args.mongomock else 'mongodb',
+        'dataset': {
+            'karyawan': db_obj.karyawan.estimated_document_count(),
+            'absensi': db_obj.absensi.estimated_document_count(),
+        },
+        'requests': args.requests,
+        'scenarios': {},
+    }
+    print(f"Dataset: {hasil['dataset']['karyawan']} karyawan, {hasil['dataset']['absensi']} absensi ({hasil['backend']})")
+    print(f"{'skenario':<16} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>9} {'rt/req':>7}")
+    for nama in dipilih:
+        fungsi, persiapan = skenario[nama]
+        if persiapan:
+            persiapan()
+        data = jalankan_skenario(nama, fungsi, args.requests, args.warmup, penghitung)
+        hasil['scenarios'][nama] = data
+        rt = data['db_round_trips_per_request']
+        print(f"{nama:<16} {data['p50_ms']:8.2f} {data['p95_ms']:8.2f} {data['p99_ms']:8.2f} "
+              f"{data['throughput_rps']:9.1f} {'-' if rt is None else f'{rt:7.2f}'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(hasil, f, indent=2)
+        print(f"Hasil disimpan ke {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Perbandingan dengan {args.compare}:")
+        if bandingkan(hasil, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import mongomock
+import mongomock_motor
+import pytest
+
+os.environ.setdefault('SECRET_KEY', 'test')
+os.environ.setdefault('MONGO_AUTO_INDEXES', 'sync')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+
+
+@pytest.fixture
+def mongo():
+    """Database mongomock baru untuk setiap test, dipakai oleh rute web dan CLI."""
+    client = mongomock.MongoClient()
+    # Tanpa jeda reconnect: reset() di bawah tidak boleh membuat request berikutnya menunggu
+    app_module.app.config['MONGO_RECONNECT_BACKOFF'] = 0
+    app_module.mongo_manager.client_factory = lambda *args, **kwargs: client
+    app_module.mongo_manager.reset()
+    # API async (Motor) memakai data yang sama lewat mongomock_motor
+    app_module.api_mongo.client_factory = lambda *args, io_loop=None, **kwargs: mongomock_motor.AsyncMongoMockClient(
+        mock_mongo_client=client, mock_io_loop=io_loop)
+    app_module.api_mongo.reset()
+    app_module.mongo_manager._indexes_ensured = False
+    app_module.periode_ditutup.invalidate()
+    app_module.invalidasi_slip('*')
+    yield client.slip_gaji_db
+    app_module.mongo_manager.reset()
+    app_module.api_mongo.reset()
+
+
+@pytest.fixture
+def app(mongo):
+    app_module.app.config['TESTING'] = True
+    return app_module.app
+
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['admin_logged_in'] = True
+    return client
@@ -0,0 +1,86 @@
+import datetime
+
+import app as app_module
+
+RENTANG = {'start': '2025-05-01', 'end': '2025-05-04'}
+
+
+def _isi(mongo):
+    ani = mongo.karyawan.insert_one({'nama': 'Ani', 'nama_lower': 'ani', 'no_rek': '1', 'periode': ''}).inserted_id
+    mongo.absensi.insert_many([
+        {'karyawan_id': ani, 'tanggal': datetime.datetime(2025, 5, 1), 'status': 'Hadir', 'gaji_harian': 100},
+        {'karyawan_id': ani, 'tanggal': datetime.datetime(2025, 5, 2), 'status': 'Hadir', 'gaji_harian': 100},
+    ])
+    return ani
+
+
+def _form(**sel):
+    # Nilai asal sesuai _isi; sel berisi perubahan {'YYYY_MM_DD': (status, gaji)}
+    asal = {'2025-05-01': ('Hadir', '100'), '2025-05-02': ('Hadir', '100')}
+    form = {}
+    for hari in ('2025-05-01', '2025-05-02', '2025-05-03', '2025-05-04'):
+        status, gaji = asal.get(hari, ('', ''))
+        form[f'asal_status_{hari}'], form[f'asal_gaji_{hari}'] = status, gaji
+        form[f'status_{hari}'], form[f'gaji_{hari}'] = sel.get(hari.replace('-', '_'), (status, gaji))
+    return form
+
+
+def test_grid_menampilkan_semua_tanggal_rentang(admin_client, mongo):
+    ani = _isi(mongo)
+
+    response = admin_client.get(f'/absensi_grid/{ani}', query_string=RENTANG)
+
+    assert response.status_code == 200
+    teks = response.get_data(as_text=True)
+    for hari in ('2025-05-01', '2025-05-02', '2025-05-03', '2025-05-04'):
+        assert f'name="status_{hari}"' in teks
+
+
+def test_grid_hanya_menulis_sel_yang_berubah_dalam_satu_bulk_write(admin_client, mongo, monkeypatch):
+    ani = _isi(mongo)
+    panggilan = []
+    koleksi = type(mongo.absensi)
+    bulk_write_asli = koleksi.bulk_write
+
+    def bulk_write_dicatat(self, ops, *args, **kwargs):
+        if self.name == 'absensi':
+            panggilan.append(ops)
+        return bulk_write_asli(self, ops, *args, **kwargs)
+
+    monkeypatch.setattr(koleksi, 'bulk_write', bulk_write_dicatat)
+
+    response = admin_client.post(f'/absensi_grid/{ani}', query_string=RENTANG, data=_form(
+        **{'2025_05_01': ('OFF', ''), '2025_05_02': ('', ''), '2025_05_03': ('Hadir', '150')}
+    ))
+
+    assert response.status_code == 302
+    assert len(panggilan) == 1 and len(panggilan[0]) == 3
+    absensi = {doc['tanggal'].day: (doc['status'], doc['gaji_harian']) for doc in mongo.absensi.find()}
+    assert absensi == {1: ('OFF', None), 3: ('Hadir', 150)}
+    rekap = mongo.rekap_gaji.find_one({'karyawan_id': ani, 'bulan': '2025-05'})
+    assert (rekap['jumlah_hari'], rekap['hadir'], rekap['off'], rekap['total_gaji']) == (2, 1, 1, 150)
+
+
+def test_grid_tanpa_perubahan_tidak_menulis(admin_client, mongo):
+    ani = _isi(mongo)
+
+    admin_client.post(f'/absensi_grid/{ani}', query_string=RENTANG, data=_form())
+
+    assert mongo.absensi.count_documents({}) == 2
+    assert mongo.rekap_gaji.count_documents({}) == 0
+
+
+def test_grid_melewati_tanggal_periode_ditutup(admin_client, mongo):
+    ani = _isi(mongo)
+    mongo.periode.insert_one({
+        'nama': '01-02 Mei 2025', 'mulai': datetime.datetime(2025, 5, 1), 'selesai': datetime.datetime(2025, 5, 2),
+        'ditutup': True,
+    })
+    app_module.periode_ditutup.invalidate()
+
+    admin_client.post(f'/absensi_grid/{ani}', query_string=RENTANG, data=_form(
+        **{'2025_05_01': ('OFF', ''), '2025_05_03': ('Hadir', '150')}
+    ))
+
+    absensi = {doc['tanggal'].day: doc['status'] for doc in mongo.absensi.find()}
+    assert absensi == {1: 'Hadir', 2: 'Hadir', 3: 'Hadir'}
@@ -0,0 +1,40 @@
+from werkzeug.security import check_password_hash
+
+import app as app_module
+
+
+def _login(client, username, password):
+    return client.post('/admin/login', data={'username': username, 'password': password})
+
+
+def test_tanpa_admin_login_ditolak(app, mongo, monkeypatch):
+    monkeypatch.setitem(app.config, 'ADMIN_USERNAME', None)
+    monkeypatch.setitem(app.config, 'ADMIN_PASSWORD_HASH', None)
+
+    response = _login(app.test_client(), 'admin', 'admin123')
+
+    assert response.status_code == 200
+    assert b'Login gagal' in response.data
+
+
+def test_init_db_menanyakan_kata_sandi_admin(app, mongo, monkeypatch):
+    monkeypatch.setitem(app.config, 'ADMIN_USERNAME', None)
+    monkeypatch.setitem(app.config, 'ADMIN_PASSWORD_HASH', None)
+
+    result = app.test_cli_runner().invoke(args=['init-db'], input='rahasia-baru\nrahasia-baru\n')
+
+    assert result.exit_code == 0, result.output
+    admin = mongo.admins.find_one({'username': 'admin'})
+    assert check_password_hash(admin['password_hash'], 'rahasia-baru')
+    assert _login(app.test_client(), 'admin', 'rahasia-baru').status_code == 302
+
+
+def test_init_db_tidak_menambah_admin_jika_sudah_ada(app, mongo, monkeypatch):
+    monkeypatch.setitem(app.config, 'ADMIN_USERNAME', None)
+    monkeypatch.setitem(app.config, 'ADMIN_PASSWORD_HASH', None)
+    mongo.admins.insert_one({'username': 'budi', 'password_hash': app_module.generate_password_hash('x')})
+
+    result = app.test_cli_runner().invoke(args=['init-db'])
+
+    assert result.exit_code == 0, result.output
+    assert [a['username'] for a in mongo.admins.find()] == ['budi']
@@ -0,0 +1,50 @@
+import datetime
+
+import pytest
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+
+import app as app_module
+
+
+def _periode_ditutup(mongo):
+    karyawan_id = mongo.karyawan.insert_one({'nama': 'Eka', 'nama_lower': 'eka', 'no_rek': '1', 'periode': ''}).inserted_id
+    mongo.periode.insert_one({
+        'nama': '01-15 Juni 2025', 'mulai': datetime.datetime(2025, 6, 1), 'selesai': datetime.datetime(2025, 6, 15),
+        'ditutup': True,
+    })
+    absensi_id = mongo.absensi.insert_one({
+        'karyawan_id': karyawan_id, 'tanggal': datetime.datetime(2025, 6, 2), 'status': 'Hadir', 'gaji_harian': 100,
+    }).inserted_id
+    app_module.periode_ditutup.invalidate()
+    return karyawan_id, absensi_id
+
+
+def test_kunci_periode_api_tidak_bergantung_pada_klien_sync(mongo, admin_client, monkeypatch):
+    karyawan_id, absensi_id = _periode_ditutup(mongo)
+    # Klien sync sedang backoff: kunci periode tetap dibaca lewat Motor
+    monkeypatch.setattr(app_module.mongo_manager, 'get_db', lambda: None)
+
+    response = admin_client.post('/api/v1/absensi', json={
+        'karyawan_id': str(karyawan_id), 'tanggal': '2025-06-03', 'status': 'Hadir', 'gaji_harian': 100,
+    })
+    assert response.status_code == 409
+    app_module.periode_ditutup.invalidate()
+    assert admin_client.delete(f'/api/v1/absensi/{absensi_id}').status_code == 409
+    assert mongo.absensi.count_documents({}) == 1
+
+
+def test_api_gagal_tertutup_jika_periode_tidak_bisa_dimuat(mongo, admin_client, monkeypatch):
+    _, absensi_id = _periode_ditutup(mongo)
+
+    async def gagal(db):
+        raise ServerSelectionTimeoutError('server tidak terjangkau')
+
+    monkeypatch.setattr(app_module, '_q_periode_ditutup', gagal)
+
+    assert admin_client.delete(f'/api/v1/absensi/{absensi_id}').status_code == 503
+    assert mongo.absensi.count_documents({}) == 1
+
+
+def test_cache_tanpa_database_tidak_mengembalikan_daftar_kosong():
+    with pytest.raises(ConnectionFailure):
+        app_module.CachePeriodeDitutup(ttl=30).get(None)
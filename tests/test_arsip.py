@@ -0,0 +1,24 @@
+import datetime
+
+import app as app_module
+
+
+def test_dokumen_arsip_dihitung_per_karyawan_bulan_bukan_per_batch(mongo):
+    ids = mongo.karyawan.insert_many([
+        {'nama': n, 'nama_lower': n.lower(), 'no_rek': '1', 'periode': ''} for n in ('Ani', 'Budi')
+    ]).inserted_ids
+    mongo.absensi.insert_many([
+        {'karyawan_id': k, 'tanggal': datetime.datetime(2025, 5, d), 'status': 'Hadir', 'gaji_harian': 1000}
+        for k in ids for d in range(1, 11)
+    ])
+    mongo.periode.insert_one({
+        'nama': '01-10 Mei 2025', 'mulai': datetime.datetime(2025, 5, 1), 'selesai': datetime.datetime(2025, 5, 10),
+        'ditutup': True,
+    })
+    periode = mongo.periode.find_one()
+
+    # 20 hari dalam batch berisi 3: setiap karyawan-bulan tersebar di beberapa batch
+    stats = app_module.arsipkan_periode(mongo, periode, batch_size=3)
+
+    assert stats == {'diarsipkan': 20, 'dilewati': 0, 'dokumen': 2}
+    assert mongo.absensi_arsip.count_documents({}) == 2
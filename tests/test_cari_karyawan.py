@@ -0,0 +1,49 @@
+import app as app_module
+
+
+def _tambah(mongo, *nama):
+    mongo.karyawan.insert_many([
+        {'nama': n, 'nama_lower': app_module.nama_lower(n), 'no_rek': '1', 'periode': ''} for n in nama
+    ])
+
+
+def test_cari_tanpa_membedakan_huruf_besar_kecil(mongo):
+    _tambah(mongo, 'eka Putri', 'Eka Saputra', 'Budi')
+
+    items, next_after = app_module.cari_karyawan_keyset(mongo, 'EKA')
+
+    assert [i['nama'] for i in items] == ['eka Putri', 'Eka Saputra']
+    assert next_after is None
+
+
+def test_keyset_tidak_melewatkan_nama_yang_hanya_beda_huruf(mongo):
+    _tambah(mongo, 'budi', 'Budi', 'BUDI', 'Cici')
+
+    halaman, after = [], None
+    while True:
+        items, after = app_module.cari_karyawan_keyset(mongo, 'b', after, limit=1)
+        halaman.extend(i['nama'] for i in items)
+        if after is None:
+            break
+
+    assert halaman == ['BUDI', 'Budi', 'budi']
+
+
+def test_api_memakai_query_yang_sama(app, mongo):
+    _tambah(mongo, 'eka Putri', 'Eka Saputra', 'Budi')
+
+    data = app.test_client().get('/api/v1/karyawan?q=eka&limit=1').get_json()
+    assert [i['nama'] for i in data['items']] == ['eka Putri']
+    data = app.test_client().get(f"/api/v1/karyawan?q=eka&limit=1&after={data['next']}").get_json()
+    assert [i['nama'] for i in data['items']] == ['Eka Saputra']
+    assert data['next'] is None
+
+
+def test_migrate_nama_lower_mengisi_karyawan_lama(app, mongo):
+    mongo.karyawan.insert_one({'nama': 'Eka Saputra', 'no_rek': '1', 'periode': ''})
+
+    result = app.test_cli_runner().invoke(args=['migrate-nama-lower'])
+
+    assert result.exit_code == 0, result.output
+    assert mongo.karyawan.find_one({'nama': 'Eka Saputra'})['nama_lower'] == 'eka saputra'
+    assert app_module.cari_karyawan_keyset(mongo, 'eka')[0][0]['nama'] == 'Eka Saputra'
@@ -0,0 +1,64 @@
+"""Anggaran cold start: waktu import app.py dan latensi request pertama di proses Python baru.
+
+Anggaran bawaan diambil dari pengukuran (import sekitar 300-400 ms, request pertama
+ke '/' dengan mongomock sekitar 40 ms) ditambah ruang untuk variasi mesin; bisa
+dilonggarkan untuk CI yang lambat lewat COLD_START_IMPORT_BUDGET_MS dan
+COLD_START_FIRST_REQUEST_BUDGET_MS. Karena KDF kata sandi (~150 ms) masih bisa muat di
+dalam anggaran, tidak adanya hashing saat import diperiksa secara langsung.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import bench
+
+IMPORT_BUDGET_MS = float(os.environ.get('COLD_START_IMPORT_BUDGET_MS', 600))
+FIRST_REQUEST_BUDGET_MS = float(os.environ.get('COLD_START_FIRST_REQUEST_BUDGET_MS', 150))
+
+# Catat setiap pemanggilan KDF (werkzeug maupun hashlib) selama import app dan request pertama
+SKRIP_TANPA_HASH = """
+import hashlib, json, sys
+import werkzeug.security as ws
+panggilan = []
+def catat(nama, fungsi):
+    def pembungkus(*args, **kwargs):
+        panggilan.append(nama)
+        return fungsi(*args, **kwargs)
+    return pembungkus
+for nama in ('generate_password_hash', 'check_password_hash'):
+    setattr(ws, nama, catat(nama, getattr(ws, nama)))
+for nama in ('scrypt', 'pbkdf2_hmac'):
+    setattr(hashlib, nama, catat(nama, getattr(hashlib, nama)))
+import app as appmod
+saat_import = list(panggilan)
+import mongomock
+klien = mongomock.MongoClient()
+appmod.mongo_manager.client_factory = lambda *a, **k: klien
+status = appmod.app.test_client().get('/').status_code
+print(json.dumps({'import': saat_import, 'request': panggilan[len(saat_import):], 'status': status}))
+"""
+
+
+def test_cold_start_dalam_anggaran():
+    # p50 dari beberapa proses agar satu proses yang kebetulan lambat tidak menggagalkan test.
+    # Request pertama ke '/' membuat klien MongoDB, ping, dan membaca karyawan.
+    hasil = bench.ukur_cold_start(argparse.Namespace(mongomock=True, cold_start=3, cold_start_path='/'))
+
+    assert hasil['db_terhubung'], hasil
+    assert hasil['import_ms_p50'] <= IMPORT_BUDGET_MS, hasil
+    assert hasil['first_request_ms_p50'] <= FIRST_REQUEST_BUDGET_MS, hasil
+
+
+def test_tidak_ada_hash_kata_sandi_saat_import():
+    folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    keluaran = subprocess.run(
+        [sys.executable, '-c', SKRIP_TANPA_HASH], cwd=folder, env=dict(os.environ),
+        capture_output=True, text=True, check=True
+    ).stdout
+    data = json.loads(keluaran.strip().splitlines()[-1])
+
+    assert data['import'] == []
+    assert data['request'] == []
+    assert data['status'] < 500
@@ -0,0 +1,40 @@
+import datetime
+
+import app as app_module
+
+MEI = (datetime.datetime(2025, 5, 1), datetime.datetime(2025, 5, 31))
+
+
+def _isi(mongo):
+    ani, budi = mongo.karyawan.insert_many([
+        {'nama': n, 'nama_lower': n.lower(), 'no_rek': '1', 'periode': ''} for n in ('Ani', 'Budi')
+    ]).inserted_ids
+    mongo.absensi.insert_many([
+        {'karyawan_id': ani, 'tanggal': datetime.datetime(2025, 5, 1), 'status': 'Hadir', 'gaji_harian': 100},
+        {'karyawan_id': ani, 'tanggal': datetime.datetime(2025, 5, 2), 'status': 'OFF', 'gaji_harian': None},
+        {'karyawan_id': budi, 'tanggal': datetime.datetime(2025, 5, 1), 'status': 'Hadir', 'gaji_harian': 300},
+        {'karyawan_id': budi, 'tanggal': datetime.datetime(2025, 6, 1), 'status': 'Hadir', 'gaji_harian': 999},
+    ])
+    return ani, budi
+
+
+def test_dashboard_ringkasan_dan_peringkat_periode(mongo):
+    ani, budi = _isi(mongo)
+
+    hasil = app_module.ambil_dashboard(mongo, *MEI, per_page=1)
+
+    ringkasan = hasil['ringkasan']
+    assert (ringkasan['jumlah_hari'], ringkasan['hadir'], ringkasan['off'], ringkasan['total_gaji']) == (3, 2, 1, 400)
+    assert hasil['jumlah_karyawan'] == 2
+    assert hasil['pages'] == 2
+    assert [(row['_id'], row['nama'], row['total_gaji']) for row in hasil['peringkat']] == [(budi, 'Budi', 300)]
+
+
+def test_dashboard_cache_dibuang_saat_absensi_berubah(mongo):
+    ani, _ = _isi(mongo)
+    assert app_module.ambil_dashboard(mongo, *MEI)['ringkasan']['total_gaji'] == 400
+
+    mongo.absensi.insert_one({'karyawan_id': ani, 'tanggal': datetime.datetime(2025, 5, 3), 'status': 'Hadir', 'gaji_harian': 50})
+    assert app_module.ambil_dashboard(mongo, *MEI)['ringkasan']['total_gaji'] == 400
+    app_module.invalidasi_slip(ani)
+    assert app_module.ambil_dashboard(mongo, *MEI)['ringkasan']['total_gaji'] == 450
@@ -0,0 +1,60 @@
+import csv
+import datetime
+import io
+
+import openpyxl
+
+import app as app_module
+
+MEI = {'start': '2025-05-01', 'end': '2025-05-31'}
+
+
+def _isi(mongo):
+    budi, ani = mongo.karyawan.insert_many([
+        {'nama': n, 'nama_lower': n.lower(), 'no_rek': r, 'periode': ''} for n, r in (('Budi', '222'), ('Ani', '111'))
+    ]).inserted_ids
+    mongo.absensi.insert_many([
+        {'karyawan_id': ani, 'tanggal': datetime.datetime(2025, 5, 2), 'status': 'OFF', 'gaji_harian': None},
+        {'karyawan_id': budi, 'tanggal': datetime.datetime(2025, 5, 1), 'status': 'Hadir', 'gaji_harian': 300},
+        {'karyawan_id': ani, 'tanggal': datetime.datetime(2025, 5, 1), 'status': 'Hadir', 'gaji_harian': 100},
+        {'karyawan_id': ani, 'tanggal': datetime.datetime(2025, 6, 1), 'status': 'Hadir', 'gaji_harian': 999},
+    ])
+
+
+def test_export_csv_per_karyawan_dengan_subtotal_dan_total(admin_client, mongo):
+    _isi(mongo)
+
+    response = admin_client.get('/admin/export_absensi', query_string=dict(MEI, format='csv'))
+
+    assert response.status_code == 200
+    assert 'absensi_20250501_20250531.csv' in response.headers['Content-Disposition']
+    baris = list(csv.reader(io.StringIO(response.get_data().decode('utf-8-sig'))))
+    # Urut per karyawan_id (urutan insert), lalu tanggal
+    assert baris == [
+        app_module.EXPORT_HEADER,
+        ['Budi', '222', '2025-05-01', 'Hadir', '300'],
+        ['Budi', '222', 'SUBTOTAL', '1 hari', '300'],
+        ['Ani', '111', '2025-05-01', 'Hadir', '100'],
+        ['Ani', '111', '2025-05-02', 'OFF', ''],
+        ['Ani', '111', 'SUBTOTAL', '2 hari', '100'],
+        ['TOTAL', '2 karyawan', '', '3 hari', '400'],
+    ]
+
+
+def test_export_xlsx_dapat_dibaca_openpyxl(admin_client, mongo):
+    _isi(mongo)
+
+    response = admin_client.get('/admin/export_absensi', query_string=dict(MEI, format='xlsx'))
+
+    sheet = openpyxl.load_workbook(io.BytesIO(response.get_data())).active
+    baris = [list(row) for row in sheet.iter_rows(values_only=True)]
+    assert baris[0] == app_module.EXPORT_HEADER
+    assert baris[1] == ['Budi', '222', datetime.datetime(2025, 5, 1), 'Hadir', 300]
+    assert baris[-1] == ['TOTAL', '2 karyawan', None, '3 hari', 400]
+
+
+def test_export_menolak_rentang_terbalik(admin_client, mongo):
+    response = admin_client.get('/admin/export_absensi', query_string={'start': '2025-05-31', 'end': '2025-05-01'})
+
+    assert response.status_code == 200
+    assert 'Rentang tanggal atau format export tidak valid.' in response.get_data(as_text=True)
@@ -0,0 +1,20 @@
+import datetime
+import io
+import zipfile
+
+import app as app_module
+
+
+def test_label_periode_zip_memakai_nama_bulan_indonesia(mongo):
+    karyawan_id = mongo.karyawan.insert_one({'nama': 'Eka', 'nama_lower': 'eka', 'no_rek': '1', 'periode': ''}).inserted_id
+    mongo.absensi.insert_one({'karyawan_id': karyawan_id, 'tanggal': datetime.datetime(2025, 5, 2),
+                              'status': 'Hadir', 'gaji_harian': 70000})
+    buffer = io.BytesIO()
+
+    jumlah = app_module.tulis_zip_slip(mongo, datetime.datetime(2025, 5, 1), datetime.datetime(2025, 5, 16), buffer)
+
+    assert jumlah == 1
+    with zipfile.ZipFile(buffer) as arsip:
+        html = arsip.read(arsip.namelist()[0]).decode('utf-8')
+    assert '01-16 Mei 2025' in html
+    assert 'May' not in html
@@ -0,0 +1,22 @@
+import io
+
+import app as app_module
+
+
+def test_import_csv_menulis_absensi_dan_rekap(mongo):
+    karyawan_id = mongo.karyawan.insert_one({'nama': 'Eka', 'nama_lower': 'eka', 'no_rek': '1', 'periode': ''}).inserted_id
+    csv_bytes = (
+        'karyawan,tanggal,status,gaji_harian\n'
+        'Eka,2025-05-01,Hadir,70000\n'
+        f'{karyawan_id},02/05/2025,OFF,\n'
+        'Eka,2025-05-01,Hadir,70000\n'
+        'Budi,2025-05-01,Hadir,70000\n'
+        'Eka,2025-05-03,Hadir,70000.5\n'
+    ).encode('utf-8')
+
+    stats = app_module.import_absensi(mongo, app_module.baca_file_absensi(io.BytesIO(csv_bytes), 'absensi.csv'))
+
+    assert (stats['inserted'], stats['updated'], stats['rejected']) == (2, 0, 3)
+    rekap = mongo.rekap_gaji.find_one({'karyawan_id': karyawan_id, 'bulan': '2025-05'})
+    assert (rekap['jumlah_hari'], rekap['hadir'], rekap['off'], rekap['total_gaji']) == (2, 1, 1, 70000)
+    assert app_module.bangun_ulang_rekap(mongo, tulis=False)['berbeda'] == 0
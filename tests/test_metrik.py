@@ -0,0 +1,45 @@
+import datetime
+import types
+
+import app as app_module
+
+
+def test_server_timing_mencatat_perintah_mongo(app, mongo, monkeypatch):
+    ani = mongo.karyawan.insert_one({'nama': 'Ani', 'nama_lower': 'ani', 'no_rek': '1', 'periode': ''}).inserted_id
+    pemantau = app_module.PemantauPerintahMongo()
+    event = types.SimpleNamespace(command_name='aggregate', duration_micros=2500)
+
+    # mongomock tidak memancarkan event command, jadi event dikirim manual di dalam request
+    def _kirim_event():
+        pemantau.started(event)
+        pemantau.succeeded(event)
+
+    monkeypatch.setitem(app.before_request_funcs, None, app.before_request_funcs[None] + [_kirim_event])
+    response = app.test_client().get(f'/slip_gaji/{ani}')
+
+    assert response.status_code == 200
+    timing = response.headers['Server-Timing']
+    assert 'db;dur=2.5;desc="MongoDB (1 perintah)"' in timing
+    assert 'total;dur=' in timing
+
+
+def test_metrics_butuh_admin_dan_memuat_latensi_rute(app, admin_client):
+    assert app.test_client().get('/admin/metrics').status_code == 401
+
+    admin_client.get('/karyawan/cari?q=a')
+    response = admin_client.get('/admin/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    teks = response.get_data(as_text=True)
+    assert '# TYPE slip_gaji_http_request_duration_seconds histogram' in teks
+    assert 'slip_gaji_http_requests_total{route="/karyawan/cari",method="GET",status="200"}' in teks
+    assert 'slip_gaji_slip_cache_entries ' in teks
+
+
+def test_metrics_menerima_token_api(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'API_TOKEN', 'rahasia')
+    client = app.test_client()
+
+    assert client.get('/admin/metrics', headers={'Authorization': 'Bearer salah'}).status_code == 401
+    assert client.get('/admin/metrics', headers={'Authorization': 'Bearer rahasia'}).status_code == 200
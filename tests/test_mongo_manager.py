@@ -0,0 +1,91 @@
+import threading
+
+import mongomock
+from pymongo.errors import ServerSelectionTimeoutError
+
+import app as app_module
+
+
+class KlienPalsu:
+    """Pengganti MongoClient yang ping-nya bisa dibuat gagal dan mencatat close()."""
+
+    def __init__(self):
+        self._mongo = mongomock.MongoClient()
+        self.admin = self
+        self.ping_gagal = False
+        self.saat_ping = None
+        self.ditutup = 0
+
+    def command(self, nama):
+        if self.saat_ping:
+            self.saat_ping()
+        if self.ping_gagal:
+            raise ServerSelectionTimeoutError('server tidak terjangkau')
+        return {'ok': 1.0}
+
+    def get_database(self, nama):
+        return self._mongo.get_database(nama)
+
+    def close(self):
+        self.ditutup += 1
+
+
+def _manager(backoff=0):
+    config = dict(app_module.app.config, MONGO_HEALTHCHECK_INTERVAL=0, MONGO_RECONNECT_BACKOFF=backoff,
+                  MONGO_AUTO_INDEXES='off')
+    klien = []
+
+    def factory(*args, **kwargs):
+        klien.append(KlienPalsu())
+        return klien[-1]
+
+    return app_module.MongoConnectionManager(config, 'slip_gaji_db', client_factory=factory), klien
+
+
+def test_ping_gagal_tidak_menutup_klien_bersama():
+    manager, klien = _manager()
+    db_obj = manager.get_db()
+    assert db_obj is not None
+
+    klien[0].ping_gagal = True
+    assert manager.get_db() is None
+    assert klien[0].ditutup == 0
+
+    klien[0].ping_gagal = False
+    assert manager.get_db() is db_obj
+    assert len(klien) == 1
+
+
+def test_ping_tidak_menahan_lock():
+    manager, klien = _manager()
+    manager.get_db()
+    terkunci = []
+    klien[0].saat_ping = lambda: terkunci.append(manager._lock.locked())
+
+    manager.get_db()
+
+    assert terkunci == [False]
+
+
+def test_thread_lain_tidak_menunggu_ping_yang_berjalan():
+    manager, klien = _manager()
+    db_obj = manager.get_db()
+    hasil_lain = []
+
+    def saat_ping():
+        # Thread lain memakai status sehat terakhir alih-alih ikut ping atau menunggu
+        t = threading.Thread(target=lambda: hasil_lain.append(manager.get_db()))
+        t.start()
+        t.join(timeout=5)
+
+    klien[0].saat_ping = saat_ping
+    assert manager.get_db() is db_obj
+    assert hasil_lain == [db_obj]
+
+
+def test_connection_failure_di_request_tidak_menutup_klien(app, mongo):
+    app_module.mongo_manager.get_db()
+    with app.test_request_context('/'):
+        app_module.handle_connection_failure(ServerSelectionTimeoutError('putus'))
+    assert app_module.mongo_manager._client is not None
+    assert app_module.mongo_manager._healthy is False
@@ -0,0 +1,62 @@
+import datetime
+
+import pytest
+
+import app as app_module
+
+
+def _tgl(tahun, bulan, hari):
+    return datetime.datetime(tahun, bulan, hari)
+
+
+@pytest.mark.parametrize('teks, rentang', [
+    ('01-16 Mei 2025', (_tgl(2025, 5, 1), _tgl(2025, 5, 16))),
+    ('25 April - 10 Mei 2025', (_tgl(2025, 4, 25), _tgl(2025, 5, 10))),
+    ('25 Desember - 10 Januari 2026', (_tgl(2025, 12, 25), _tgl(2026, 1, 10))),
+    ('01 Jan 2025 s/d 31 Jan 2025', (_tgl(2025, 1, 1), _tgl(2025, 1, 31))),
+    ('Februari 2024', (_tgl(2024, 2, 1), _tgl(2024, 2, 29))),
+])
+def test_parse_periode_teks(teks, rentang):
+    assert app_module.parse_periode_teks(teks) == rentang
+
+
+@pytest.mark.parametrize('teks', ['', 'Mei', '16-01 Mei 2025', '01-16 Foo 2025'])
+def test_parse_periode_teks_menolak_teks_tidak_valid(teks):
+    with pytest.raises(ValueError):
+        app_module.parse_periode_teks(teks)
+
+
+def test_migrate_periode_menggabungkan_rentang_sama_dan_idempoten(app, mongo):
+    mongo.karyawan.insert_many([
+        {'nama': 'Ani', 'nama_lower': 'ani', 'no_rek': '1', 'periode': '01-16 Mei 2025'},
+        {'nama': 'Budi', 'nama_lower': 'budi', 'no_rek': '2', 'periode': '1-16 mei 2025'},
+        {'nama': 'Caca', 'nama_lower': 'caca', 'no_rek': '3', 'periode': 'Juni 2025'},
+        {'nama': 'Dodi', 'nama_lower': 'dodi', 'no_rek': '4', 'periode': 'tidak jelas'},
+    ])
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['migrate-periode', '--dry-run'])
+    assert result.exit_code == 0, result.output
+    assert mongo.periode.count_documents({}) == 0
+
+    result = runner.invoke(args=['migrate-periode'])
+    assert result.exit_code == 0, result.output
+    assert "GAGAL 'tidak jelas'" in result.output
+    assert sorted((p['mulai'], p['selesai']) for p in mongo.periode.find()) == [
+        (_tgl(2025, 5, 1), _tgl(2025, 5, 16)), (_tgl(2025, 6, 1), _tgl(2025, 6, 30)),
+    ]
+
+    result = runner.invoke(args=['migrate-periode'])
+    assert '0 periode baru dibuat, 2 sudah ada' in result.output
+    assert mongo.periode.count_documents({}) == 2
+
+
+def test_tambah_periode_menolak_rentang_ganda(admin_client, mongo):
+    data = {'mulai': '2025-05-01', 'selesai': '2025-05-16', 'nama': ''}
+
+    admin_client.post('/admin/periode', data=data)
+    response = admin_client.post('/admin/periode', data=data, follow_redirects=True)
+
+    assert 'sudah ada' in response.get_data(as_text=True)
+    periode = list(mongo.periode.find())
+    assert [(p['nama'], p['ditutup']) for p in periode] == [('01-16 Mei 2025', False)]
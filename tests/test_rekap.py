@@ -0,0 +1,91 @@
+import datetime
+
+import app as app_module
+
+
+def _karyawan_dengan_absensi_lama(mongo, hari=10, gaji=70000):
+    """Karyawan dengan absensi Mei 2025 yang ditulis sebelum rekap_gaji ada."""
+    karyawan_id = mongo.karyawan.insert_one({'nama': 'Eka Saputra', 'no_rek': '123', 'periode': ''}).inserted_id
+    mongo.absensi.insert_many([
+        {'karyawan_id': karyawan_id, 'tanggal': datetime.datetime(2025, 5, d), 'status': 'Hadir', 'gaji_harian': gaji}
+        for d in range(1, hari + 1)
+    ])
+    return karyawan_id
+
+
+def test_delta_pertama_menghitung_ulang_bulan_tanpa_rekap(mongo):
+    karyawan_id = _karyawan_dengan_absensi_lama(mongo)
+    baru = {'karyawan_id': karyawan_id, 'tanggal': datetime.datetime(2025, 5, 11), 'status': 'Hadir', 'gaji_harian': 70000}
+    mongo.absensi.insert_one(dict(baru))
+
+    app_module.terapkan_rekap_delta(mongo, baru=baru)
+
+    rekap = mongo.rekap_gaji.find_one({'karyawan_id': karyawan_id, 'bulan': '2025-05'})
+    assert rekap['jumlah_hari'] == 11
+    assert rekap['hadir'] == 11
+    assert rekap['total_gaji'] == 770000
+
+
+def test_slip_bulan_penuh_setelah_tambah_absensi_pertama(mongo, admin_client):
+    karyawan_id = _karyawan_dengan_absensi_lama(mongo)
+
+    response = admin_client.post(f'/add_absensi/{karyawan_id}', data={
+        'tanggal': '2025-05-11', 'status': 'Hadir', 'gaji_harian': '70000',
+    })
+    assert response.status_code == 302
+
+    html = admin_client.get(f'/slip_gaji/{karyawan_id}?start=2025-05-01&end=2025-05-31').get_data(as_text=True)
+    assert 'Rp770,000' in html
+    assert 'Rp70,000</strong>' not in html
+    assert '<strong>Hadir:</strong> 11 hari' in html
+
+
+def test_delta_berikutnya_tetap_inkremental(mongo):
+    karyawan_id = _karyawan_dengan_absensi_lama(mongo, hari=2)
+    app_module.hitung_ulang_rekap(mongo, {(karyawan_id, '2025-05')})
+    lama = mongo.absensi.find_one({'karyawan_id': karyawan_id, 'tanggal': datetime.datetime(2025, 5, 1)})
+
+    app_module.terapkan_rekap_delta(mongo, lama=lama, baru=dict(lama, status='OFF', gaji_harian=None))
+
+    rekap = mongo.rekap_gaji.find_one({'karyawan_id': karyawan_id, 'bulan': '2025-05'})
+    assert (rekap['jumlah_hari'], rekap['hadir'], rekap['off'], rekap['total_gaji']) == (2, 1, 1, 70000)
+
+
+def _cek_tanpa_drift(mongo):
+    stats = app_module.bangun_ulang_rekap(mongo, tulis=False)
+    assert (stats['berbeda'], stats['hilang'], stats['usang']) == (0, 0, 0), stats
+
+
+def test_hapus_absensi_terakhir_bulan_lewat_rute_html(mongo, admin_client):
+    karyawan_id = _karyawan_dengan_absensi_lama(mongo, hari=1)
+    app_module.hitung_ulang_rekap(mongo, {(karyawan_id, '2025-05')})
+    absensi = mongo.absensi.find_one({'karyawan_id': karyawan_id})
+
+    assert admin_client.post(f"/delete_absensi/{absensi['_id']}").status_code == 302
+
+    assert mongo.rekap_gaji.count_documents({}) == 0
+    _cek_tanpa_drift(mongo)
+
+
+def test_hapus_absensi_terakhir_bulan_lewat_api(mongo, admin_client):
+    karyawan_id = _karyawan_dengan_absensi_lama(mongo, hari=2)
+    app_module.hitung_ulang_rekap(mongo, {(karyawan_id, '2025-05')})
+
+    for absensi in list(mongo.absensi.find({'karyawan_id': karyawan_id})):
+        assert admin_client.delete(f"/api/v1/absensi/{absensi['_id']}").status_code == 204
+
+    assert mongo.rekap_gaji.count_documents({}) == 0
+    _cek_tanpa_drift(mongo)
+
+
+def test_pindah_absensi_terakhir_ke_bulan_lain(mongo):
+    karyawan_id = _karyawan_dengan_absensi_lama(mongo, hari=1)
+    app_module.hitung_ulang_rekap(mongo, {(karyawan_id, '2025-05')})
+    lama = mongo.absensi.find_one({'karyawan_id': karyawan_id})
+    baru = dict(lama, tanggal=datetime.datetime(2025, 6, 1))
+    mongo.absensi.replace_one({'_id': lama['_id']}, baru)
+
+    app_module.terapkan_rekap_delta(mongo, lama=lama, baru=baru)
+
+    assert [r['bulan'] for r in mongo.rekap_gaji.find()] == ['2025-06']
+    _cek_tanpa_drift(mongo)
@@ -0,0 +1,153 @@
+"""Rencana query (explain) untuk jalur yang peka terhadap pilihan indeks.
+
+mongomock tidak punya query planner, jadi test explain hanya berjalan terhadap
+MongoDB sungguhan: atur MONGO_TEST_URI (misalnya mongodb://localhost:27017).
+Database 'slip_gaji_test_rencana' dibuat dan di-drop oleh test ini.
+"""
+import datetime
+import os
+
+import mongomock
+import pytest
+from pymongo import MongoClient
+
+import app as app_module
+
+MONGO_TEST_URI = os.environ.get('MONGO_TEST_URI')
+perlu_mongodb = pytest.mark.skipif(not MONGO_TEST_URI, reason='MONGO_TEST_URI tidak diatur')
+
+MEI = (datetime.datetime(2025, 5, 1), datetime.datetime(2025, 5, 31))
+
+
+def _tahap_dan_indeks(explain):
+    """Semua nama tahap rencana (SORT, IXSCAN, ...) dan nama indeks dalam keluaran explain.
+
+    Pengurutan yang memblokir muncul sebagai tahap SORT, karena $sort setelah $match
+    selalu diteruskan ke query layer. Salinan perintah ('command') dilewati.
+    """
+    tahap, indeks = set(), set()
+
+    def jelajah(nilai):
+        if isinstance(nilai, dict):
+            for kunci, isi in nilai.items():
+                if kunci == 'command':
+                    continue
+                if kunci == 'stage' and isinstance(isi, str):
+                    tahap.add(isi)
+                elif kunci == 'indexName' and isinstance(isi, str):
+                    indeks.add(isi)
+                jelajah(isi)
+        elif isinstance(nilai, list):
+            for isi in nilai:
+                jelajah(isi)
+
+    jelajah(explain)
+    return tahap, indeks
+
+
+def _explain_aggregate(db_obj, pipeline, **opsi):
+    return db_obj.command('aggregate', 'absensi', pipeline=pipeline, explain=True, **opsi)
+
+
+@pytest.fixture
+def mongo_asli():
+    client = MongoClient(MONGO_TEST_URI, serverSelectionTimeoutMS=2000)
+    client.drop_database('slip_gaji_test_rencana')
+    db_obj = client.slip_gaji_test_rencana
+    app_module.ensure_indexes(db_obj)
+    ids = db_obj.karyawan.insert_many([
+        {'nama': f'Karyawan {i:03d}', 'nama_lower': f'karyawan {i:03d}', 'no_rek': '1', 'periode': ''}
+        for i in range(50)
+    ]).inserted_ids
+    db_obj.absensi.insert_many([
+        {'karyawan_id': k, 'tanggal': datetime.datetime(2025, 4, 1) + datetime.timedelta(days=d),
+         'status': 'Hadir', 'gaji_harian': 1000}
+        for k in ids for d in range(90)
+    ])
+    yield db_obj
+    client.drop_database('slip_gaji_test_rencana')
+    client.close()
+
+
+@perlu_mongodb
+def test_export_tanpa_arsip_tidak_mengurutkan_di_memori(mongo_asli):
+    pipeline = app_module.pipeline_export_absensi(*MEI)
+    explain = _explain_aggregate(mongo_asli, pipeline, **app_module.hint_export_absensi())
+
+    tahap, indeks = _tahap_dan_indeks(explain)
+    assert 'karyawan_id_tanggal_unik' in indeks
+    assert 'SORT' not in tahap
+
+
+def _rekam_aggregate(monkeypatch):
+    """Catat opsi aggregate pada koleksi absensi tanpa menjalankan pipeline-nya."""
+    panggilan = []
+
+    def aggregate(koleksi, pipeline, **opsi):
+        panggilan.append(opsi)
+        return mongomock.command_cursor.CommandCursor([])
+
+    monkeypatch.setattr(mongomock.collection.Collection, 'aggregate', aggregate)
+    return panggilan
+
+
+def test_export_memakai_hint_hanya_tanpa_arsip(mongo, monkeypatch):
+    panggilan = _rekam_aggregate(monkeypatch)
+
+    list(app_module.baris_export_absensi(mongo, *MEI))
+    mongo.periode.insert_one({'nama': 'Mei', 'mulai': MEI[0], 'selesai': MEI[1], 'ditutup': True})
+    app_module.periode_ditutup.invalidate()
+    list(app_module.baris_export_absensi(mongo, *MEI))
+
+    assert panggilan[0].get('hint') == 'karyawan_id_tanggal_unik'
+    assert 'hint' not in panggilan[1]
+
+
+def _explain_find(cursor):
+    return _tahap_dan_indeks(cursor.explain())
+
+
+@perlu_mongodb
+def test_slip_satu_karyawan_memakai_indeks_karyawan_tanggal(mongo_asli):
+    karyawan_id = mongo_asli.karyawan.find_one()['_id']
+    match = app_module.match_slip(karyawan_id, *MEI)
+
+    tahap, indeks = _tahap_dan_indeks(_explain_aggregate(mongo_asli, app_module.pipeline_slip(match)))
+    assert 'karyawan_id_tanggal_unik' in indeks
+    assert 'SORT' not in tahap
+
+    # Jalur bulan penuh: header dari rekap_gaji, baris dari find yang sama
+    tahap, indeks = _explain_find(mongo_asli.absensi.find(match).sort('tanggal', 1).limit(app_module.SLIP_PER_PAGE))
+    assert 'karyawan_id_tanggal_unik' in indeks
+    assert 'SORT' not in tahap
+
+
+@perlu_mongodb
+def test_rentang_saja_tidak_membaca_seluruh_koleksi(mongo_asli):
+    pipelines = [
+        app_module.pipeline_dashboard(*MEI, hari_ini=datetime.datetime(2025, 5, 10)),
+        app_module.pipeline_slip_periode(*MEI),
+    ]
+    for pipeline in pipelines:
+        tahap, indeks = _tahap_dan_indeks(_explain_aggregate(mongo_asli, pipeline))
+        assert 'COLLSCAN' not in tahap
+        assert 'karyawan_id_tanggal_unik' in indeks
+
+
+@perlu_mongodb
+def test_cari_karyawan_keyset_memakai_indeks_nama_lower(mongo_asli):
+    query = app_module.query_cari_karyawan('karyawan 01', after='Karyawan 010')
+    cursor = mongo_asli.karyawan.find(query).sort(app_module.URUTAN_CARI_KARYAWAN).limit(21)
+
+    tahap, indeks = _explain_find(cursor)
+    assert 'nama_lower_nama' in indeks
+    assert 'SORT' not in tahap
+
+
+def test_indeks_tanggal_lama_dihapus(mongo):
+    mongo.absensi.create_index([('tanggal', 1)], name='tanggal')
+
+    app_module.ensure_indexes(mongo)
+
+    assert 'tanggal' not in mongo.absensi.index_information()
+    assert 'karyawan_id_tanggal_unik' in mongo.absensi.index_information()
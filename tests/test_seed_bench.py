@@ -0,0 +1,14 @@
+import datetime
+
+
+def test_seed_bench_drop_membuang_periode_dan_arsip_lama(app, mongo):
+    mongo.periode.insert_one({'nama': 'lama', 'mulai': datetime.datetime(2025, 1, 1),
+                              'selesai': datetime.datetime(2025, 1, 15), 'ditutup': True})
+    mongo.absensi_arsip.insert_one({'karyawan_id': 1, 'bulan': '2025-01', 'hari': []})
+
+    result = app.test_cli_runner().invoke(args=['seed-bench', '--employees', '3', '--days', '5', '--drop'])
+
+    assert result.exit_code == 0, result.output
+    assert mongo.periode.count_documents({}) == 0
+    assert mongo.absensi_arsip.count_documents({}) == 0
+    assert mongo.absensi.count_documents({}) == 15
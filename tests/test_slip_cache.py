@@ -0,0 +1,48 @@
+import app as app_module
+
+
+def test_entri_lokal_kedaluwarsa_setelah_local_ttl(monkeypatch):
+    cache = app_module.SlipCache(max_entries=8, ttl=3600, local_ttl=30)
+    now = [1000.0]
+    monkeypatch.setattr(app_module.time, 'monotonic', lambda: now[0])
+    key = cache.key('k1', '2025-05-01', '2025-05-31', '', 1)
+    cache.set(key, '<p>slip</p>')
+    now[0] += 29
+    assert cache.get(key)['body'] == '<p>slip</p>'
+    now[0] += 2
+    assert cache.get(key) is None
+    assert len(cache) == 0
+
+
+def test_store_bersama_lokal_dan_invalidasi():
+    shared = app_module._buat_store_bersama('local://')
+    assert isinstance(shared, app_module.LocalSharedStore)
+    penulis = app_module.SlipCache(shared=shared)
+    pembaca = app_module.SlipCache(shared=shared)
+
+    key = penulis.key('k1', 'a')
+    penulis.set(key, '<p>lama</p>')
+    # Instance lain membaca entri dari store bersama
+    assert pembaca.get(pembaca.key('k1', 'a'))['body'] == '<p>lama</p>'
+
+    penulis.invalidate('k1')
+    # Generasi di store bersama berubah, jadi kunci di instance lain ikut berubah
+    assert pembaca.key('k1', 'a') != key
+    assert pembaca.get(pembaca.key('k1', 'a')) is None
+
+
+def test_id_karyawan_huruf_besar_memakai_kunci_cache_yang_sama(mongo, admin_client):
+    karyawan_id = str(mongo.karyawan.insert_one({'nama': 'Eka', 'nama_lower': 'eka', 'no_rek': '1', 'periode': ''}).inserted_id)
+    url_besar = f'/slip_gaji/{karyawan_id.upper()}'
+
+    assert b'Izin Khusus' not in admin_client.get(url_besar).data
+    # Tulis lewat ejaan huruf kecil, baca lewat huruf besar (dan sebaliknya)
+    admin_client.post(f'/add_absensi/{karyawan_id}', data={
+        'tanggal': '2025-05-02', 'status': 'Izin Khusus', 'gaji_harian': '',
+    }, follow_redirects=True)
+    assert b'Izin Khusus' in admin_client.get(url_besar).data
+
+    admin_client.post(f'/edit_karyawan/{karyawan_id.upper()}', data={
+        'nama': 'Eka Baru', 'no_rek': '1', 'periode': 'p',
+    }, follow_redirects=True)
+    assert b'Eka Baru' in admin_client.get(f'/slip_gaji/{karyawan_id}').data
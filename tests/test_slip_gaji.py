@@ -0,0 +1,63 @@
+import datetime
+
+import app as app_module
+
+MEI = (datetime.datetime(2025, 5, 1), datetime.datetime(2025, 5, 31))
+
+
+def _isi(mongo):
+    ani = mongo.karyawan.insert_one({'nama': 'Ani', 'nama_lower': 'ani', 'no_rek': '1', 'periode': ''}).inserted_id
+    mongo.absensi.insert_many([
+        {'karyawan_id': ani, 'tanggal': datetime.datetime(2025, 5, d), 'status': s, 'gaji_harian': g}
+        for d, s, g in ((3, 'Hadir', 100), (1, 'Hadir', 200), (2, 'OFF', None), (4, 'CUTI WAISAK', None), (5, 'Sakit', None))
+    ])
+    mongo.absensi.insert_one({'karyawan_id': ani, 'tanggal': datetime.datetime(2025, 6, 1), 'status': 'Hadir', 'gaji_harian': 999})
+    return ani
+
+
+def test_slip_agregasi_server_difilter_periode_dan_dipaginasi(mongo):
+    ani = _isi(mongo)
+
+    slip = app_module.ambil_slip(mongo, ani, datetime.datetime(2025, 5, 1), datetime.datetime(2025, 5, 10), per_page=2)
+
+    assert (slip['total_gaji'], slip['jumlah_hari'], slip['hadir'], slip['off'], slip['cuti'], slip['lainnya']) == (300, 5, 2, 1, 1, 1)
+    assert slip['pages'] == 3
+    assert [row['tanggal'].day for row in slip['rows']] == [1, 2]
+
+    halaman_3 = app_module.ambil_slip(mongo, ani, datetime.datetime(2025, 5, 1), datetime.datetime(2025, 5, 10),
+                                      page=3, per_page=2)
+    assert [row['tanggal'].day for row in halaman_3['rows']] == [5]
+
+
+def test_slip_bulan_penuh_sama_dengan_agregasi(mongo):
+    ani = _isi(mongo)
+    app_module.hitung_ulang_rekap(mongo, {(ani, datetime.datetime(2025, 5, 1))})
+
+    dari_rekap = app_module.ambil_slip(mongo, ani, *MEI)
+    mongo.rekap_gaji.delete_many({})
+    dari_agregasi = app_module.ambil_slip(mongo, ani, *MEI)
+
+    assert dari_rekap == dari_agregasi
+
+
+def test_halaman_slip_menampilkan_total_periode(app, mongo):
+    ani = _isi(mongo)
+
+    response = app.test_client().get(f'/slip_gaji/{ani}', query_string={'start': '2025-05-01', 'end': '2025-05-31'})
+
+    assert response.status_code == 200
+    assert 'Rp300' in response.get_data(as_text=True)
+
+
+def test_halaman_slip_memakai_rentang_periode_terpilih(app, mongo):
+    ani = _isi(mongo)
+    periode_id = mongo.periode.insert_one({
+        'nama': '01-03 Mei 2025', 'mulai': datetime.datetime(2025, 5, 1), 'selesai': datetime.datetime(2025, 5, 3),
+        'ditutup': False,
+    }).inserted_id
+
+    response = app.test_client().get(f'/slip_gaji/{ani}', query_string={'periode_id': str(periode_id)})
+
+    teks = response.get_data(as_text=True)
+    assert '<strong>Rp300</strong>' in teks
+    assert 'Rp999' not in teks
@@ -0,0 +1,42 @@
+import pytest
+
+import app as app_module
+
+
+@pytest.mark.parametrize('nilai, hasil', [(70000, 70000), (70000.0, 70000), ('70000', 70000), (' 70000.0 ', 70000)])
+def test_parse_gaji_harian_menerima_bilangan_bulat(nilai, hasil):
+    assert app_module.parse_gaji_harian(nilai) == hasil
+
+
+@pytest.mark.parametrize('nilai', [1.7, '1.7', 70000.5, '70000.5', 'abc', True, float('nan')])
+def test_parse_gaji_harian_menolak_pecahan(nilai):
+    with pytest.raises(ValueError):
+        app_module.parse_gaji_harian(nilai)
+
+
+def test_import_menolak_gaji_pecahan():
+    with pytest.raises(ValueError, match='gaji_harian'):
+        app_module.parse_baris_absensi({'karyawan': 'Eka', 'tanggal': '2025-05-01', 'status': 'Hadir', 'gaji_harian': '70000.5'})
+
+
+@pytest.mark.parametrize('gaji', [1.7, '1.7'])
+def test_api_absensi_menolak_gaji_pecahan(admin_client, mongo, gaji):
+    karyawan_id = mongo.karyawan.insert_one({'nama': 'Eka', 'nama_lower': 'eka', 'no_rek': '1', 'periode': ''}).inserted_id
+
+    response = admin_client.post('/api/v1/absensi', json={
+        'karyawan_id': str(karyawan_id), 'tanggal': '2025-05-01', 'status': 'Hadir', 'gaji_harian': gaji,
+    })
+
+    assert response.status_code == 400
+    assert mongo.absensi.count_documents({}) == 0
+
+
+def test_api_slip_batch_menolak_start_setelah_end(app, mongo):
+    karyawan_id = mongo.karyawan.insert_one({'nama': 'Eka', 'nama_lower': 'eka', 'no_rek': '1', 'periode': ''}).inserted_id
+
+    response = app.test_client().post('/api/v1/slip/batch', json={
+        'ids': [str(karyawan_id)], 'start': '2025-05-31', 'end': '2025-05-01',
+    })
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'start tidak boleh setelah end.'